@@ -0,0 +1,168 @@
+"""
+Async versions of the database-backed endpoints, mounted when DB_MODE=async.
+
+Each handler mirrors its sync counterpart in main.py but awaits an
+AsyncSession instead of blocking a threadpool worker on SessionLocal.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Restaurant as RestaurantModel, get_async_db
+from pagination import InvalidCursor
+from listing import ListingRequest, listing_request, build_listing, listing_response
+from stats import CACHE_HEADERS, not_modified, stats_cache
+from snapshot import snapshot
+from batch_updates import batch_result, grouped_updates, merge_updates, select_rows, toggle_visited_rows
+from schemas import (
+    Restaurant, RestaurantUpdate, RestaurantBatchUpdate, RestaurantBatchToggle,
+    BatchUpdateResult, PaginatedResponse, Stats
+)
+
+router = APIRouter()
+
+
+async def _get_or_404(db: AsyncSession, restaurant_id: int) -> RestaurantModel:
+    restaurant = await db.get(RestaurantModel, restaurant_id)
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return restaurant
+
+
+@router.get("/api/restaurants", response_model=PaginatedResponse)
+async def get_restaurants(
+    request: ListingRequest = Depends(listing_request),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get all restaurants with optional filters and pagination."""
+    try:
+        if snapshot.ready and not request.filters.query:
+            return snapshot.page(request)
+        listing = build_listing(request)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    facet_rows = (await db.execute(listing.facets)).all() if listing.facets is not None else None
+    total = await db.scalar(listing.count) if listing.count is not None else None
+    rows = (await db.scalars(listing.rows)).all()
+    return listing_response(listing, rows, total, facet_rows)
+
+
+@router.get("/api/restaurants/{restaurant_id}", response_model=Restaurant)
+async def get_restaurant(restaurant_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get a single restaurant by ID."""
+    if snapshot.ready:
+        restaurant = snapshot.get(restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        return restaurant
+    return await _get_or_404(db, restaurant_id)
+
+
+@router.get("/api/stats", response_model=Stats)
+async def get_stats(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Get statistics about the restaurant collection."""
+    cached = not_modified(request, stats_cache.etag)
+    if cached:
+        return cached
+
+    stats, etag = await stats_cache.get_async(db)
+    fresh = not_modified(request, etag)
+    if fresh:
+        return fresh
+
+    response.headers.update({**CACHE_HEADERS, "ETag": etag})
+    return stats
+
+
+@router.patch("/api/restaurants/{restaurant_id}/toggle-visited", response_model=Restaurant)
+async def toggle_visited(restaurant_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Toggle visited status for a restaurant."""
+    restaurant = await _get_or_404(db, restaurant_id)
+    restaurant.visited = not restaurant.visited
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(restaurant)
+    snapshot.upsert(restaurant)
+    return restaurant
+
+
+@router.patch("/api/restaurants/{restaurant_id}", response_model=Restaurant)
+async def update_restaurant(
+    restaurant_id: int,
+    updates: RestaurantUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update a restaurant's fields."""
+    restaurant = await _get_or_404(db, restaurant_id)
+    for field, value in updates.model_dump(exclude_unset=True).items():
+        setattr(restaurant, field, value)
+    await db.commit()
+    stats_cache.invalidate()
+    await db.refresh(restaurant)
+    snapshot.upsert(restaurant)
+    return restaurant
+
+
+@router.patch("/api/restaurants:batch", response_model=BatchUpdateResult)
+async def batch_update_restaurants(batch: RestaurantBatchUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Apply several restaurant updates in one transaction (one executemany per set of fields)."""
+    requested = merge_updates(batch)
+    current = {row.id: row for row in (await db.execute(select_rows(requested))).all()}
+
+    changed_ids = []
+    for stmt, params in grouped_updates(requested, current):
+        await db.execute(stmt, params)
+        changed_ids.extend(p["target_id"] for p in params)
+
+    changed = (await db.execute(select_rows(changed_ids))).all() if changed_ids else []
+    await db.commit()
+
+    if changed:
+        stats_cache.invalidate()
+        for row in changed:
+            snapshot.upsert(row)
+
+    return batch_result(changed, requested, current)
+
+
+@router.patch("/api/restaurants:batch-toggle-visited", response_model=BatchUpdateResult)
+async def batch_toggle_visited(batch: RestaurantBatchToggle, db: AsyncSession = Depends(get_async_db)):
+    """Toggle visited status for several restaurants with one UPDATE."""
+    ids = list(dict.fromkeys(batch.ids))
+
+    await db.execute(toggle_visited_rows(ids))
+    changed = (await db.execute(select_rows(ids))).all()
+    await db.commit()
+
+    if changed:
+        stats_cache.invalidate()
+        for row in changed:
+            snapshot.upsert(row)
+
+    return batch_result(changed, ids, (row.id for row in changed))
+
+
+@router.delete("/api/restaurants/{restaurant_id}")
+async def delete_restaurant(restaurant_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete a restaurant by ID."""
+    restaurant = await _get_or_404(db, restaurant_id)
+    await db.delete(restaurant)
+    await db.commit()
+    stats_cache.invalidate()
+    snapshot.remove(restaurant_id)
+    return {"message": f"Deleted {restaurant.name}"}
+
+
+@router.delete("/api/restaurants/by-name/{name}")
+async def delete_restaurant_by_name(name: str, db: AsyncSession = Depends(get_async_db)):
+    """Delete a restaurant by name."""
+    restaurant = await db.scalar(select(RestaurantModel).where(RestaurantModel.name == name).limit(1))
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    await db.delete(restaurant)
+    await db.commit()
+    stats_cache.invalidate()
+    snapshot.remove(restaurant.id)
+    return {"message": f"Deleted {name}"}
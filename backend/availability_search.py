@@ -0,0 +1,201 @@
+"""
+Ad-hoc availability search across several restaurants.
+
+Every restaurant is checked concurrently and its result is yielded as soon
+as it resolves, so the API can stream results instead of waiting for the
+slowest venue. Lookups go through the checker's availability cache: a
+restaurant whose dates are cached and fresh is answered without touching
+the booking site. With the scheduler running in the API process, searches
+use its checker, browser and cache (see embedded_scheduler.py); otherwise
+a browser is started by the first search that has to scrape. Like the
+scheduler, Resy is tried before OpenTable.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import AsyncIterator, Optional
+
+from logs import correlated
+from scraper import AvailabilityChecker, AvailableSlot, resy_slug
+
+AVAILABILITY_SEARCH_MAX_RESTAURANTS = int(os.environ.get("AVAILABILITY_SEARCH_MAX_RESTAURANTS", "50"))
+# Seconds one restaurant may take before it's reported as timed out
+AVAILABILITY_SEARCH_TIMEOUT = float(os.environ.get("AVAILABILITY_SEARCH_TIMEOUT", "60"))
+# Slots this many minutes either side of the requested time are returned
+AVAILABILITY_SEARCH_WINDOW_MINUTES = int(os.environ.get("AVAILABILITY_SEARCH_WINDOW_MINUTES", "90"))
+
+logger = logging.getLogger(__name__)
+
+
+def _minutes(hhmm: str) -> Optional[int]:
+    try:
+        hours, minutes = hhmm.split(":")
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+
+def near_time(slots: list[AvailableSlot], target: Optional[str], window: int) -> list[AvailableSlot]:
+    """The slots within `window` minutes of `target` (HH:MM, or None for all), by time."""
+    center = _minutes(target) if target else None
+    if center is not None:
+        slots = [
+            s for s in slots
+            if (m := _minutes(s.time)) is not None and abs(m - center) <= window
+        ]
+    return sorted(slots, key=lambda s: (s.time, s.platform))
+
+
+def booking_venues(restaurant: dict) -> list[tuple[str, str]]:
+    """The (platform, venue) pairs a restaurant can be checked on, in order of preference."""
+    urls = restaurant.get("booking_urls") or {}
+    venues = []
+    slug = resy_slug(urls.get("resy"))
+    if slug:
+        venues.append(("resy", slug))
+    if urls.get("opentable"):
+        venues.append(("opentable", restaurant["name"]))
+    return venues
+
+
+class AvailabilitySearch:
+    """Fans searches out over one shared checker, started on first use."""
+
+    def __init__(
+        self,
+        checker: Optional[AvailabilityChecker] = None,
+        timeout: float = AVAILABILITY_SEARCH_TIMEOUT,
+        window_minutes: int = AVAILABILITY_SEARCH_WINDOW_MINUTES
+    ):
+        self.checker = checker or AvailabilityChecker()
+        self._own_checker = self.checker
+        # Loop the checker runs on, when that's another thread's
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.timeout = timeout
+        self.window_minutes = window_minutes
+        self._start_lock = asyncio.Lock()
+
+        self.searches = 0
+        self.cached = 0
+        self.scraped = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def attach(self, checker: AvailabilityChecker, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Search with another component's started checker (and cache), on its loop."""
+        self.checker = checker
+        self.loop = loop
+
+    def detach(self):
+        """Go back to this search's own checker."""
+        self.checker = self._own_checker
+        self.loop = None
+
+    async def _ensure_started(self):
+        async with self._start_lock:
+            if self.checker.resy_scraper is None:
+                await self.checker.start()
+
+    async def stop(self):
+        if self._own_checker.browsers:
+            await self._own_checker.stop()
+
+    async def search(
+        self,
+        restaurants: list[dict],
+        date: str,
+        time_: Optional[str] = None,
+        party_size: int = 2
+    ) -> AsyncIterator[dict]:
+        """Yield one result per restaurant, in the order the checks finish."""
+        self.searches += 1
+        # The checks' scrapes log under the search's id
+        with correlated("search"):
+            tasks = [
+                asyncio.create_task(self._check(restaurant, date, time_, party_size))
+                for restaurant in restaurants
+            ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The client went away (or the caller stopped reading)
+            for task in tasks:
+                task.cancel()
+
+    async def _check(self, restaurant: dict, date: str, time_: Optional[str], party_size: int) -> dict:
+        started = time.perf_counter()
+        result = {"restaurant_id": restaurant["id"], "slots": [], "cached": False, "error": None}
+        venues = booking_venues(restaurant)
+        if not venues:
+            result["error"] = "No Resy or OpenTable booking URL"
+            return result
+
+        lookup = self._slots(venues, date, time_, party_size)
+        if self.loop is not None and self.loop is not asyncio.get_running_loop():
+            lookup = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(lookup, self.loop))
+        try:
+            slots, cached = await asyncio.wait_for(lookup, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            result["error"] = "Timed out"
+        except Exception as e:
+            # A failing venue (or browser launch) is reported, not allowed to end the stream
+            self.errors += 1
+            logger.warning(
+                "Availability search failed for restaurant %s: %s", restaurant["id"], e,
+                extra={"restaurant_id": restaurant["id"]}
+            )
+            result["error"] = f"Check failed: {(str(e).splitlines() or [type(e).__name__])[0]}"
+        else:
+            if cached:
+                self.cached += 1
+            else:
+                self.scraped += 1
+            result["cached"] = cached
+            result["slots"] = [
+                {
+                    "date": s.date,
+                    "time": s.time,
+                    "party_size": s.party_size,
+                    "booking_url": s.booking_url,
+                    "platform": s.platform,
+                }
+                for s in slots
+            ]
+        result["ms"] = round((time.perf_counter() - started) * 1000)
+        return result
+
+    async def _slots(
+        self,
+        venues: list[tuple[str, str]],
+        date: str,
+        time_: Optional[str],
+        party_size: int
+    ) -> tuple[list[AvailableSlot], bool]:
+        """Slots near the requested time on the first platform that has any, and whether all came from the cache."""
+        cached = True
+        slots = []
+        for platform, venue in venues:
+            found = self.checker.cached_slots(platform, venue, [date], party_size)
+            if found is None:
+                cached = False
+                await self._ensure_started()
+                check = self.checker.check_resy if platform == "resy" else self.checker.check_opentable
+                found = await check(venue, [date], party_size)
+            slots = near_time(found, time_, self.window_minutes)
+            if slots:
+                break
+        return slots, cached
+
+    def stats(self) -> dict:
+        return {
+            "searches": self.searches,
+            "cached": self.cached,
+            "scraped": self.scraped,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "browser_started": self.checker.resy_scraper is not None,
+        }
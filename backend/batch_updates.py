@@ -0,0 +1,65 @@
+"""
+Batch restaurant update statements shared by the sync and async endpoints.
+
+The handlers in main.py and async_api.py run these with a Session or an
+AsyncSession; the statements and the grouping of updates are the same.
+"""
+
+from sqlalchemy import bindparam, case, select, update
+from sqlalchemy.sql import Select, Update
+
+from models import Restaurant as RestaurantModel
+from schemas import BatchUpdateResult, RestaurantBatchUpdate
+
+table = RestaurantModel.__table__
+
+
+def merge_updates(batch: RestaurantBatchUpdate) -> dict[int, dict]:
+    """Fields to set per restaurant id; for repeated ids the last value for each field wins."""
+    requested: dict[int, dict] = {}
+    for item in batch.updates:
+        requested.setdefault(item.id, {}).update(item.model_dump(exclude_unset=True, exclude={"id"}))
+    return requested
+
+
+def select_rows(ids) -> Select:
+    return select(table).where(table.c.id.in_(ids)).order_by(table.c.id)
+
+
+def grouped_updates(requested: dict[int, dict], current: dict) -> list[tuple[Update, list[dict]]]:
+    """
+    One executemany UPDATE per set of changed fields, with its parameters.
+
+    Restaurants missing from `current` (id -> row) and fields that already
+    have the requested value are left out.
+    """
+    groups: dict[tuple, list[dict]] = {}
+    for restaurant_id, fields in requested.items():
+        row = current.get(restaurant_id)
+        if row is None:
+            continue
+        changes = {f: v for f, v in fields.items() if getattr(row, f) != v}
+        if changes:
+            params = {f"new_{f}": v for f, v in changes.items()}
+            groups.setdefault(tuple(sorted(changes)), []).append({"target_id": restaurant_id, **params})
+
+    return [
+        (
+            update(table).where(table.c.id == bindparam("target_id")).values(
+                {f: bindparam(f"new_{f}") for f in fields}
+            ),
+            params
+        )
+        for fields, params in groups.items()
+    ]
+
+
+def toggle_visited_rows(ids: list[int]) -> Update:
+    return update(table).where(table.c.id.in_(ids)).values(
+        visited=case((table.c.visited == True, False), else_=True)
+    )
+
+
+def batch_result(changed: list, requested_ids, found_ids) -> BatchUpdateResult:
+    found = set(found_ids)
+    return BatchUpdateResult(items=changed, not_found=[i for i in requested_ids if i not in found])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark 1k restaurant updates applied one request at a time versus batched.
+
+Calls the endpoint functions directly against a temporary SQLite database.
+
+Usage:
+    python benchmarks/bench_batch_updates.py --updates 1000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import make_engine, populate
+import main
+from schemas import RestaurantBatchToggle, RestaurantBatchUpdate, RestaurantUpdate
+
+
+def timed(label: str, Session, fn) -> float:
+    db = Session()
+    try:
+        started = time.perf_counter()
+        fn(db)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(f"  {label:<32} {elapsed * 1000:>9.1f} ms")
+    return elapsed
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    ids = list(range(1, args.updates + 1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(Path(tmp) / "batch.db")
+        populate(engine, max(args.rows, args.updates))
+        Session = sessionmaker(bind=engine)
+
+        def toggle_each(db):
+            for i in ids:
+                main.toggle_visited(i, db=db)
+
+        def update_each(db):
+            for i in ids:
+                main.update_restaurant(i, RestaurantUpdate(notes=f"note {i}"), db=db)
+
+        print(f"{args.updates} visited toggles")
+        single = timed("individual requests", Session, toggle_each)
+        batched = timed("one batch-toggle request", Session, lambda db: main.batch_toggle_visited(
+            RestaurantBatchToggle(ids=ids), db=db
+        ))
+        print(f"  speedup: {single / batched:.1f}x")
+
+        print(f"{args.updates} field updates")
+        single = timed("individual requests", Session, update_each)
+        batched = timed("one batch request", Session, lambda db: main.batch_update_restaurants(
+            RestaurantBatchUpdate(updates=[{"id": i, "notes": f"batched {i}"} for i in ids]), db=db
+        ))
+        print(f"  speedup: {single / batched:.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Time how long BrowserManager takes to replace a hung browser.
+
+Uses stand-in browsers (no Chromium needed): the first one accepts the
+launch and then never finishes opening a context, every later one works.
+A check is started on the hung browser and the health check runs while it's
+stuck. Reports how long the health check and the stuck check took, and
+whether a check on the relaunched browser goes through. A page whose setup
+hook fails must also be closed rather than left in its context.
+
+Exits non-zero if the health check doesn't relaunch the browser within a few
+--timeout periods, which makes it usable as a regression check for hangs.
+
+Usage:
+    python benchmarks/bench_browser_recovery.py --timeout 0.5
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import synthetic  # noqa: F401  (puts the backend modules on sys.path)
+from browser_manager import BrowserManager
+
+
+class StubPage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class StubContext:
+    def __init__(self):
+        self.pages: list[StubPage] = []
+
+    async def new_page(self) -> StubPage:
+        page = StubPage()
+        self.pages.append(page)
+        return page
+
+    async def storage_state(self) -> dict:
+        return {}
+
+    async def close(self):
+        for page in self.pages:
+            page.closed = True
+
+
+class StubBrowser:
+    def __init__(self, hung: bool):
+        self.hung = hung
+        self.contexts: list[StubContext] = []
+
+    def is_connected(self) -> bool:
+        return True
+
+    async def new_context(self, **kwargs) -> StubContext:
+        if self.hung:
+            await asyncio.Event().wait()
+        context = StubContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        pass
+
+
+async def hung_browser(timeout: float) -> list[str]:
+    browsers: list[StubBrowser] = []
+
+    async def launch():
+        browsers.append(StubBrowser(hung=not browsers))
+        return browsers[-1]
+
+    manager = BrowserManager(launch=launch, health_interval=0, health_timeout=timeout, rss=lambda: None)
+    await manager.start()
+
+    async def stuck_check():
+        async with manager.page("resy"):
+            pass
+
+    started = time.perf_counter()
+    check = asyncio.create_task(stuck_check())
+    await asyncio.sleep(timeout / 10)
+    failures = []
+    try:
+        await asyncio.wait_for(manager.check_health(), timeout * 4)
+    except asyncio.TimeoutError:
+        failures.append("health check still blocked")
+    health_seconds = time.perf_counter() - started
+
+    await asyncio.wait([check], timeout=timeout * 4)
+    check_seconds = time.perf_counter() - started
+    if not check.done():
+        failures.append("check on the hung browser never returned")
+        check.cancel()
+    elif check.exception() is None:
+        failures.append("check on the hung browser succeeded")
+
+    if manager.restarts != 1 or manager.generation != 2:
+        failures.append(f"restarts={manager.restarts} generation={manager.generation}, expected 1 and 2")
+    if not failures:
+        try:
+            await asyncio.wait_for(stuck_check(), timeout * 4)
+        except Exception as e:
+            failures.append(f"check on the relaunched browser failed: {e!r}")
+    await manager.stop()
+
+    print(f"hung browser, health timeout {timeout:g}s")
+    print(f"  health check returned after  {health_seconds:.2f} s")
+    print(f"  stuck check failed after     {check_seconds:.2f} s")
+    print(f"  restarts {manager.restarts}, browser generation {manager.generation}")
+    return failures
+
+
+async def failing_setup() -> list[str]:
+    browser = StubBrowser(hung=False)
+
+    async def launch():
+        return browser
+
+    async def setup(page):
+        raise RuntimeError("setup failed")
+
+    manager = BrowserManager(setup=setup, launch=launch, health_interval=0, rss=lambda: None)
+    await manager.start()
+    for _ in range(10):
+        try:
+            async with manager.page("resy"):
+                pass
+        except RuntimeError:
+            pass
+    open_pages = sum(not p.closed for c in browser.contexts for p in c.pages)
+    await manager.stop()
+
+    print(f"failing page setup: {open_pages} of 10 pages left open")
+    return [f"{open_pages} pages left open after failed setup"] if open_pages else []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--timeout", type=float, default=0.5, help="health_timeout for the manager")
+    args = parser.parse_args()
+
+    failures = asyncio.run(hung_browser(args.timeout)) + asyncio.run(failing_setup())
+    if failures:
+        print(f"FAIL: {'; '.join(failures)}")
+        return 1
+    print("OK: the hung browser was relaunched")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Soak test the scraper's browser handling and report memory over time.
+
+Runs Resy and OpenTable checks continuously against the local fixture server
+through a real headless Chromium (needs `playwright install chromium`, no
+internet access), sampling the resident memory of the Playwright driver and
+browser processes. Two setups:
+
+  managed  - BrowserManager: warm contexts per platform, recycled after
+             --max-pages checks or above --max-rss-mb, health-checked
+  legacy   - one browser launched once with a PagePool, never restarted
+
+With --crash-at, the browser is closed under the running checks partway
+through. The managed run is expected to restart it and carry on.
+
+Usage:
+    python benchmarks/bench_browser_soak.py --minutes 10 --sample 30
+    python benchmarks/bench_browser_soak.py --setup managed --minutes 2 --crash-at 60
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from playwright.async_api import async_playwright
+
+import synthetic  # noqa: F401  (puts the backend modules on sys.path)
+from fixture_server import FixtureServer
+from browser_manager import BrowserManager, process_tree_rss
+from scraper import (
+    PagePool, PlatformLimiter, ResyScraper, OpenTableScraper, block_heavy_resources
+)
+
+
+class Soak:
+    def __init__(self, server: FixtureServer, pages_for, concurrency: int):
+        limiter = lambda: PlatformLimiter(concurrency, 0, jitter=0)
+        self.scrapers = [
+            (ResyScraper(pages_for("resy"), limiter(), base_url=server.url), "fixture-venue"),
+            (OpenTableScraper(pages_for("opentable"), limiter(), base_url=server.url), "Fixture Venue"),
+        ]
+        self.checks = 0
+        self.errors = 0
+
+    async def worker(self, index: int, stop: asyncio.Event):
+        scraper, venue = self.scrapers[index % len(self.scrapers)]
+        day = 0
+        while not stop.is_set():
+            day = (day + 1) % 28
+            try:
+                await scraper.fetch_slots(venue, (date.today() + timedelta(days=day + 1)).isoformat())
+                self.checks += 1
+            except Exception:
+                self.errors += 1
+                await asyncio.sleep(0.1)
+
+
+async def soak(args, setup: str, server: FixtureServer):
+    print(f"\n{setup}")
+    print(f"{'seconds':>8}  {'checks':>7}  {'errors':>6}  {'rss MB':>7}  {'contexts':>8}  {'recycled':>8}  {'restarts':>8}")
+
+    playwright = None
+    manager = None
+    if setup == "managed":
+        manager = BrowserManager(
+            size=args.concurrency,
+            setup=block_heavy_resources,
+            max_pages_per_context=args.max_pages,
+            max_rss_mb=args.max_rss_mb,
+            health_interval=args.health_interval
+        )
+        await manager.start()
+        pages_for = manager.pages
+    else:
+        playwright = await async_playwright().start()
+        browser = await playwright.chromium.launch(headless=True)
+        pool = PagePool(browser, size=args.concurrency, setup=block_heavy_resources)
+        pages_for = lambda platform: pool
+
+    run = Soak(server, pages_for, args.concurrency)
+    stop = asyncio.Event()
+    workers = [asyncio.create_task(run.worker(i, stop)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    crashed = False
+    samples = []
+    try:
+        while (elapsed := time.perf_counter() - started) < args.minutes * 60:
+            await asyncio.sleep(min(args.sample, args.minutes * 60 - elapsed))
+            elapsed = time.perf_counter() - started
+            rss = (process_tree_rss() or 0) / 2**20
+            samples.append(rss)
+            stats = manager.stats() if manager else {}
+            print(
+                f"{elapsed:>8.0f}  {run.checks:>7}  {run.errors:>6}  {rss:>7.0f}  "
+                f"{stats.get('contexts', '-'):>8}  {stats.get('recycled_contexts', '-'):>8}  "
+                f"{stats.get('restarts', '-'):>8}"
+            )
+            if args.crash_at and not crashed and elapsed >= args.crash_at:
+                crashed = True
+                print("  closing the browser under the running checks")
+                await (manager.browser if manager else browser).close()
+    finally:
+        stop.set()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if manager:
+            await manager.stop()
+        else:
+            await pool.close()
+            await browser.close()
+            await playwright.stop()
+
+    if samples:
+        print(f"rss MB: first {samples[0]:.0f}, peak {max(samples):.0f}, last {samples[-1]:.0f}; "
+              f"{run.checks / (args.minutes * 60):.1f} checks/s, {run.errors} errors")
+
+
+async def main(args):
+    server = FixtureServer(latency=args.latency, slots=args.slots).start()
+    try:
+        for setup in (["legacy", "managed"] if args.setup == "both" else [args.setup]):
+            await soak(args, setup, server)
+    finally:
+        server.stop()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--setup", choices=["managed", "legacy", "both"], default="both")
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--sample", type=float, default=30, help="seconds between memory samples")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-pages", type=int, default=200, help="checks per context before recycling")
+    parser.add_argument("--max-rss-mb", type=float, default=1024)
+    parser.add_argument("--health-interval", type=float, default=30)
+    parser.add_argument("--crash-at", type=float, default=0, help="close the browser after this many seconds")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slots", type=int, default=12)
+    args = parser.parse_args()
+    asyncio.run(main(args))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Count the SQL statements one availability check cycle issues, by watch count.
+
+Runs AvailabilityScheduler.check_all_watched_restaurants and run_due_checks
+against synthetic SQLite databases with a stub checker (no browser), where
+every restaurant has seen slots and the stub returns only those, so the
+cycle does its reads and bookkeeping but records nothing new.
+Exits non-zero if the statement count changes with the number of watches,
+which makes it usable as a regression check for N+1 queries.
+
+Usage:
+    python benchmarks/bench_cycle_queries.py --watches 10 100 1000
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import make_engine, populate
+from models import (
+    Restaurant as RestaurantModel,
+    WatchConfig as WatchConfigModel,
+    SeenSlot as SeenSlotModel,
+)
+from availability_cache import AvailabilityCache
+from scraper import AvailabilityChecker, AvailableSlot
+import scheduler
+
+SEEN_TIME = "19:00"
+
+
+class StubChecker:
+    """Answers every check with the 19:00 slot on each date (already seen)."""
+
+    generate_date_range = AvailabilityChecker.generate_date_range
+
+    def __init__(self):
+        self.cache = AvailabilityCache()
+
+    async def check_resy(self, slug, dates, party_size=2, preferred_times=None):
+        return [
+            AvailableSlot(d, SEEN_TIME, party_size, f"https://resy.com/{slug}", platform="resy")
+            for d in dates
+        ]
+
+    async def check_opentable(self, name, dates, party_size=2, preferred_times=None):
+        return []
+
+
+def build_database(path: Path, watches: int):
+    engine = make_engine(path)
+    populate(engine, watches)
+    today = datetime.now()
+    dates = [(today + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(8)]
+    with engine.begin() as conn:
+        ids = conn.execute(select(RestaurantModel.id)).scalars().all()
+        conn.execute(insert(WatchConfigModel.__table__), [
+            {"restaurant_id": rid, "party_size": 2, "preferred_times": None, "active": True}
+            for rid in ids
+        ])
+        conn.execute(insert(SeenSlotModel.__table__), [
+            {
+                "restaurant_id": rid,
+                "platform": "resy",
+                "date": d,
+                "time": SEEN_TIME,
+                "party_size": 2,
+                "first_seen_at": datetime.utcnow() - timedelta(hours=1),
+            }
+            for rid in ids
+            for d in dates
+        ])
+    return engine
+
+
+def count_statements(engine, run) -> tuple[int, float]:
+    statements = 0
+
+    def on_execute(*args):
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        started = time.perf_counter()
+        asyncio.run(run())
+        return statements, time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--watches", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    print(f"{'watches':>8}  {'cycle':<14}  {'statements':>10}  {'seconds':>8}")
+    counts: dict[str, set] = {"full sweep": set(), "due checks": set()}
+    with tempfile.TemporaryDirectory() as tmp:
+        for watches in args.watches:
+            engine = build_database(Path(tmp) / f"cycle_{watches}.db", watches)
+            scheduler.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+            scheduler.SCHEDULER_CYCLE_BUDGET = watches
+
+            for name, method in [("full sweep", "check_all_watched_restaurants"), ("due checks", "run_due_checks")]:
+                # Never-checked watches are all due immediately
+                with engine.begin() as conn:
+                    conn.execute(update(WatchConfigModel.__table__).values(last_checked=None))
+                runner = scheduler.AvailabilityScheduler()
+                runner.checker = StubChecker()
+                statements, seconds = count_statements(engine, getattr(runner, method))
+                counts[name].add(statements)
+                print(f"{watches:>8}  {name:<14}  {statements:>10}  {seconds:>8.2f}")
+            engine.dispose()
+
+    failed = [name for name, seen in counts.items() if len(seen) > 1]
+    if failed:
+        print(f"FAIL: statements per cycle depend on the watch count ({', '.join(failed)})")
+        return 1
+    print("OK: statements per cycle are independent of the watch count")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
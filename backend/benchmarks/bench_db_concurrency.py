@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark mixed reads and writes against SQLite under two engine profiles.
+
+Reader threads run the restaurant listing queries while a writer thread
+replays the scheduler's write pattern (an AvailabilityCheck insert plus a
+WatchConfig.last_checked update per commit). Compares SQLite's defaults
+(rollback journal, synchronous=FULL) with the tuned profile from models.py.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --readers 8 --seconds 5
+"""
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import make_engine, populate, percentile
+from models import (
+    SQLITE_PRAGMAS,
+    Restaurant as RestaurantModel,
+    WatchConfig as WatchConfigModel,
+    AvailabilityCheck as AvailabilityCheckModel,
+)
+
+PROFILES = {
+    "sqlite defaults": {},
+    "tuned (models.py)": SQLITE_PRAGMAS,
+}
+
+
+def reader(Session, stop: threading.Event, latencies: list, errors: list):
+    rng = random.Random()
+    db = Session()
+    try:
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                q = db.query(RestaurantModel).filter(RestaurantModel.visited == (rng.random() < 0.5))
+                q.count()
+                q.order_by(RestaurantModel.name).offset(rng.randint(0, 500)).limit(50).all()
+                db.rollback()
+                latencies.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                db.rollback()
+                errors.append(str(e))
+    finally:
+        db.close()
+
+
+def writer(Session, stop: threading.Event, watch_ids: list[int], interval: float, commits: list, errors: list):
+    rng = random.Random(1)
+    db = Session()
+    try:
+        while not stop.is_set():
+            config_id = rng.choice(watch_ids)
+            try:
+                config = db.get(WatchConfigModel, config_id)
+                db.add(AvailabilityCheckModel(
+                    restaurant_id=config.restaurant_id,
+                    available_slots=[{"date": "2026-02-15", "time": "19:30", "party_size": 2}],
+                ))
+                config.last_checked = datetime.utcnow()
+                db.commit()
+                commits.append(1)
+            except Exception as e:
+                db.rollback()
+                errors.append(str(e))
+            time.sleep(interval)
+    finally:
+        db.close()
+
+
+def run_profile(path: Path, pragmas: dict, args) -> dict:
+    engine = make_engine(path, sqlite_pragmas=pragmas)
+    populate(engine, args.rows)
+    with engine.begin() as conn:
+        conn.execute(insert(WatchConfigModel.__table__), [
+            {"restaurant_id": i, "party_size": 2, "preferred_times": [], "active": True}
+            for i in range(1, args.watches + 1)
+        ])
+    Session = sessionmaker(bind=engine)
+
+    stop = threading.Event()
+    latencies, read_errors, commits, write_errors = [], [], [], []
+    threads = [
+        threading.Thread(target=reader, args=(Session, stop, latencies, read_errors))
+        for _ in range(args.readers)
+    ]
+    threads.append(threading.Thread(
+        target=writer,
+        args=(Session, stop, list(range(1, args.watches + 1)), args.write_interval, commits, write_errors)
+    ))
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        "reads/s": len(latencies) / args.seconds,
+        "p50 ms": percentile(latencies, 50) if latencies else float("nan"),
+        "p99 ms": percentile(latencies, 99) if latencies else float("nan"),
+        "writes/s": len(commits) / args.seconds,
+        "errors": len(read_errors) + len(write_errors),
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--watches", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-interval", type=float, default=0.002)
+    args = parser.parse_args()
+
+    print(f"{'profile':<18}  {'reads/s':>8}  {'p50 ms':>8}  {'p99 ms':>8}  {'writes/s':>8}  {'errors':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (name, pragmas) in enumerate(PROFILES.items()):
+            r = run_profile(Path(tmp) / f"profile_{i}.db", pragmas, args)
+            print(
+                f"{name:<18}  {r['reads/s']:>8.0f}  {r['p50 ms']:>8.2f}  {r['p99 ms']:>8.2f}  "
+                f"{r['writes/s']:>8.0f}  {r['errors']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    run()
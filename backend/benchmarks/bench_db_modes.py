@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Load test the API in DB_MODE=sync and DB_MODE=async under many concurrent clients.
+
+Starts uvicorn once per mode against the same synthetic SQLite database and
+drives it with concurrent HTTP clients (httpx) for a fixed duration, mixing
+listing pages, searches, lookups by id and visited toggles. The snapshot is
+disabled so every request reaches the database. Reports sustained requests
+per second and latency percentiles.
+
+Usage:
+    python benchmarks/bench_db_modes.py --clients 500 --seconds 20 --rows 5000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from synthetic import NEIGHBORHOODS, make_engine, populate, percentile
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode: str, db_path: Path, port: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DB_MODE=mode,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        RESTAURANT_SNAPSHOT="",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+def pick_request(rng: random.Random, rows: int) -> tuple[str, str, dict]:
+    roll = rng.random()
+    if roll < 0.4:
+        return "GET", "/api/restaurants", {"page": rng.randint(1, 20)}
+    if roll < 0.6:
+        return "GET", "/api/restaurants", {
+            "neighborhood": rng.choice(NEIGHBORHOODS), "include_facets": "true"
+        }
+    if roll < 0.75:
+        return "GET", "/api/restaurants", {"query": rng.choice(["bar", "pizza", "thai", "club"])}
+    if roll < 0.95:
+        return "GET", f"/api/restaurants/{rng.randint(1, rows)}", {}
+    return "PATCH", f"/api/restaurants/{rng.randint(1, rows)}/toggle-visited", {}
+
+
+async def client(http: httpx.AsyncClient, rows: int, deadline: float, seed: int,
+                 latencies: list, errors: list):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        method, path, params = pick_request(rng, rows)
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, path, params=params)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def load(base_url: str, clients: int, seconds: float, rows: int) -> tuple[list, list, float]:
+    latencies: list[float] = []
+    errors: list = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as http:
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(*(
+            client(http, rows, deadline, i, latencies, errors) for i in range(clients)
+        ))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--modes", nargs="+", default=["sync", "async"])
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.seconds:g}s per mode, {args.rows} restaurants")
+    print(f"{'mode':<6}  {'req/s':>8}  {'p50 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  {'errors':>6}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            # Fresh database per mode so the toggles of one run don't carry over
+            db_path = Path(tmp) / f"{mode}.db"
+            engine = make_engine(db_path)
+            populate(engine, args.rows)
+            engine.dispose()
+
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(mode, db_path, port)
+            try:
+                wait_until_ready(base_url)
+                latencies, errors, elapsed = asyncio.run(
+                    load(base_url, args.clients, args.seconds, args.rows)
+                )
+            finally:
+                server.terminate()
+                server.wait()
+
+            print(
+                f"{mode:<6}  {len(latencies) / elapsed:>8.0f}  "
+                f"{percentile(latencies, 50):>8.1f}  {percentile(latencies, 99):>8.1f}  "
+                f"{max(latencies, default=0):>8.1f}  {len(errors):>6}"
+            )
+
+
+if __name__ == "__main__":
+    run()
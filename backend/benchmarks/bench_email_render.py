@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Time rendering availability emails.
+
+Renders a cycle's worth of notifications: each of --restaurants restaurants
+has a set of new slots and several watchers, for --notifications emails in
+total. Runs it three ways:
+
+  uncached  - caches cleared before every email (template substitution and
+              date formatting only)
+  cold      - caches cleared once, then the cycle (first renders miss,
+              repeats for other watchers hit)
+  warm      - the same cycle again with everything cached
+
+Usage:
+    python benchmarks/bench_email_render.py --notifications 10000 --restaurants 500
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from synthetic import WORDS
+from notifications import clear_render_caches, render_email, _render_body, _render_section
+from scraper import AvailableSlot
+
+
+def make_notifications(count: int, restaurants: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    alerts = []
+    for i in range(restaurants):
+        name = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 3)))
+        slug = f"{name.lower().replace(' ', '-')}-{i}"
+        slots = [
+            AvailableSlot(
+                f"2026-03-{day:02d}", time_, party_size,
+                f"https://resy.com/cities/ny/{slug}?date=2026-03-{day:02d}&seats={party_size}",
+                platform="resy"
+            )
+            for day in sorted(rng.sample(range(1, 29), rng.randint(1, 4)))
+            for time_ in sorted(rng.sample(["17:30", "18:00", "18:45", "19:30", "20:15", "21:30"], 2))
+            for party_size in [rng.choice([2, 2, 4])]
+        ]
+        alerts.append((name, slots))
+
+    # Spread the emails over the restaurants' watchers
+    return [
+        (f"diner{n}@example.com", [alerts[n % restaurants]])
+        for n in range(count)
+    ]
+
+
+def run(notifications: list, clear_each: bool) -> float:
+    started = time.perf_counter()
+    for email, sections in notifications:
+        if clear_each:
+            clear_render_caches()
+        render_email(email, sections)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=10000)
+    parser.add_argument("--restaurants", type=int, default=500)
+    args = parser.parse_args()
+
+    notifications = make_notifications(args.notifications, args.restaurants)
+    print(f"{len(notifications)} emails for {args.restaurants} restaurants")
+    print(f"{'mode':<10}  {'seconds':>8}  {'emails/s':>10}  {'us/email':>9}  {'bodies rendered':>15}")
+
+    for mode in ("uncached", "cold", "warm"):
+        if mode == "cold":
+            clear_render_caches()
+        seconds = run(notifications, clear_each=mode == "uncached")
+        bodies = _render_body.cache_info().misses if mode != "uncached" else len(notifications)
+        if mode == "cold":
+            cold_bodies = bodies
+        elif mode == "warm":
+            bodies -= cold_bodies
+        print(
+            f"{mode:<10}  {seconds:>8.3f}  {len(notifications) / seconds:>10.0f}  "
+            f"{seconds / len(notifications) * 1e6:>9.1f}  {bodies:>15}"
+        )
+
+    print(f"section cache: {_render_section.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Measure API latency while the embedded scheduler runs a check cycle.
+
+Starts uvicorn once per SCHEDULER_MODE against a synthetic database of
+watches whose restaurants are served by the local fixture server, and keeps
+a steady load of API requests (listing pages, lookups by id, stats, watch
+configs) going. With a scheduler in the process, a full check cycle is
+started through /api/scheduler/check-now and only the requests made while it
+runs are counted; "off" is the baseline without a scheduler.
+
+  shared  - scheduler on the API's event loop
+  thread  - scheduler on its own loop in a dedicated thread
+
+--browser none checks the fixture's availability APIs over plain HTTP with
+the real parsers (see bench_scraper_cycle.py); chromium needs
+`playwright install chromium`.
+
+Usage:
+    python benchmarks/bench_embedded_scheduler.py --watches 1000 --clients 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from synthetic import percentile
+from fixture_server import FixtureServer
+from bench_db_modes import free_port, wait_until_ready
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def serve():
+    """Server side: the app, with the scheduler's checker pointed at the fixture server."""
+    import uvicorn
+    import scheduler
+    from scraper import AvailabilityChecker, PlatformLimiter
+    from bench_scraper_cycle import DirectOpenTableScraper, DirectResyScraper
+
+    fixture_url = os.environ["BENCH_FIXTURE_URL"]
+    browser = os.environ["BENCH_BROWSER"]
+    concurrency = int(os.environ.get("SCHEDULER_CONCURRENCY", "4"))
+
+    class FixtureChecker(AvailabilityChecker):
+        async def start(self):
+            if browser == "chromium":
+                await super().start()
+            else:
+                client = httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency), timeout=30)
+                self.resy_scraper = DirectResyScraper(None, None)
+                self.opentable_scraper = DirectOpenTableScraper(None, None)
+                self.resy_scraper.client = self.opentable_scraper.client = client
+            for platform_scraper in (self.resy_scraper, self.opentable_scraper):
+                platform_scraper.base_url = fixture_url
+                platform_scraper.limiter = PlatformLimiter(concurrency, 0, jitter=0)
+
+        async def stop(self):
+            if browser == "chromium":
+                await super().stop()
+            elif self.resy_scraper:
+                await self.resy_scraper.client.aclose()
+
+    scheduler.AvailabilityChecker = FixtureChecker
+    import main
+    uvicorn.run(main.app, port=int(os.environ["BENCH_PORT"]), log_level="warning", access_log=False)
+
+
+def start_server(args, mode: str, db_path: Path, port: int, fixture_url: str) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{db_path}",
+        SCHEDULER_MODE=mode,
+        SCHEDULER_CONCURRENCY=str(args.concurrency),
+        # Only the check-now sweep runs; the regular poll takes nothing
+        SCHEDULER_CYCLE_BUDGET="0",
+        NOTIFICATION_PROVIDER="log",
+        BENCH_FIXTURE_URL=fixture_url,
+        BENCH_BROWSER=args.browser,
+        BENCH_PORT=str(port),
+    )
+    return subprocess.Popen(
+        [sys.executable, __file__, "--serve"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if args.verbose else subprocess.DEVNULL,
+    )
+
+
+def pick_request(rng: random.Random, restaurants: int, watches: int) -> tuple[str, dict]:
+    roll = rng.random()
+    if roll < 0.35:
+        return "/api/restaurants", {"page": rng.randint(1, 20)}
+    if roll < 0.7:
+        return f"/api/restaurants/{rng.randint(1, restaurants)}", {}
+    if roll < 0.85:
+        return "/api/stats", {}
+    return f"/api/watch-configs/{rng.randint(1, watches)}", {}
+
+
+async def client(http: httpx.AsyncClient, args, seed: int, stop: asyncio.Event, window: dict, latencies: list, errors: list):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        path, params = pick_request(rng, args.watches, args.watches)
+        started = time.perf_counter()
+        try:
+            response = await http.get(path, params=params)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if window["open"]:
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors.append(path)
+        await asyncio.sleep(args.think)
+
+
+async def measure(args, base_url: str, mode: str) -> dict:
+    latencies: list[float] = []
+    errors: list = []
+    window = {"open": False}
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as http:
+        clients = [
+            asyncio.create_task(client(http, args, i, stop, window, latencies, errors))
+            for i in range(args.clients)
+        ]
+        try:
+            await asyncio.sleep(1)  # warm up
+
+            window["open"] = True
+            started = time.perf_counter()
+            if mode == "off":
+                await asyncio.sleep(args.seconds)
+            else:
+                response = await http.post("/api/scheduler/check-now")
+                response.raise_for_status()
+                while True:
+                    await asyncio.sleep(0.5)
+                    status = (await http.get("/api/scheduler/status")).json()
+                    if not status["sweep_running"]:
+                        break
+            seconds = time.perf_counter() - started
+            window["open"] = False
+        finally:
+            stop.set()
+            await asyncio.gather(*clients)
+    return {
+        "seconds": seconds,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies, default=0.0),
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--watches", type=int, default=1000)
+    parser.add_argument("--dates", type=int, default=2, help="dates per watch")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--think", type=float, default=0.01, help="seconds between a client's requests")
+    parser.add_argument("--seconds", type=float, default=10, help="length of the baseline (off) run")
+    parser.add_argument("--latency", type=float, default=0.05, help="fixture server latency (s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="restaurants checked at once")
+    parser.add_argument("--browser", choices=["chromium", "none"], default="chromium")
+    parser.add_argument("--modes", nargs="+", default=["off", "shared", "thread"])
+    parser.add_argument("--verbose", action="store_true", help="show the server's output")
+    args = parser.parse_args()
+    if args.serve:
+        serve()
+        return
+
+    from bench_scraper_cycle import build_database
+
+    print(f"{args.watches} watches x {args.dates} dates, {args.clients} API clients, browser={args.browser}")
+    print(f"{'mode':<7}  {'cycle s':>7}  {'requests':>8}  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}  {'max ms':>7}  {'errors':>6}")
+    fixtures = FixtureServer(latency=args.latency).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for mode in args.modes:
+                # Fresh database per mode so every cycle finds the same new slots
+                db_path = Path(tmp) / f"{mode}.db"
+                build_database(db_path, args.watches, args.watches, args.dates, 0.3).dispose()
+
+                port = free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                server = start_server(args, mode, db_path, port, fixtures.url)
+                try:
+                    wait_until_ready(base_url)
+                    result = asyncio.run(measure(args, base_url, mode))
+                finally:
+                    server.terminate()
+                    server.wait()
+                cycle = f"{result['seconds']:.1f}" if mode != "off" else "-"
+                print(
+                    f"{mode:<7}  {cycle:>7}  {result['requests']:>8}  {result['p50']:>7.1f}  "
+                    f"{result['p95']:>7.1f}  {result['p99']:>7.1f}  {result['max']:>7.1f}  {result['errors']:>6}"
+                )
+    finally:
+        fixtures.stop()
+
+
+if __name__ == "__main__":
+    run()
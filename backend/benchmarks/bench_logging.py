@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Measure how long logging holds up the code that logs.
+
+Writes the per-restaurant line of a check cycle --lines times to a sink that
+takes --write-ms per write (a slow terminal, pipe or log collector):
+
+  print    - print() straight to the sink, as the scheduler used to
+  queued   - through setup_logging(), with a queue big enough that every
+             line is delivered: the caller only enqueues, the writer thread
+             formats and writes
+
+Both deliver the same lines. "caller" is the time the logging code was held
+up per line, "delivered" the time until the last line was written. A run
+with extra=SAMPLED shows the cost of a line that's sampled away.
+
+Last, a burst of warnings goes through a queue that's already full, to
+check that none are lost (they're written by the caller instead).
+
+Usage:
+    python benchmarks/bench_logging.py --lines 10000 --write-ms 0.05
+"""
+
+import argparse
+import contextlib
+import logging
+import time
+
+import synthetic  # noqa: F401  (puts the backend on sys.path)
+import logs
+
+
+class SlowSink:
+    def __init__(self, write_ms: float):
+        self.delay = write_ms / 1000
+        self.writes = 0
+
+    def write(self, text: str):
+        if text.strip():
+            self.writes += 1
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def timed(fn, lines: int) -> float:
+    started = time.perf_counter()
+    for i in range(lines):
+        fn(i)
+    return time.perf_counter() - started
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--write-ms", type=float, default=0.05, help="time the sink takes per write")
+    parser.add_argument("--warnings", type=int, default=500, help="warnings logged into a full queue")
+    args = parser.parse_args()
+
+    logger = logging.getLogger("scheduler")
+    fields = {"watch_id": 1, "restaurant_id": 1}
+    rows = []
+
+    sink = SlowSink(args.write_ms)
+    with contextlib.redirect_stdout(sink):
+        seconds = timed(lambda i: print(f"  Checking: Restaurant {i}"), args.lines)
+    rows.append(("print", seconds, seconds, sink.writes, 0))
+
+    for mode, extra in (("queued", fields), ("sampled", {**logs.SAMPLED, **fields})):
+        sink = SlowSink(args.write_ms)
+        logs.setup_logging(stream=sink, queue_size=args.lines + 10)
+        started = time.perf_counter()
+        with logs.correlated("cycle"):
+            caller = timed(lambda i: logger.info("Checking %s", f"Restaurant {i}", extra=extra), args.lines)
+        dropped = logs.stats()["dropped"]
+        logs.shutdown_logging()
+        rows.append((mode, caller, time.perf_counter() - started, sink.writes, dropped))
+
+    print(f"{args.lines} lines per run, sink {args.write_ms:g} ms per write")
+    print(f"{'mode':<8}  {'caller us/line':>14}  {'delivered s':>11}  {'written':>7}  {'dropped':>7}")
+    for mode, caller, delivered, written, dropped in rows:
+        print(f"{mode:<8}  {caller / args.lines * 1e6:>14.1f}  {delivered:>11.2f}  {written:>7}  {dropped:>7}")
+
+    # Fill a small queue with INFO lines, then log warnings behind them
+    sink = SlowSink(args.write_ms)
+    logs.setup_logging(stream=sink, queue_size=100)
+    for i in range(args.lines):
+        logger.info("Checking %s", f"Restaurant {i}")
+    for i in range(args.warnings):
+        logger.warning("Error checking watch %s", i)
+    stats = logs.stats()
+    logs.shutdown_logging()
+    warnings_written = sink.writes - (args.lines - stats["dropped"])
+    print(
+        f"\nfull queue: {stats['dropped']} INFO lines dropped, "
+        f"{warnings_written} of {args.warnings} warnings written ({stats['overflowed']} by the caller)"
+    )
+
+
+if __name__ == "__main__":
+    run()
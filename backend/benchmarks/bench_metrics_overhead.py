@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Measure what the metrics instrumentation costs.
+
+First times the primitives in-process: a histogram observation, a counter
+increment and rendering /api/metrics with a realistic number of series.
+Then load tests the API (the request mix of bench_db_modes.py) with
+METRICS_ENABLED=false and =true against the same synthetic database, so the
+request middleware and the per-statement SQL hooks are both in the path.
+The two settings alternate for --rounds rounds to even out drift on the
+machine; the report is the median of the rounds.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py --clients 50 --seconds 10 --rounds 3
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import make_engine, populate, percentile
+from bench_db_modes import free_port, load, start_server, wait_until_ready
+from metrics import Counter, Histogram, Registry
+
+
+def per_call_ns(fn, calls: int) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter_ns() - started) / calls
+
+
+def microbench(calls: int):
+    registry = Registry()
+    histogram = Histogram("bench_seconds", "", ("method", "route", "status"), registry=registry)
+    counter = Counter("bench_total", "", ("outcome",), registry=registry)
+    observe = per_call_ns(lambda: histogram.observe(0.012, "GET", "/api/restaurants", 200), calls)
+    inc = per_call_ns(lambda: counter.inc("ok"), calls)
+
+    # About what a busy API exposes: 40 routes x 3 statuses
+    for route in range(40):
+        for status in (200, 404, 500):
+            histogram.observe(0.01, "GET", f"/api/route{route}", status)
+    render = per_call_ns(registry.render, 200) / 1e6
+
+    print(f"histogram observe  {observe:>8.0f} ns")
+    print(f"counter inc        {inc:>8.0f} ns")
+    print(f"render 120 series  {render:>8.2f} ms")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=200_000, help="iterations per primitive")
+    args = parser.parse_args()
+
+    microbench(args.calls)
+
+    print(f"\n{args.clients} clients, {args.seconds:g}s x {args.rounds} rounds per setting, {args.rows} restaurants")
+    print(f"{'metrics':<8}  {'req/s':>8}  {'p50 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+    results = {"false": [], "true": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "metrics.db"
+        engine = make_engine(db_path)
+        populate(engine, args.rows)
+        engine.dispose()
+
+        for _ in range(args.rounds):
+            for enabled in results:
+                os.environ["METRICS_ENABLED"] = enabled
+                port = free_port()
+                base_url = f"http://127.0.0.1:{port}"
+                server = start_server("sync", db_path, port)
+                try:
+                    wait_until_ready(base_url)
+                    latencies, errors, elapsed = asyncio.run(
+                        load(base_url, args.clients, args.seconds, args.rows)
+                    )
+                finally:
+                    server.terminate()
+                    server.wait()
+                results[enabled].append((
+                    len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99), len(errors)
+                ))
+
+    medians = {}
+    for enabled, rounds in results.items():
+        rps, p50, p99 = (statistics.median(r[i] for r in rounds) for i in range(3))
+        errors = sum(r[3] for r in rounds)
+        medians[enabled] = rps
+        label = "on" if enabled == "true" else "off"
+        print(f"{label:<8}  {rps:>8.0f}  {p50:>8.1f}  {p99:>8.1f}  {errors:>6}")
+    print(f"\nthroughput with metrics on: {medians['true'] / medians['false'] - 1:+.1%}")
+
+
+if __name__ == "__main__":
+    run()
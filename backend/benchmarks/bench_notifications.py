@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Compare inline email sends with the notification outbox.
+
+Queues alerts for a number of recipients with several restaurants each and
+delivers them to a local fake mail API (email_sink.py) two ways:
+
+  inline  - one blocking request with a new client per alert, on the event
+            loop, the way the scheduler used to send
+  outbox  - NotificationDispatcher: per-recipient digests over one pooled
+            async client, with retries for the sink's simulated failures
+
+Reports wall time, emails sent, HTTP connections opened and the longest
+event loop stall seen by a 10ms ticker while sending.
+
+Usage:
+    python benchmarks/bench_notifications.py --recipients 100 --per-recipient 5
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import make_engine, populate
+from models import Restaurant as RestaurantModel, NotificationLog as NotificationLogModel
+from email_sink import EmailSink
+from notifications import FROM_EMAIL, SendGridProvider, render_email
+from scraper import AvailableSlot
+import notification_outbox
+from notification_outbox import NotificationDispatcher, enqueue_notification
+
+
+def make_alerts(restaurants: list, recipients: int, per_recipient: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    alerts = []
+    for r in range(recipients):
+        for restaurant_id, name in rng.sample(restaurants, per_recipient):
+            slots = [
+                AvailableSlot(
+                    f"2026-03-{day:02d}", time_, 2,
+                    f"https://resy.com/cities/ny/venue-{restaurant_id}?date=2026-03-{day:02d}&seats=2",
+                    platform="resy"
+                )
+                for day in rng.sample(range(1, 29), 2)
+                for time_ in ("18:30", "21:15")
+            ]
+            alerts.append((f"diner{r}@example.com", restaurant_id, name, slots))
+    return alerts
+
+
+async def watch_loop(stop: asyncio.Event) -> float:
+    """Longest gap between 10ms ticks, minus the tick itself."""
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        worst = max(worst, now - last - 0.01)
+        last = now
+    return worst
+
+
+async def send_inline(sink: EmailSink, alerts: list) -> int:
+    sent = 0
+    for email, _, name, slots in alerts:
+        message = render_email(email, [(name, slots)])
+        # Blocking request on a fresh client, like the SDK call it replaced
+        with httpx.Client(base_url=sink.url) as client:
+            for _ in range(5):
+                response = client.post("/v3/mail/send", json={
+                    "personalizations": [{"to": [{"email": email}]}],
+                    "from": {"email": FROM_EMAIL},
+                    "subject": message.subject,
+                    "content": [{"type": "text/html", "value": message.html}],
+                })
+                if response.status_code == 202:
+                    sent += 1
+                    break
+        await asyncio.sleep(0)
+    return sent
+
+
+async def send_outbox(sink: EmailSink, session_factory, alerts: list, concurrency: int) -> NotificationDispatcher:
+    db = session_factory()
+    for email, restaurant_id, name, slots in alerts:
+        enqueue_notification(db, email, restaurant_id, name, slots)
+    db.commit()
+
+    dispatcher = NotificationDispatcher(
+        provider=SendGridProvider(api_key="test", host=sink.url),
+        session_factory=session_factory,
+        concurrency=concurrency
+    )
+    try:
+        while True:
+            handled = await dispatcher.dispatch_due()
+            remaining = db.execute(
+                select(func.count(NotificationLogModel.id))
+                .where(NotificationLogModel.status.in_(["pending", "sending"]))
+            ).scalar()
+            if not remaining:
+                break
+            if not handled:
+                await asyncio.sleep(0.02)  # retries backing off
+    finally:
+        await dispatcher.provider.close()
+        db.close()
+    return dispatcher
+
+
+async def measure(run) -> tuple[float, float, object]:
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    started = time.perf_counter()
+    result = await run()
+    seconds = time.perf_counter() - started
+    stop.set()
+    return seconds, await watcher, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--recipients", type=int, default=100)
+    parser.add_argument("--per-recipient", type=int, default=5, help="restaurants alerted per recipient")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake mail API latency (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # Send immediately and retry quickly; the defaults are tuned for production
+    notification_outbox.NOTIFICATION_BATCH_SECONDS = 0
+    notification_outbox.NOTIFICATION_BACKOFF_SECONDS = 0.05
+
+    sink = EmailSink(latency=args.latency, failure_rate=args.failure_rate).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(Path(tmp) / "outbox.db")
+        populate(engine, max(args.per_recipient * 4, 50))
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with engine.connect() as conn:
+            restaurants = [tuple(row) for row in conn.execute(select(RestaurantModel.id, RestaurantModel.name))]
+        alerts = make_alerts(restaurants, args.recipients, args.per_recipient)
+
+        print(f"{len(alerts)} alerts for {args.recipients} recipients, "
+              f"{args.latency * 1000:.0f}ms mail API latency, {args.failure_rate:.0%} failures")
+        print(f"{'mode':<8}  {'seconds':>8}  {'emails':>6}  {'requests':>8}  {'connections':>11}  {'max stall':>9}")
+
+        seconds, stall, sent = asyncio.run(measure(lambda: send_inline(sink, alerts)))
+        print(f"{'inline':<8}  {seconds:>8.2f}  {sent:>6}  {sink.requests:>8}  {sink.connections:>11}  {stall * 1000:>7.0f}ms")
+
+        sink.reset()
+        seconds, stall, dispatcher = asyncio.run(measure(
+            lambda: send_outbox(sink, session_factory, alerts, args.concurrency)
+        ))
+        emails = len(sink.messages)
+        print(f"{'outbox':<8}  {seconds:>8.2f}  {emails:>6}  {sink.requests:>8}  {sink.connections:>11}  {stall * 1000:>7.0f}ms")
+        print(f"outbox: {dispatcher.stats()}")
+        engine.dispose()
+    sink.stop()
+
+    missing = set(f"diner{r}@example.com" for r in range(args.recipients)) - set(sink.recipients())
+    if missing:
+        print(f"FAIL: {len(missing)} recipients got no email")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
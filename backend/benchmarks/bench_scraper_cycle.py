@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Benchmark a full availability check cycle offline, as a regression gate.
+
+Builds a synthetic SQLite database of restaurants and WatchConfigs (Resy and
+OpenTable venues), points the scrapers at the local fixture server and runs
+AvailabilityScheduler.check_all_watched_restaurants once. Reports:
+
+  checks/min     watches checked per minute of cycle time
+  p50/p95 ms     per-check latency (one watch, all its dates)
+  db ms          time spent in SQL statements, total and per check
+  rss MB         peak memory of the browser processes during the cycle
+
+--browser chromium runs the real scrapers through headless Chromium (needs
+`playwright install chromium`). --browser none reads the fixture's
+availability APIs over plain HTTP with the same parsers, which keeps the
+scheduler, cache, limiter and database path under test on machines without
+a browser.
+
+--save-baseline writes the results as JSON. --baseline compares a run
+against one and exits 1 if checks/min, p95 latency, DB time per check or
+peak RSS is more than --tolerance worse.
+
+Usage:
+    python benchmarks/bench_scraper_cycle.py --watches 2000 --browser none --save-baseline base.json
+    python benchmarks/bench_scraper_cycle.py --watches 2000 --browser none --baseline base.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import make_engine, percentile, populate
+from models import Restaurant as RestaurantModel, WatchConfig as WatchConfigModel
+from fixture_server import FixtureServer
+from browser_manager import process_tree_rss
+from logs import setup_logging
+import scraper
+from scraper import AvailabilityChecker, OpenTableScraper, PlatformLimiter, ResyScraper
+import scheduler
+
+# (result key, higher is better)
+GATES = [
+    ("checks_per_min", True),
+    ("p95_ms", False),
+    ("db_ms_per_check", False),
+    ("rss_peak_mb", False),
+]
+
+
+class DirectResyScraper(ResyScraper):
+    """Resy scraper reading the fixture's /4/find API without a browser."""
+
+    client: httpx.AsyncClient
+
+    async def fetch_slots(self, restaurant_slug: str, date: str, party_size: int = 2):
+        url = f"{self.base_url}/cities/ny/{restaurant_slug}?date={date}&seats={party_size}"
+        async with self.limiter.slot():
+            response = await self.client.get(
+                f"{self.base_url}/4/find",
+                params={"venue_slug": restaurant_slug, "day": date, "party_size": party_size}
+            )
+        response.raise_for_status()
+        return self.parse_availability(response.json(), url, date, party_size)
+
+
+class DirectOpenTableScraper(OpenTableScraper):
+    """OpenTable scraper posting the fixture's availability query without a browser."""
+
+    client: httpx.AsyncClient
+
+    async def fetch_slots(self, restaurant_name: str, date: str, party_size: int = 2):
+        search_term = restaurant_name.replace(" ", "+")
+        url = f"{self.base_url}/s?term={search_term}&covers={party_size}&dateTime={date}T{self.SEARCH_TIME}&metroId=8"
+        async with self.limiter.slot():
+            response = await self.client.post(
+                f"{self.base_url}/dapi/fe/gql?optype=query&opname=RestaurantsAvailability",
+                json={"term": restaurant_name, "date": date, "time": self.SEARCH_TIME, "partySize": party_size}
+            )
+        response.raise_for_status()
+        return self.parse_availability(response.json(), url, date, party_size)
+
+
+class TimedScheduler(scheduler.AvailabilityScheduler):
+    """Records how long each watch's check takes."""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies: list[float] = []
+
+    async def check_restaurant(self, db, config, found_slots=None):
+        started = time.perf_counter()
+        try:
+            return await super().check_restaurant(db, config, found_slots)
+        finally:
+            self.latencies.append((time.perf_counter() - started) * 1000)
+
+
+def build_database(path: Path, watches: int, venues: int, dates: int, opentable_share: float):
+    engine = make_engine(path)
+    populate(engine, venues)
+    rng = random.Random(7)
+    first = date.today() + timedelta(days=1)
+    with engine.begin() as conn:
+        restaurants = conn.execute(select(RestaurantModel.id, RestaurantModel.name)).all()
+        for restaurant_id, name in restaurants:
+            if rng.random() < opentable_share:
+                conn.execute(
+                    update(RestaurantModel.__table__)
+                    .where(RestaurantModel.id == restaurant_id)
+                    .values(booking_urls={"opentable": f"https://www.opentable.com/r/venue-{restaurant_id}"})
+                )
+        conn.execute(insert(WatchConfigModel.__table__), [
+            {
+                "restaurant_id": restaurants[i % len(restaurants)].id,
+                "party_size": 2,
+                "preferred_times": None,
+                "date_range_start": first.isoformat(),
+                "date_range_end": (first + timedelta(days=dates - 1)).isoformat(),
+                "active": True,
+            }
+            for i in range(watches)
+        ])
+    return engine
+
+
+@contextlib.contextmanager
+def db_timer(engine):
+    """Accumulates statement count and time spent in SQL on `engine`."""
+    totals = {"statements": 0, "seconds": 0.0}
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        totals["seconds"] += time.perf_counter() - conn.info["query_started"].pop()
+        totals["statements"] += 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    try:
+        yield totals
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+async def sample_rss(peak: dict, stop: asyncio.Event):
+    while not stop.is_set():
+        rss = process_tree_rss()
+        if rss is not None:
+            peak["bytes"] = max(peak["bytes"], rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def start_checker(args, server: FixtureServer) -> AvailabilityChecker:
+    checker = AvailabilityChecker()
+    if args.browser == "chromium":
+        scraper.SCRAPER_CONCURRENCY = args.concurrency
+        await checker.start()
+        checker.resy_scraper.fetch_mode = checker.opentable_scraper.fetch_mode = args.fetch_mode
+    else:
+        client = httpx.AsyncClient(limits=httpx.Limits(max_connections=args.concurrency), timeout=30)
+        checker.resy_scraper = DirectResyScraper(None, None)
+        checker.opentable_scraper = DirectOpenTableScraper(None, None)
+        checker.resy_scraper.client = checker.opentable_scraper.client = client
+
+    # No politeness delays against the local server
+    for platform_scraper in (checker.resy_scraper, checker.opentable_scraper):
+        platform_scraper.base_url = server.url
+        platform_scraper.limiter = PlatformLimiter(args.concurrency, 0, jitter=0)
+    return checker
+
+
+async def stop_checker(args, checker: AvailabilityChecker):
+    if args.browser == "chromium":
+        await checker.stop()
+    else:
+        await checker.resy_scraper.client.aclose()
+
+
+def error_count() -> int:
+    """Failed watch checks plus failed scrapes so far (scrape errors don't fail the check)."""
+    scrapes = sum(scraper.SCRAPE_SECONDS.count(platform, "error") for platform in ("resy", "opentable"))
+    return scheduler.WATCH_CHECKS.value("error") + scrapes
+
+
+async def run_cycle(args, engine, server: FixtureServer) -> dict:
+    scheduler.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    scheduler.SCHEDULER_CONCURRENCY = args.concurrency
+    runner = TimedScheduler()
+    runner.checker = await start_checker(args, server)
+
+    peak = {"bytes": 0}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(peak, stop))
+    server.reset_counters()
+    errors_before = error_count()
+    try:
+        with db_timer(engine) as db:
+            started = time.perf_counter()
+            await runner.check_all_watched_restaurants()
+            seconds = time.perf_counter() - started
+    finally:
+        stop.set()
+        await sampler
+        await stop_checker(args, runner.checker)
+
+    checks = len(runner.latencies)
+    errors = int(error_count() - errors_before)
+    return {
+        "browser": args.browser,
+        "watches": args.watches,
+        "checks": checks,
+        "errors": errors,
+        "seconds": round(seconds, 3),
+        "checks_per_min": round(checks / seconds * 60, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(runner.latencies, 50), 1) if checks else None,
+        "p95_ms": round(percentile(runner.latencies, 95), 1) if checks else None,
+        "db_statements": db["statements"],
+        "db_ms": round(db["seconds"] * 1000, 1),
+        "db_ms_per_check": round(db["seconds"] * 1000 / checks, 3) if checks else None,
+        "rss_peak_mb": round(peak["bytes"] / 2**20, 1) if args.browser == "chromium" else None,
+        "fixture_requests": server.requests,
+        "cache": runner.checker.cache.stats(),
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Gate metrics that regressed by more than `tolerance`."""
+    failures = []
+    print(f"\n{'metric':<16}  {'baseline':>10}  {'current':>10}  {'change':>8}")
+    for key, higher_is_better in GATES:
+        old, new = baseline.get(key), result.get(key)
+        if old is None or new is None or old == 0:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSED" if worse > tolerance else ""
+        print(f"{key:<16}  {old:>10}  {new:>10}  {change:>+7.0%}{flag}")
+        if flag:
+            failures.append(key)
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--watches", type=int, default=2000)
+    parser.add_argument("--venues", type=int, default=None, help="distinct restaurants (default: one per watch)")
+    parser.add_argument("--dates", type=int, default=2, help="dates per watch")
+    parser.add_argument("--opentable-share", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.05, help="fixture server latency (s)")
+    parser.add_argument("--slots", type=int, default=12)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--browser", choices=["chromium", "none"], default="chromium")
+    parser.add_argument("--fetch-mode", choices=["network", "dom"], default="network")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="show the scheduler's output")
+    args = parser.parse_args()
+    if args.verbose:
+        setup_logging()
+
+    server = FixtureServer(latency=args.latency, slots=args.slots).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_database(
+                Path(tmp) / "cycle.db", args.watches, args.venues or args.watches,
+                args.dates, args.opentable_share
+            )
+            result = asyncio.run(run_cycle(args, engine, server))
+            engine.dispose()
+    finally:
+        server.stop()
+
+    print(json.dumps(result, indent=2))
+    if result["errors"] or result["checks"] < args.watches:
+        print(f"FAIL: {result['checks']} of {args.watches} watches checked, {result['errors']} errors")
+        return 1
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        failures = compare(result, json.loads(args.baseline.read_text()), args.tolerance)
+        if failures:
+            print(f"FAIL: regressed beyond {args.tolerance:.0%}: {', '.join(failures)}")
+            return 1
+        print("OK: within tolerance of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
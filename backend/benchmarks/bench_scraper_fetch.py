@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compare the scrapers' DOM and network fetch modes against the local fixture server.
+
+Runs the same Resy and OpenTable checks in each mode through a real headless
+Chromium (needs `playwright install chromium`, no internet access) and
+reports per-check latency, requests and bytes served, and whether both modes
+found the same slots.
+
+Usage:
+    python benchmarks/bench_scraper_fetch.py --checks 20 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from playwright.async_api import async_playwright
+
+from synthetic import percentile
+from fixture_server import FixtureServer
+from scraper import (
+    PagePool, PlatformLimiter, ResyScraper, OpenTableScraper, block_heavy_resources
+)
+
+MODES = ["dom", "network"]
+
+
+def check_dates(count: int) -> list[str]:
+    start = date.today() + timedelta(days=1)
+    return [(start + timedelta(days=i % 28)).isoformat() for i in range(count)]
+
+
+async def run_mode(browser, server: FixtureServer, mode: str, platform: str, checks: int) -> dict:
+    pages = PagePool(browser, size=1, setup=block_heavy_resources if mode == "network" else None)
+    limiter = PlatformLimiter(1, 0, jitter=0)
+    if platform == "resy":
+        scraper = ResyScraper(pages, limiter, fetch_mode=mode, base_url=server.url)
+        name = "fixture-venue"
+    else:
+        scraper = OpenTableScraper(pages, limiter, fetch_mode=mode, base_url=server.url)
+        name = "Fixture Venue"
+
+    # Warm the page (renderer start-up isn't part of a steady-state check)
+    await scraper.check_availability(name, check_dates(1)[0])
+    server.reset_counters()
+
+    latencies = []
+    found = []
+    for day in check_dates(checks):
+        started = time.perf_counter()
+        slots = await scraper.check_availability(name, day)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append([s.time for s in slots])
+
+    await pages.close()
+    return {
+        "latencies": latencies,
+        "requests": server.requests / checks,
+        "kb": server.bytes_sent / checks / 1024,
+        "found": found,
+    }
+
+
+async def main(args):
+    server = FixtureServer(latency=args.latency, slots=args.slots).start()
+    try:
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            try:
+                print(f"{'platform':<10}  {'mode':<8}  {'p50 ms':>8}  {'p95 ms':>8}  "
+                      f"{'reqs/check':>10}  {'KB/check':>9}  {'slots/check':>11}")
+                for platform in ["resy", "opentable"]:
+                    results = {}
+                    for mode in MODES:
+                        r = await run_mode(browser, server, mode, platform, args.checks)
+                        results[mode] = r
+                        print(
+                            f"{platform:<10}  {mode:<8}  {percentile(r['latencies'], 50):>8.0f}  "
+                            f"{percentile(r['latencies'], 95):>8.0f}  {r['requests']:>10.1f}  "
+                            f"{r['kb']:>9.0f}  {sum(map(len, r['found'])) / args.checks:>11.1f}"
+                        )
+                    if results["dom"]["found"] != results["network"]["found"]:
+                        print(f"  warning: {platform} modes found different slots")
+            finally:
+                await browser.close()
+    finally:
+        server.stop()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--checks", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--slots", type=int, default=12)
+    args = parser.parse_args()
+    asyncio.run(main(args))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark restaurant search: FTS index versus the ILIKE scan it replaced.
+
+Usage:
+    python benchmarks/bench_search.py --sizes 500 50000 1000000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import WORDS, CUISINES, NEIGHBORHOODS, make_engine, populate, percentile
+from models import Restaurant as RestaurantModel
+from search import init_search_index, apply_search, ilike_filter
+
+PER_PAGE = 50
+
+
+def sample_queries(count: int, seed: int = 7) -> list[str]:
+    """Mix of full words, prefixes and multi-word queries."""
+    rng = random.Random(seed)
+    vocabulary = WORDS + [c.lower() for c in CUISINES] + [n.lower() for n in NEIGHBORHOODS]
+    queries = []
+    for _ in range(count):
+        word = rng.choice(vocabulary)
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(word)
+        elif kind < 0.7:
+            queries.append(word[:max(2, len(word) // 2)])
+        else:
+            queries.append(f"{word} {rng.choice(vocabulary)}")
+    return queries
+
+
+def run_queries(Session, queries: list[str], search) -> list[float]:
+    """Time one page of results (plus the total count) per query, in ms."""
+    timings = []
+    db = Session()
+    try:
+        for query in queries:
+            started = time.perf_counter()
+            q, rank = search(db.query(RestaurantModel), query)
+            q.count()
+            order_by = [RestaurantModel.name] if rank is None else [rank, RestaurantModel.name]
+            q.order_by(*order_by).limit(PER_PAGE).all()
+            timings.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 50000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    queries = sample_queries(args.queries)
+
+    print(f"{'rows':>9}  {'mode':<7}  {'p50 ms':>9}  {'p99 ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            engine = make_engine(Path(tmp) / f"search_{size}.db")
+            populate(engine, size)
+            backend = init_search_index(engine)
+            Session = sessionmaker(bind=engine)
+
+            modes = {
+                "ilike": lambda q, text: (ilike_filter(q, text), None),
+                backend or "ilike": lambda q, text: apply_search(q, text, backend),
+            }
+            for mode, search in modes.items():
+                timings = run_queries(Session, queries, search)
+                print(f"{size:>9}  {mode:<7}  {percentile(timings, 50):>9.2f}  {percentile(timings, 99):>9.2f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
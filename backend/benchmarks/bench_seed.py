@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Time the streaming seed parser and check it against json.load.
+
+Parses the seed file (data/restaurants.json by default) with
+iter_json_array at several read sizes, down to one character per read, so
+every token is split across a read boundary somewhere. Also parses small
+arrays of numbers, strings with escapes and nested values, and a malformed
+element followed by --tail valid ones, which must fail without reading the
+rest of the file.
+
+Exits non-zero if any parse differs from json.load or the malformed input
+is read to the end.
+
+Usage:
+    python benchmarks/bench_seed.py --read-sizes 1 7 4096 65536
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import synthetic  # noqa: F401  (puts the backend modules on sys.path)
+from seed import SEED_PATH, iter_json_array
+
+CASES = [
+    "[]",
+    " [ 1 , 2 ] ",
+    "[1.5e10, -2.25E-3, 0, -0.5, 12345678901234567890]",
+    '[{"a": "x\\u00e9y\\n", "b": [true, false, null]}, "s", 12]',
+    '[[1, [2, [3]]], {"": {}}, [], "\\"quoted\\""]',
+]
+
+
+class CountingReader(io.StringIO):
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.consumed = 0
+
+    def read(self, size: int = -1) -> str:
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--path", type=Path, default=SEED_PATH)
+    parser.add_argument("--read-sizes", type=int, nargs="+", default=[1, 7, 4096, 65536])
+    parser.add_argument("--tail", type=int, default=10000, help="valid elements after the malformed one")
+    args = parser.parse_args()
+
+    failures = []
+    text = args.path.read_text(encoding="utf-8")
+    expected = json.loads(text)
+    print(f"{args.path.name}: {len(expected)} records, {len(text) / 1024:.0f} KiB")
+    print(f"{'read size':>9}  {'ms':>8}  {'match':>5}")
+    for read_size in args.read_sizes:
+        started = time.perf_counter()
+        parsed = list(iter_json_array(io.StringIO(text), read_size))
+        elapsed = time.perf_counter() - started
+        match = parsed == expected
+        if not match:
+            failures.append(f"seed file differs at read size {read_size}")
+        print(f"{read_size:>9}  {elapsed * 1000:>8.1f}  {'yes' if match else 'NO':>5}")
+
+    for case in CASES:
+        for read_size in (1, 2, 3, 5, 64):
+            try:
+                parsed = list(iter_json_array(io.StringIO(case), read_size))
+            except ValueError as e:
+                failures.append(f"{case!r} at read size {read_size} raised {e}")
+                continue
+            if json.dumps(parsed) != json.dumps(json.loads(case)):
+                failures.append(f"{case!r} at read size {read_size} gave {parsed!r}")
+
+    malformed = '[{"a": 1}, {"a" 2}, ' + ", ".join(f'{{"a": {i}}}' for i in range(args.tail)) + "]"
+    for read_size in (1, 16, 4096):
+        reader = CountingReader(malformed)
+        try:
+            list(iter_json_array(reader, read_size))
+            failures.append(f"malformed element accepted at read size {read_size}")
+        except ValueError as e:
+            print(f"malformed element, read size {read_size}: read {reader.consumed} of {len(malformed)} chars ({e})")
+            if reader.consumed == len(malformed) and len(malformed) > read_size:
+                failures.append(f"malformed input read to the end at read size {read_size}")
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1
+    print("OK: every parse matches json.load")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
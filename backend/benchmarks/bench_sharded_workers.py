@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Measure check throughput with 1, 2, 4 and 8 sharded scheduler workers.
+
+Each worker is a separate process running AvailabilityScheduler.run_due_checks
+against one synthetic SQLite database, with a stub checker that sleeps to
+stand in for scrape latency. The run ends once every watch has been checked
+since the start, and reports checks per second. With --crash, one worker is
+killed partway through and the run only completes if the survivors adopt its
+shards once its leases expire.
+
+Usage:
+    python benchmarks/bench_sharded_workers.py --watches 400 --workers 1 2 4 8
+    python benchmarks/bench_sharded_workers.py --workers 4 --crash --lease 3
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import func, insert, select, update
+
+from synthetic import make_engine, populate
+from models import Restaurant as RestaurantModel, WatchConfig as WatchConfigModel
+from availability_cache import AvailabilityCache
+from scraper import AvailabilityChecker
+
+
+class StubChecker:
+    """Sleeps for the scrape latency and finds nothing."""
+
+    generate_date_range = AvailabilityChecker.generate_date_range
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.cache = AvailabilityCache()
+
+    async def check_resy(self, slug, dates, party_size=2, preferred_times=None):
+        await asyncio.sleep(self.delay)
+        return []
+
+    async def check_opentable(self, name, dates, party_size=2, preferred_times=None):
+        await asyncio.sleep(self.delay)
+        return []
+
+
+def worker_env(database_url: str, index: int, workers: int, args: argparse.Namespace) -> dict:
+    return {
+        "DATABASE_URL": database_url,
+        "SCHEDULER_WORKERS": str(workers),
+        "SCHEDULER_WORKER_INDEX": str(index),
+        "SCHEDULER_SHARDS": str(args.shards),
+        "SHARD_LEASE_SECONDS": str(args.lease),
+        "SCHEDULER_CONCURRENCY": str(args.concurrency),
+        "SCHEDULER_CYCLE_BUDGET": str(args.budget),
+    }
+
+
+def run_worker(args: argparse.Namespace):
+    """Worker process; its settings come from the environment it was started with."""
+    import scheduler
+
+    async def loop(runner):
+        renewed = 0.0
+        while True:
+            if runner.leaser and time.monotonic() - renewed >= args.lease / 3:
+                runner.renew_leases()
+                renewed = time.monotonic()
+            await runner.run_due_checks()
+            await asyncio.sleep(args.tick)
+
+    if args.verbose:
+        from logs import setup_logging
+        setup_logging()
+    runner = scheduler.AvailabilityScheduler()
+    runner.checker = StubChecker(args.delay)
+    asyncio.run(loop(runner))
+
+
+def build_database(path: Path, watches: int):
+    engine = make_engine(path)
+    populate(engine, watches)
+    with engine.begin() as conn:
+        ids = conn.execute(select(RestaurantModel.id)).scalars().all()
+        conn.execute(insert(WatchConfigModel.__table__), [
+            {"restaurant_id": rid, "party_size": 2, "active": True}
+            for rid in ids
+        ])
+    return engine
+
+
+def run(engine, database_url: str, workers: int, args: argparse.Namespace) -> tuple[float, int, bool]:
+    """Returns (seconds, watches checked, finished)."""
+    with engine.begin() as conn:
+        conn.execute(update(WatchConfigModel.__table__).values(last_checked=None))
+        conn.execute(WatchConfigModel.metadata.tables["shard_leases"].delete())
+        total = conn.execute(select(func.count(WatchConfigModel.id))).scalar()
+
+    # Spawned workers import the backend fresh, reading the env at start()
+    ctx = multiprocessing.get_context("spawn")
+    processes = []
+    saved_env = dict(os.environ)
+    started = time.perf_counter()
+    start_time = datetime.utcnow()
+    try:
+        for index in range(workers):
+            os.environ.update(worker_env(database_url, index, workers, args))
+            process = ctx.Process(target=run_worker, args=(args,), daemon=True)
+            process.start()
+            processes.append(process)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+    crashed = False
+    checked = 0
+    try:
+        while time.perf_counter() - started < args.timeout:
+            time.sleep(0.2)
+            with engine.connect() as conn:
+                checked = conn.execute(
+                    select(func.count(WatchConfigModel.id))
+                    .where(WatchConfigModel.last_checked >= start_time)
+                ).scalar()
+            if checked >= total:
+                return time.perf_counter() - started, checked, True
+            if args.crash and not crashed and workers > 1 and checked >= total // (2 * workers):
+                # Hard kill: no lease release, so survivors must wait out the lease
+                processes[-1].kill()
+                crashed = True
+        return time.perf_counter() - started, checked, False
+    finally:
+        for process in processes:
+            process.kill()
+        for process in processes:
+            process.join()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--watches", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--lease", type=float, default=5.0, help="shard lease seconds")
+    parser.add_argument("--delay", type=float, default=0.2, help="simulated scrape seconds per check")
+    parser.add_argument("--concurrency", type=int, default=4, help="checks at once per worker")
+    parser.add_argument("--budget", type=int, default=20, help="checks started per tick")
+    parser.add_argument("--tick", type=float, default=0.1, help="seconds between due-check polls")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--crash", action="store_true", help="kill one worker partway through")
+    parser.add_argument("--verbose", action="store_true", help="show worker output")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}  {'checked':>8}  {'seconds':>8}  {'checks/s':>9}  {'speedup':>8}")
+    failed = False
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "workers.db"
+        engine = build_database(path, args.watches)
+        for workers in args.workers:
+            seconds, checked, finished = run(engine, f"sqlite:///{path}", workers, args)
+            rate = checked / seconds
+            baseline = baseline or rate or 1.0
+            note = "" if finished else "  (timed out)"
+            print(f"{workers:>8}  {checked:>8}  {seconds:>8.2f}  {rate:>9.1f}  {rate / baseline:>7.2f}x{note}")
+            failed = failed or not finished
+        engine.dispose()
+
+    if failed:
+        print("FAIL: some watches were never checked")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
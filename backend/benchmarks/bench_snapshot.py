@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-memory restaurant snapshot against the SQLAlchemy path.
+
+Calls the endpoint functions directly (no HTTP) and serializes each
+response, so the numbers compare the work done per request by the app.
+
+Usage:
+    python benchmarks/bench_snapshot.py --rows 500 50000 --seconds 2
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from synthetic import CUISINES, NEIGHBORHOODS, make_engine, populate
+import main
+from listing import listing_request
+from schemas import Restaurant
+from snapshot import snapshot
+
+
+def list_page(db, **overrides) -> str:
+    """Call main.get_restaurants with explicit parameters (FastAPI defaults aren't applied)."""
+    args = dict(
+        query=None, neighborhood=None, cuisine_type=None, visited=None,
+        monitor_enabled=None, priority=None, page=1, per_page=50,
+        cursor=None, include_total=None, include_facets=False,
+    )
+    args.update(overrides)
+    return main.get_restaurants(request=listing_request(**args), db=db).model_dump_json()
+
+
+def scenarios(rows: int) -> dict:
+    rng = random.Random(3)
+    return {
+        "list page 1": lambda db: list_page(db),
+        "list deep page": lambda db: list_page(db, page=max(1, rows // 50 - 1)),
+        "filtered + facets": lambda db: list_page(
+            db,
+            neighborhood=rng.sample(NEIGHBORHOODS, 2),
+            cuisine_type=rng.sample(CUISINES, 3),
+            visited=False,
+            include_facets=True,
+        ),
+        "lookup by id": lambda db: Restaurant.model_validate(
+            main.get_restaurant(rng.randint(1, rows), db=db)
+        ).model_dump_json(),
+    }
+
+
+def requests_per_second(Session, fn, seconds: float) -> float:
+    db = Session()
+    try:
+        count = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            fn(db)
+            count += 1
+        return count / (time.perf_counter() - started)
+    finally:
+        db.close()
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 50000])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7}  {'scenario':<18}  {'orm req/s':>10}  {'snapshot req/s':>15}  {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            engine = make_engine(Path(tmp) / f"snapshot_{rows}.db")
+            populate(engine, rows)
+            Session = sessionmaker(bind=engine)
+
+            db = Session()
+            snapshot.load(db)
+            db.close()
+
+            for name, fn in scenarios(rows).items():
+                snapshot.ready = False
+                orm = requests_per_second(Session, fn, args.seconds)
+                snapshot.ready = True
+                snap = requests_per_second(Session, fn, args.seconds)
+                print(f"{rows:>7}  {name:<18}  {orm:>10.0f}  {snap:>15.0f}  {snap / orm:>7.1f}x")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the SendGrid v3 mail API.
+
+Accepts POST /v3/mail/send like SendGrid does (202, empty body) and keeps
+the messages instead of delivering them. Latency and a failure rate (503s)
+are tunable so the outbox's batching and retries can be exercised offline.
+Point the app at it with SENDGRID_API_HOST=http://127.0.0.1:8025.
+
+Usage:
+    python benchmarks/email_sink.py --port 8025 --latency 0.05 --failure-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+class EmailSink:
+    """Threaded fake mail API; start() runs it in the background."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.messages: list[dict] = []
+        self.requests = 0
+        self.failures = 0
+        self.connections = 0
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "EmailSink":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="email-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.messages.clear()
+            self.requests = self.failures = self.connections = 0
+
+    def recipients(self) -> list[str]:
+        with self._lock:
+            return [
+                to["email"]
+                for message in self.messages
+                for personalization in message["personalizations"]
+                for to in personalization["to"]
+            ]
+
+    def _handler(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with sink._lock:
+                    sink.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def reply(self, status: int, body: bytes = b""):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if sink.latency:
+                    time.sleep(sink.latency)
+                if self.path != "/v3/mail/send":
+                    return self.reply(404)
+
+                with sink._lock:
+                    sink.requests += 1
+                    failed = sink._rng.random() < sink.failure_rate
+                    if failed:
+                        sink.failures += 1
+                    else:
+                        sink.messages.append(json.loads(body))
+                if failed:
+                    return self.reply(503, b'{"errors": [{"message": "try again"}]}')
+                self.reply(202)
+
+        return Handler
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = EmailSink(port=args.port, latency=args.latency, failure_rate=args.failure_rate)
+    print(f"Accepting mail on {sink.url}/v3/mail/send")
+    try:
+        sink.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{len(sink.messages)} messages, {sink.failures} failed requests")
+
+
+if __name__ == "__main__":
+    run()
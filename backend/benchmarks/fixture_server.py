@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Resy and OpenTable booking pages.
+
+Serves pages shaped like the real ones: a heavy app bundle that fetches the
+availability JSON (Resy's /4/find, OpenTable's RestaurantsAvailability
+GraphQL query) and renders it as the time-slot elements the scrapers read,
+plus hero images, a web font and an analytics tag that beacons in a loop.
+Latency and slot counts are tunable, and the server counts the requests and
+bytes it serves so fetch modes can be compared offline.
+
+Usage:
+    python benchmarks/fixture_server.py --port 8800 --latency 0.1 --slots 12
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+RESY_PAGE = """<!doctype html>
+<html><head>
+<meta charset="utf-8"><title>{slug} - Resy</title>
+<link rel="stylesheet" href="/static/app.css">
+<style>@font-face {{ font-family: Brand; src: url(/static/brand.woff2); }} body {{ font-family: Brand; }}</style>
+<script async src="/googletagmanager/gtm.js"></script>
+</head><body>
+{images}
+<div id="slots"></div>
+<script>window.__FIND__ = "/4/find?venue_slug={slug}&day={date}&party_size={seats}";</script>
+<script src="/static/resy-app.js"></script>
+</body></html>
+"""
+
+OPENTABLE_PAGE = """<!doctype html>
+<html><head>
+<meta charset="utf-8"><title>{term} - OpenTable</title>
+<link rel="stylesheet" href="/static/app.css">
+<style>@font-face {{ font-family: Brand; src: url(/static/brand.woff2); }} body {{ font-family: Brand; }}</style>
+<script async src="/googletagmanager/gtm.js"></script>
+</head><body>
+{images}
+<div id="results"></div>
+<script>window.__SEARCH__ = {search};</script>
+<script src="/static/opentable-app.js"></script>
+</body></html>
+"""
+
+TO_12H = """
+function to12h(hhmm) {
+  let [h, m] = hhmm.split(":").map(Number);
+  const suffix = h >= 12 ? "PM" : "AM";
+  h = h % 12 || 12;
+  return h + ":" + String(m).padStart(2, "0") + " " + suffix;
+}
+"""
+
+RESY_APP = TO_12H + """
+fetch(window.__FIND__).then(r => r.json()).then(data => {
+  const el = document.getElementById("slots");
+  for (const venue of data.results.venues) {
+    for (const slot of venue.slots) {
+      const button = document.createElement("button");
+      button.dataset.test = "time-slot";
+      button.textContent = to12h(slot.date.start.slice(11, 16));
+      el.appendChild(button);
+    }
+  }
+});
+"""
+
+OPENTABLE_APP = TO_12H + """
+const search = window.__SEARCH__;
+fetch("/dapi/fe/gql?optype=query&opname=RestaurantsAvailability", {
+  method: "POST",
+  headers: {"content-type": "application/json"},
+  body: JSON.stringify(search)
+}).then(r => r.json()).then(data => {
+  const el = document.getElementById("results");
+  const result = data.data.availability[0];
+  if (!result) return;
+  const times = document.createElement("div");
+  times.dataset.test = "times-702";
+  const [h, m] = search.time.split(":").map(Number);
+  for (const slot of result.availabilityDays[0].slots) {
+    if (!slot.isAvailable) continue;
+    const minutes = h * 60 + m + slot.timeOffsetMinutes;
+    const hhmm = String(Math.floor(minutes / 60)).padStart(2, "0") + ":" + String(minutes % 60).padStart(2, "0");
+    const a = document.createElement("a");
+    a.className = "timeSlot";
+    a.href = "/booking/" + result.restaurantId + "?t=" + hhmm;
+    a.textContent = to12h(hhmm);
+    times.appendChild(a);
+  }
+  el.appendChild(times);
+});
+"""
+
+ANALYTICS = """
+setInterval(() => fetch("/google-analytics/collect?t=" + Date.now(), {method: "POST"}), 250);
+"""
+
+
+def _padded(body: str, size: int) -> bytes:
+    """Pad a script or stylesheet with a comment up to roughly `size` bytes."""
+    data = body.encode()
+    if len(data) < size:
+        data += b"/*" + b"x" * (size - len(data) - 4) + b"*/"
+    return data
+
+
+def _seed(*parts) -> int:
+    return int(hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()[:8], 16)
+
+
+class FixtureServer:
+    """Threaded HTTP server for the fixture pages; start() runs it in the background."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.05,
+        slots: int = 12,
+        images: int = 6,
+        image_kb: int = 120,
+        bundle_kb: int = 400
+    ):
+        self.latency = latency
+        self.slots = slots
+        self.images = images
+        self.assets = {
+            "/static/app.css": ("text/css", _padded("body { margin: 0; }", 40 * 1024)),
+            "/static/brand.woff2": ("font/woff2", b"\0" * 60 * 1024),
+            "/static/resy-app.js": ("application/javascript", _padded(RESY_APP, bundle_kb * 1024)),
+            "/static/opentable-app.js": ("application/javascript", _padded(OPENTABLE_APP, bundle_kb * 1024)),
+            "/googletagmanager/gtm.js": ("application/javascript", _padded(ANALYTICS, 90 * 1024)),
+        }
+        self.image = b"\xff\xd8" + b"\0" * (image_kb * 1024)
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+
+    def slot_times(self, key: str, date: str) -> list[str]:
+        """Deterministic HH:MM slots for a venue and date, between 17:00 and 22:45."""
+        seed = _seed(key, date)
+        start = 17 * 60 + (seed % 4) * 15
+        return [
+            f"{(start + i * 15) // 60:02d}:{(start + i * 15) % 60:02d}"
+            for i in range(self.slots)
+            if start + i * 15 < 23 * 60
+        ]
+
+    def resy_find(self, slug: str, date: str) -> dict:
+        return {"results": {"venues": [{
+            "venue": {"id": {"resy": _seed(slug) % 100000}, "name": slug},
+            "slots": [
+                {"config": {"type": "Dining Room", "token": f"{slug}-{date}-{t}"},
+                 "date": {"start": f"{date} {t}:00", "end": f"{date} {t}:00"}}
+                for t in self.slot_times(slug, date)
+            ],
+        }]}}
+
+    def opentable_availability(self, term: str, date: str, time_: str) -> dict:
+        hours, minutes = map(int, time_.split(":"))
+        anchor = hours * 60 + minutes
+        slots = []
+        for t in self.slot_times(term, date):
+            h, m = map(int, t.split(":"))
+            slots.append({"isAvailable": True, "timeOffsetMinutes": h * 60 + m - anchor})
+        return {"data": {"availability": [{
+            "restaurantId": _seed(term) % 100000,
+            "availabilityDays": [{"dayOffset": 0, "slots": slots}],
+        }]}}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status: int, content_type: str, body: bytes, delay: bool = True):
+                if delay and server.latency:
+                    time.sleep(server.latency)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.requests += 1
+                    # Approximate header size; the body dominates
+                    server.bytes_sent += len(body) + 200
+
+            def send_json(self, data: dict):
+                self.send(200, "application/json", json.dumps(data).encode())
+
+            def images(self) -> str:
+                return "\n".join(f'<img src="/static/hero-{i}.jpg">' for i in range(server.images))
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                path = url.path
+
+                if path.startswith("/cities/"):
+                    slug = path.rstrip("/").rsplit("/", 1)[-1]
+                    html = RESY_PAGE.format(
+                        slug=slug, date=params.get("date", ""), seats=params.get("seats", "2"),
+                        images=self.images()
+                    )
+                    return self.send(200, "text/html; charset=utf-8", html.encode())
+
+                if path == "/4/find":
+                    return self.send_json(server.resy_find(params.get("venue_slug", ""), params.get("day", "")))
+
+                if path == "/s":
+                    date, _, time_ = params.get("dateTime", "T19:00").partition("T")
+                    search = {
+                        "term": params.get("term", ""),
+                        "date": date,
+                        "time": time_ or "19:00",
+                        "partySize": int(params.get("covers", "2")),
+                    }
+                    html = OPENTABLE_PAGE.format(
+                        term=search["term"], search=json.dumps(search), images=self.images()
+                    )
+                    return self.send(200, "text/html; charset=utf-8", html.encode())
+
+                if path.startswith("/static/hero-"):
+                    return self.send(200, "image/jpeg", server.image, delay=False)
+
+                if path in server.assets:
+                    content_type, body = server.assets[path]
+                    return self.send(200, content_type, body, delay=False)
+
+                self.send(404, "text/plain", b"not found", delay=False)
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                if url.path == "/dapi/fe/gql":
+                    search = json.loads(body or b"{}")
+                    return self.send_json(server.opentable_availability(
+                        search.get("term", ""), search.get("date", ""), search.get("time", "19:00")
+                    ))
+
+                if url.path == "/google-analytics/collect":
+                    return self.send(204, "text/plain", b"", delay=False)
+
+                self.send(404, "text/plain", b"not found", delay=False)
+
+        return Handler
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to pages and API calls")
+    parser.add_argument("--slots", type=int, default=12, help="slots per venue and date")
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port, latency=args.latency, slots=args.slots)
+    print(f"Serving fixture booking pages on {server.url}")
+    print(f"  Resy:      {server.url}/cities/ny/lilia?date=2024-05-01&seats=2")
+    print(f"  OpenTable: {server.url}/s?term=Carbone&covers=2&dateTime=2024-05-01T19%3A00&metroId=8")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    run()
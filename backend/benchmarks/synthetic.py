@@ -0,0 +1,77 @@
+"""
+Synthetic restaurant data shared by the benchmark scripts.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+# Benchmarks import the backend modules the same way the app does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import Base, Restaurant as RestaurantModel, create_db_engine  # noqa: E402
+
+NEIGHBORHOODS = [
+    "West Village", "East Village", "SoHo", "NoHo", "Tribeca", "Chelsea",
+    "Lower East Side", "Williamsburg", "Greenpoint", "Flatiron", "Nolita",
+    "Chinatown", "Upper West Side", "Upper East Side", "Koreatown", "FiDi",
+]
+CUISINES = [
+    "Italian", "Japanese", "American", "French", "Korean", "Mexican", "Thai",
+    "Wine Bar", "Bar/Cocktails", "Pizza", "Seafood", "Steakhouse", "Bakery",
+]
+PRIORITIES = ["normal", "normal", "normal", "high", "urgent"]
+WORDS = [
+    "lilia", "carbone", "tatiana", "dhamaka", "rezdora", "cervo", "semma",
+    "laser", "wolf", "bonnie", "four", "horsemen", "via", "carota", "lucali",
+    "kabawa", "torrisi", "penny", "claud", "foul", "witch", "ha", "sushi",
+    "noodle", "bistro", "trattoria", "osteria", "grill", "house", "kitchen",
+]
+NOTES = [
+    "", "", "great pasta", "get the tasting menu", "walk-in only",
+    "book 30 days out", "amazing cocktails", "cash only", "counter seats",
+]
+
+
+def make_restaurant(i: int, rng: random.Random) -> dict:
+    """Build one synthetic restaurants row."""
+    name = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(1, 3)))
+    return {
+        "name": f"{name} {i}",
+        "visited": rng.random() < 0.3,
+        "notes": rng.choice(NOTES),
+        "neighborhood": rng.choice(NEIGHBORHOODS),
+        "cuisine_type": rng.choice(CUISINES),
+        "booking_urls": {"resy": f"https://resy.com/cities/ny/{name.lower().replace(' ', '-')}-{i}"},
+        "monitor_enabled": rng.random() < 0.1,
+        "priority": rng.choice(PRIORITIES),
+    }
+
+
+def make_engine(path: Path, sqlite_pragmas: dict = None) -> Engine:
+    """Create a fresh SQLite database with the app's schema and tuning."""
+    if path.exists():
+        path.unlink()
+    engine = create_db_engine(f"sqlite:///{path}", sqlite_pragmas=sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def populate(engine: Engine, count: int, seed: int = 42, chunk_size: int = 10000):
+    """Insert `count` synthetic restaurants in batches."""
+    rng = random.Random(seed)
+    table = RestaurantModel.__table__
+    with engine.begin() as conn:
+        for start in range(0, count, chunk_size):
+            rows = [make_restaurant(i, rng) for i in range(start, min(start + chunk_size, count))]
+            conn.execute(insert(table), rows)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
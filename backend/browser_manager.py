@@ -0,0 +1,425 @@
+"""
+Browser lifecycle for the availability scrapers.
+
+One Chromium serves every platform, but each platform gets its own small set
+of warm BrowserContexts, so its cookies and local storage (consent banners,
+session tokens) carry over from check to check. A context is recycled after
+BROWSER_CONTEXT_MAX_PAGES checks, and every context is recycled when the
+browser's memory passes BROWSER_MAX_RSS_MB. The replacement starts from the
+old context's storage state, so recycling keeps the session. A periodic
+health check probes the browser. It relaunches the browser when it has
+crashed or hung, or when memory is still over the limit after a recycle.
+Checks in flight on the old browser fail and are retried next cycle.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright
+
+BROWSER_CONTEXTS_PER_PLATFORM = int(os.environ.get("BROWSER_CONTEXTS_PER_PLATFORM", "2"))
+BROWSER_CONTEXT_MAX_PAGES = int(os.environ.get("BROWSER_CONTEXT_MAX_PAGES", "200"))
+# Memory of the Playwright driver and browser processes this process started
+# (not the rest of its children); 0 turns the check off
+BROWSER_MAX_RSS_MB = float(os.environ.get("BROWSER_MAX_RSS_MB", "1024"))
+BROWSER_HEALTH_INTERVAL = float(os.environ.get("BROWSER_HEALTH_INTERVAL", "60"))
+BROWSER_HEALTH_TIMEOUT = float(os.environ.get("BROWSER_HEALTH_TIMEOUT", "10"))
+
+BROWSER_LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--no-sandbox',
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _process_children() -> Optional[dict[int, list[int]]]:
+    """Parent pid -> child pids, from /proc; None where that isn't available."""
+    children: dict[int, list[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; ppid is the second field after it
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _tree_rss(children: dict[int, list[int]], roots: list[int]) -> int:
+    """Resident memory in bytes of `roots` and all their descendants."""
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    stack = list(roots)
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except OSError:
+            continue
+    return total
+
+
+def process_tree_rss(pid: Optional[int] = None) -> Optional[int]:
+    """
+    Resident memory in bytes of all descendants of a process (default: this one).
+
+    Reads /proc, so it's None where that isn't available.
+    """
+    children = _process_children()
+    if children is None:
+        return None
+    return _tree_rss(children, children.get(pid or os.getpid(), []))
+
+
+def playwright_rss() -> Optional[int]:
+    """
+    Resident memory in bytes of the Playwright drivers this process started
+    and the browsers under them.
+
+    Other child processes aren't counted. None where /proc isn't available.
+    """
+    children = _process_children()
+    if children is None:
+        return None
+    drivers = []
+    for pid in children.get(os.getpid(), []):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                if b"run-driver" in f.read():
+                    drivers.append(pid)
+        except OSError:
+            continue
+    return _tree_rss(children, drivers)
+
+
+class ManagedContext:
+    """A browser context with its idle pages and usage counters."""
+
+    def __init__(self, context: BrowserContext, generation: int):
+        self.context = context
+        self.generation = generation
+        self.uses = 0
+        self.in_use = 0
+        self.idle: list[Page] = []
+        self.retired = False
+
+
+class PlatformPages:
+    """One platform's view of the manager, usable wherever a PagePool is."""
+
+    def __init__(self, manager: "BrowserManager", platform: str):
+        self.manager = manager
+        self.platform = platform
+
+    def page(self):
+        return self.manager.page(self.platform)
+
+    @property
+    def in_use(self) -> int:
+        return sum(c.in_use for c in self.manager._contexts.get(self.platform, []))
+
+    @property
+    def idle(self) -> int:
+        return sum(len(c.idle) for c in self.manager._contexts.get(self.platform, []))
+
+
+class BrowserManager:
+    """Owns the Playwright handle, the browser and the per-platform contexts."""
+
+    def __init__(
+        self,
+        size: int = 4,
+        setup: Optional[Callable[[Page], Awaitable[None]]] = None,
+        contexts_per_platform: int = BROWSER_CONTEXTS_PER_PLATFORM,
+        max_pages_per_context: int = BROWSER_CONTEXT_MAX_PAGES,
+        max_rss_mb: float = BROWSER_MAX_RSS_MB,
+        health_interval: float = BROWSER_HEALTH_INTERVAL,
+        health_timeout: float = BROWSER_HEALTH_TIMEOUT,
+        launch: Optional[Callable[[], Awaitable[Browser]]] = None,
+        rss: Callable[[], Optional[int]] = playwright_rss
+    ):
+        self.size = size
+        self.setup = setup
+        self.contexts_per_platform = contexts_per_platform
+        self.max_pages_per_context = max_pages_per_context
+        self.max_rss = int(max_rss_mb * 1024 * 1024)
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.launch = launch
+        self.rss = rss
+
+        self.browser: Optional[Browser] = None
+        self.generation = 0
+        self.in_use = 0
+        self._playwright: Optional[Playwright] = None
+        self._contexts: dict[str, list[ManagedContext]] = {}
+        self._storage: dict[str, dict] = {}
+        self._semaphore = asyncio.Semaphore(size)
+        self._lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._recycled_for_memory = False
+
+        self.restarts = 0
+        self.recycled = 0
+        self.last_rss: Optional[int] = None
+
+    async def start(self):
+        try:
+            await self._launch()
+        except BaseException:
+            # Don't leave the Playwright driver running behind a failed launch
+            await self.stop()
+            raise
+        if self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        """Close every page and context, the browser, and the Playwright driver."""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+        contexts, self._contexts = self._contexts, {}
+        for managed in (c for group in contexts.values() for c in group):
+            await self._close_context(managed)
+        if self.browser:
+            await self._close_quietly(self.browser)
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _launch(self):
+        if self.launch:
+            self.browser = await self.launch()
+        else:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_LAUNCH_ARGS)
+        self.generation += 1
+
+    def pages(self, platform: str) -> PlatformPages:
+        return PlatformPages(self, platform)
+
+    @asynccontextmanager
+    async def page(self, platform: str) -> AsyncIterator[Page]:
+        """
+        Check out a warm page in one of the platform's contexts.
+
+        At most `size` pages are out at once across platforms. A page whose
+        check raised is closed instead of reused.
+        """
+        async with self._semaphore:
+            if self.browser is None or not self.browser.is_connected():
+                await self.restart("browser disconnected", self.generation, keep_sessions=False)
+
+            managed = await self._checkout(platform)
+            try:
+                page = await self._page_in(managed)
+            except BaseException:
+                await self._checkin(managed)
+                raise
+
+            try:
+                yield page
+            except BaseException:
+                await self._close_quietly(page)
+                raise
+            else:
+                if managed.retired or page.is_closed():
+                    await self._close_quietly(page)
+                else:
+                    managed.idle.append(page)
+            finally:
+                await self._checkin(managed)
+
+    async def _checkout(self, platform: str) -> ManagedContext:
+        async with self._lock:
+            generation = self.generation
+            try:
+                return await self._take_context(platform)
+            except asyncio.TimeoutError:
+                pass
+        # Outside the lock, which restart() takes too
+        await self.restart("browser hung opening a context", generation, keep_sessions=False)
+        raise asyncio.TimeoutError("Browser hung opening a context")
+
+    async def _take_context(self, platform: str) -> ManagedContext:
+        """Pick (or open) the platform's least busy context; call with the lock held."""
+        contexts = self._contexts.setdefault(platform, [])
+        live = [c for c in contexts if not c.retired]
+        managed = next((c for c in live if c.idle), None)
+        if managed is None:
+            if len(live) < self.contexts_per_platform:
+                # Bounded, so a hung browser can't hold the lock and block restart()
+                context = await asyncio.wait_for(
+                    self.browser.new_context(storage_state=self._storage.get(platform)),
+                    self.health_timeout
+                )
+                managed = ManagedContext(context, self.generation)
+                contexts.append(managed)
+            else:
+                managed = min(live, key=lambda c: c.in_use)
+
+        managed.uses += 1
+        managed.in_use += 1
+        self.in_use += 1
+        if managed.uses >= self.max_pages_per_context:
+            # This is its last page; a fresh context takes over from here
+            await self._retire(platform, managed)
+        return managed
+
+    async def _page_in(self, managed: ManagedContext) -> Page:
+        while managed.idle:
+            page = managed.idle.pop()
+            if not page.is_closed():
+                return page
+        page = await managed.context.new_page()
+        if self.setup:
+            try:
+                await self.setup(page)
+            except BaseException:
+                await self._close_quietly(page)
+                raise
+        return page
+
+    async def _checkin(self, managed: ManagedContext):
+        managed.in_use -= 1
+        self.in_use -= 1
+        if managed.retired and managed.in_use == 0:
+            await self._close_context(managed)
+
+    async def _retire(self, platform: str, managed: ManagedContext):
+        """Stop handing out a context, keeping its cookies for the next one."""
+        if managed.retired:
+            return
+        managed.retired = True
+        self.recycled += 1
+        if managed.generation == self.generation:
+            try:
+                self._storage[platform] = await asyncio.wait_for(
+                    managed.context.storage_state(), self.health_timeout
+                )
+            except Exception as e:
+                logger.warning("Could not save %s browser storage: %s", platform, e)
+        if managed.in_use == 0:
+            await self._close_context(managed)
+
+    async def _close_context(self, managed: ManagedContext):
+        pages, managed.idle = managed.idle, []
+        for page in pages:
+            await self._close_quietly(page)
+        await self._close_quietly(managed.context)
+        for contexts in self._contexts.values():
+            if managed in contexts:
+                contexts.remove(managed)
+
+    async def _close_quietly(self, closable):
+        """Close a page, context or browser that may already be gone."""
+        try:
+            await asyncio.wait_for(closable.close(), self.health_timeout)
+        except Exception:
+            pass
+
+    async def recycle_contexts(self):
+        """Retire every context; the next checks open fresh ones."""
+        async with self._lock:
+            for platform, contexts in list(self._contexts.items()):
+                for managed in list(contexts):
+                    await self._retire(platform, managed)
+
+    async def restart(self, reason: str, generation: Optional[int] = None, keep_sessions: bool = True):
+        """
+        Relaunch the browser.
+
+        `generation` is the browser the caller saw fail; if it has already
+        been replaced, nothing happens. Sessions are only saved from a
+        browser that still responds.
+        """
+        async with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            logger.warning("Restarting browser: %s", reason)
+            for platform, contexts in list(self._contexts.items()):
+                for managed in list(contexts):
+                    if keep_sessions:
+                        await self._retire(platform, managed)
+                        continue
+                    # Closing the browser takes its contexts with it
+                    managed.retired = True
+                    if managed.in_use == 0:
+                        contexts.remove(managed)
+            old, self.browser = self.browser, None
+            if old is not None:
+                await self._close_quietly(old)
+            await self._launch()
+            self.restarts += 1
+
+    async def _probe(self) -> bool:
+        """Whether the browser can still open (and close) a context in time."""
+        try:
+            if self.browser is None or not self.browser.is_connected():
+                return False
+            context = await asyncio.wait_for(self.browser.new_context(), self.health_timeout)
+            await asyncio.wait_for(context.close(), self.health_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def check_health(self):
+        """Restart a dead or hung browser, and recycle or restart one using too much memory."""
+        generation = self.generation
+        if not await self._probe():
+            await self.restart("health check failed", generation, keep_sessions=False)
+            return
+
+        self.last_rss = self.rss()
+        if not self.max_rss or self.last_rss is None or self.last_rss <= self.max_rss:
+            self._recycled_for_memory = False
+            return
+        if self._recycled_for_memory:
+            # Recycling contexts wasn't enough
+            self._recycled_for_memory = False
+            await self.restart(f"memory {self.last_rss / 2**20:.0f}MB over limit", generation)
+        else:
+            logger.warning("Browser memory %.0fMB over limit, recycling contexts", self.last_rss / 2**20)
+            self._recycled_for_memory = True
+            await self.recycle_contexts()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception:
+                logger.exception("Browser health check error")
+
+    def stats(self) -> dict:
+        contexts = [c for group in self._contexts.values() for c in group]
+        return {
+            "generation": self.generation,
+            "restarts": self.restarts,
+            "recycled_contexts": self.recycled,
+            "contexts": sum(1 for c in contexts if not c.retired),
+            "page_capacity": self.size,
+            "pages_in_use": self.in_use,
+            "idle_pages": sum(len(c.idle) for c in contexts),
+            "rss_bytes": self.last_rss,
+        }
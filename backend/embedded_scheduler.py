@@ -0,0 +1,167 @@
+"""
+Run the availability scheduler inside the API process.
+
+SCHEDULER_MODE picks where it runs:
+
+  off     - not here; run `python scheduler.py` as its own process
+  thread  - on its own event loop in a dedicated thread, so browser work and
+            the scheduler's blocking database calls don't hold up requests
+            on the API's event loop
+  shared  - on the API's event loop (no extra thread, but a check cycle's
+            blocking work delays requests while it runs)
+
+Running in-process means one browser for the whole app: availability
+searches use the scheduler's checker and cache, and new watches are queued
+for an immediate check. Run a single API worker with it, or every worker
+starts its own scheduler.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from scheduler import AvailabilityScheduler
+
+SCHEDULER_MODE = os.environ.get("SCHEDULER_MODE", "off").lower()
+# Seconds to wait for in-flight checks and the browser to shut down
+SCHEDULER_STOP_TIMEOUT = float(os.environ.get("SCHEDULER_STOP_TIMEOUT", "30"))
+
+MODES = ("off", "thread", "shared")
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddedScheduler:
+    """Starts, stops and talks to an AvailabilityScheduler on its own loop or the API's."""
+
+    def __init__(
+        self,
+        mode: str = SCHEDULER_MODE,
+        factory: Callable[[], AvailabilityScheduler] = AvailabilityScheduler,
+        stop_timeout: float = SCHEDULER_STOP_TIMEOUT
+    ):
+        if mode not in MODES:
+            raise ValueError(f"SCHEDULER_MODE must be one of {', '.join(MODES)}, not {mode!r}")
+        self.mode = mode
+        self.factory = factory
+        self.stop_timeout = stop_timeout
+
+        self.scheduler: Optional[AvailabilityScheduler] = None
+        # The loop the scheduler runs on
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.started_at: Optional[datetime] = None
+        self._thread: Optional[threading.Thread] = None
+        self._sweep: Optional[asyncio.Future | concurrent.futures.Future] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def running(self) -> bool:
+        return self.scheduler is not None and self.scheduler.running
+
+    async def start(self):
+        if self.running or not self.enabled:
+            return
+        scheduler = self.factory()
+        if self.mode == "thread":
+            self.loop = await self._start_thread(scheduler)
+        else:
+            await scheduler.start()
+            self.loop = asyncio.get_running_loop()
+        self.scheduler = scheduler
+        self.started_at = datetime.utcnow()
+
+    async def _start_thread(self, scheduler: AvailabilityScheduler) -> asyncio.AbstractEventLoop:
+        ready: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(scheduler.start())
+            except BaseException as e:
+                ready.set_exception(e)
+                loop.close()
+                return
+            ready.set_result(loop)
+            loop.run_forever()
+
+            # stop() has shut the scheduler down; cancel whatever is left
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="availability-scheduler", daemon=True)
+        self._thread.start()
+        return await asyncio.wrap_future(ready)
+
+    async def stop(self):
+        if self.scheduler is None:
+            return
+        scheduler, self.scheduler = self.scheduler, None
+        try:
+            await asyncio.wait_for(self._call(scheduler.stop()), self.stop_timeout)
+        except Exception:
+            logger.exception("Error stopping scheduler")
+
+        if self._thread:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            await asyncio.to_thread(self._thread.join, self.stop_timeout)
+            self._thread = None
+        elif self._sweep and not self._sweep.done():
+            self._sweep.cancel()
+        self.loop = None
+        self._sweep = None
+
+    def _call(self, coro: Awaitable) -> Awaitable:
+        """Run a coroutine on the scheduler's loop, awaitable from the caller's."""
+        if self._thread is None:
+            return coro
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def schedule_now(self, watch_ids: list[int]):
+        """Check these watches right away (thread-safe; no-op when not running)."""
+        if self.running:
+            self.scheduler.schedule_now(watch_ids)
+
+    def check_now(self) -> bool:
+        """Start a sweep of every active watch; False if one is still running."""
+        if not self.running or (self._sweep and not self._sweep.done()):
+            return False
+        sweep = self.scheduler.check_all_watched_restaurants()
+        if self._thread:
+            self._sweep = asyncio.run_coroutine_threadsafe(sweep, self.loop)
+        else:
+            self._sweep = asyncio.ensure_future(sweep)
+        return True
+
+    async def status(self) -> dict[str, Any]:
+        status = {
+            "mode": self.mode,
+            "running": self.running,
+            "started_at": self.started_at if self.running else None,
+            "sweep_running": bool(self._sweep and not self._sweep.done()),
+        }
+        if self.running:
+            # Read the scheduler's state on its own loop
+            status.update(await self._call(self._collect(self.scheduler)))
+        return status
+
+    @staticmethod
+    async def _collect(scheduler: AvailabilityScheduler) -> dict[str, Any]:
+        checker = scheduler.checker
+        return {
+            "queue": scheduler.queue.metrics(),
+            "notifications": scheduler.dispatcher.stats(),
+            "availability_cache": checker.cache.stats() if checker else None,
+            "browser": checker.browsers.stats() if checker and checker.browsers else None,
+        }
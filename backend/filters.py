@@ -0,0 +1,91 @@
+"""
+Faceted filtering for the restaurant listing.
+
+Neighborhood and cuisine are multi-select facets: a restaurant matches if it
+is in any selected neighborhood and any selected cuisine. Facet counts are
+disjunctive, i.e. each facet's counts ignore that facet's own selection, so
+unselected options still show how many results picking them would add.
+Both facets and the total come from one GROUP BY over the rows that pass
+the non-facet filters.
+"""
+
+from sqlalchemy import func
+from sqlalchemy.sql import Select
+
+from models import Restaurant as RestaurantModel
+from schemas import Facets, SearchFilters
+
+
+def apply_attribute_filters(q: Select, filters: SearchFilters) -> Select:
+    """Apply the visited / monitor_enabled / priority filters."""
+    if filters.visited is not None:
+        q = q.filter(RestaurantModel.visited == filters.visited)
+
+    if filters.monitor_enabled is not None:
+        q = q.filter(RestaurantModel.monitor_enabled == filters.monitor_enabled)
+
+    if filters.priority:
+        q = q.filter(RestaurantModel.priority.in_(filters.priority))
+
+    return q
+
+
+def apply_facet_filters(q: Select, filters: SearchFilters) -> Select:
+    """Apply the multi-value neighborhood and cuisine filters."""
+    if filters.neighborhood:
+        q = q.filter(RestaurantModel.neighborhood.in_(filters.neighborhood))
+
+    if filters.cuisine_type:
+        q = q.filter(RestaurantModel.cuisine_type.in_(filters.cuisine_type))
+
+    return q
+
+
+def facet_query(q: Select) -> Select:
+    """
+    Aggregate row counts per (neighborhood, cuisine) pair.
+
+    `q` must already have the search and attribute filters applied but not
+    the facet filters.
+    """
+    return q.with_only_columns(
+        RestaurantModel.neighborhood,
+        RestaurantModel.cuisine_type,
+        func.count(RestaurantModel.id),
+        maintain_column_froms=True
+    ).group_by(
+        RestaurantModel.neighborhood,
+        RestaurantModel.cuisine_type
+    ).order_by(None)
+
+
+def facet_counts(rows: list, filters: SearchFilters) -> tuple[Facets, int]:
+    """
+    Turn facet_query() rows into per-facet counts.
+
+    Returns the facets and the total number of rows that also pass the
+    facet filters.
+    """
+    selected_neighborhoods = set(filters.neighborhood)
+    selected_cuisines = set(filters.cuisine_type)
+
+    neighborhoods: dict[str, int] = {}
+    cuisine_types: dict[str, int] = {}
+    total = 0
+
+    for neighborhood, cuisine_type, count in rows:
+        neighborhood_selected = not selected_neighborhoods or neighborhood in selected_neighborhoods
+        cuisine_selected = not selected_cuisines or cuisine_type in selected_cuisines
+
+        if neighborhood and cuisine_selected:
+            neighborhoods[neighborhood] = neighborhoods.get(neighborhood, 0) + count
+        if cuisine_type and neighborhood_selected:
+            cuisine_types[cuisine_type] = cuisine_types.get(cuisine_type, 0) + count
+        if neighborhood_selected and cuisine_selected:
+            total += count
+
+    facets = Facets(
+        neighborhoods=dict(sorted(neighborhoods.items())),
+        cuisine_types=dict(sorted(cuisine_types.items()))
+    )
+    return facets, total
@@ -0,0 +1,148 @@
+"""
+Restaurant listing queries shared by the sync and async endpoints.
+
+build_listing() turns the request parameters into plain SELECT statements
+(the page of rows, and optionally the total count and facet aggregate), so
+either a Session or an AsyncSession can execute them. listing_response()
+assembles the results into the API response.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+from fastapi import Query
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+
+from models import Restaurant as RestaurantModel
+from schemas import PaginatedResponse, SearchFilters
+from search import apply_search
+from pagination import after_cursor, next_cursor
+from filters import apply_attribute_filters, apply_facet_filters, facet_query, facet_counts
+
+
+@dataclass
+class ListingRequest:
+    """Parsed parameters of a restaurant listing request."""
+    filters: SearchFilters
+    page: int = 1
+    per_page: int = 50
+    cursor: Optional[str] = None
+    include_total: bool = True
+    include_facets: bool = False
+
+    @property
+    def keyset(self) -> bool:
+        return self.cursor is not None
+
+
+def listing_request(
+    query: Optional[str] = None,
+    neighborhood: Optional[List[str]] = Query(None),
+    cuisine_type: Optional[List[str]] = Query(None),
+    visited: Optional[bool] = None,
+    monitor_enabled: Optional[bool] = None,
+    priority: Optional[List[str]] = Query(None),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    include_facets: bool = False
+) -> ListingRequest:
+    """FastAPI dependency that parses the listing query parameters."""
+    if include_total is None:
+        include_total = cursor is None
+    return ListingRequest(
+        filters=SearchFilters(
+            query=query,
+            neighborhood=neighborhood or [],
+            cuisine_type=cuisine_type or [],
+            visited=visited,
+            monitor_enabled=monitor_enabled,
+            priority=priority or []
+        ),
+        page=page,
+        per_page=per_page,
+        cursor=cursor,
+        include_total=include_total,
+        include_facets=include_facets
+    )
+
+
+@dataclass
+class Listing:
+    """Statements needed to answer one listing request."""
+    request: ListingRequest
+    ranked: bool
+    rows: Select
+    count: Optional[Select] = None
+    facets: Optional[Select] = None
+
+
+def build_listing(request: ListingRequest) -> Listing:
+    """Build the statements for a listing request. Raises InvalidCursor."""
+    filters = request.filters
+    keyset = request.keyset
+
+    q = select(RestaurantModel)
+    rank = None
+
+    if filters.query:
+        q, rank = apply_search(q, filters.query)
+
+    q = apply_attribute_filters(q, filters)
+
+    # Facets and the total both come from the facet aggregate when requested
+    facets = facet_query(q) if request.include_facets else None
+
+    q = apply_facet_filters(q, filters)
+
+    count = None
+    if request.include_total and not request.include_facets:
+        count = select(func.count()).select_from(q.subquery())
+
+    if keyset:
+        q = after_cursor(q, request.cursor)
+        rank = None
+
+    # Search results are ordered by relevance, everything else alphabetically
+    order_by = [RestaurantModel.name, RestaurantModel.id]
+    if rank is not None:
+        order_by.insert(0, rank)
+    q = q.order_by(*order_by)
+
+    if not keyset:
+        q = q.offset((request.page - 1) * request.per_page)
+
+    return Listing(
+        request=request,
+        ranked=rank is not None,
+        rows=q.limit(request.per_page + 1),
+        count=count,
+        facets=facets
+    )
+
+
+def listing_response(
+    listing: Listing,
+    rows: list,
+    total: Optional[int] = None,
+    facet_rows: Optional[list] = None
+) -> PaginatedResponse:
+    """Assemble executed listing statements into a PaginatedResponse."""
+    request = listing.request
+    facets = None
+    if facet_rows is not None:
+        facets, facet_total = facet_counts(facet_rows, request.filters)
+        if request.include_total:
+            total = facet_total
+
+    per_page = request.per_page
+    return PaginatedResponse(
+        items=rows[:per_page],
+        total=total,
+        page=None if request.keyset else request.page,
+        per_page=per_page,
+        total_pages=None if total is None else (total + per_page - 1) // per_page,
+        next_cursor=None if listing.ranked else next_cursor(rows, per_page),
+        facets=facets
+    )
@@ -0,0 +1,239 @@
+"""
+Structured logging for the API and the scheduler.
+
+Modules log through the standard `logging` module. setup_logging() sends
+every record through a queue to a listener thread that formats and writes
+it, so a slow stdout or log collector doesn't block the event loop. If the
+writer falls LOG_QUEUE_SIZE records behind, INFO and DEBUG lines are dropped
+while warnings and errors are written by the caller. Records are JSON lines
+by default (LOG_FORMAT=text for development).
+
+Every record carries the correlation id in effect where it was logged. A
+check cycle sets one (see correlated()), and it's inherited by the tasks the
+cycle starts: its scrapes, the AvailabilityCheck rows written and the
+queued notifications store it too, so one cycle can be followed from the
+check to the email. Digest sends log the ids of the cycles they cover.
+
+High-frequency lines (one per restaurant or scrape) are logged with
+`extra=SAMPLED` and only every LOG_SAMPLE_EVERY-th of each message is kept;
+warnings and errors always are.
+
+LOG_LEVEL sets the default level and LOG_LEVELS per-logger ones, e.g.
+"scraper=DEBUG,notifications=WARNING".
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.environ.get("LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "10"))
+# Records waiting for the writer. Past this, INFO and DEBUG records are
+# dropped rather than waited on; warnings and errors are written directly
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+# Libraries that log every request or job run at INFO; LOG_LEVELS overrides
+DEFAULT_LEVELS = {"apscheduler": "WARNING", "httpx": "WARNING"}
+
+# Pass as `extra` to sample a high-frequency line. Lines are counted by
+# their format string, so pass values as arguments, not in an f-string
+SAMPLED = {"sample": True}
+
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "taskName", "correlation_id", "sample"
+}
+
+
+def new_correlation_id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+@contextmanager
+def correlated(prefix: str) -> Iterator[str]:
+    """Tag everything logged (and recorded) in this block with a new correlation id."""
+    value = new_correlation_id(prefix)
+    token = correlation_id.set(value)
+    try:
+        yield value
+    finally:
+        correlation_id.reset(token)
+
+
+def parse_levels(spec: str) -> dict[str, str]:
+    """'scraper=DEBUG, httpx=WARNING' -> {"scraper": "DEBUG", "httpx": "WARNING"}"""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the correlation id of the code that logged them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "correlation_id"):
+            record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps the first and then every `every`-th sampled record of each message."""
+
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(every, 1)
+        self._seen: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sample", False) or record.levelno >= logging.WARNING or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._seen.get(key, 0)
+            self._seen[key] = seen + 1
+        if seen % self.every:
+            return False
+        record.sampled_every = self.every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s %(message)s")
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        if getattr(record, "correlation_id", None):
+            line += f" [{record.correlation_id}]"
+        return line
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread.
+
+    When it falls too far behind, INFO and DEBUG records are dropped (and
+    counted), while warnings and errors are written from the caller's thread
+    through `overflow`, so they're never lost.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: Optional[logging.Handler] = None):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+        self.overflowed = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now; args may not survive the trip
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING and self.overflow is not None:
+                self.overflowed += 1
+                self.overflow.handle(record)
+            else:
+                self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # At shutdown, wait for room instead of failing on a full queue
+        self.queue.put(self._sentinel)
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    fmt: str = LOG_FORMAT,
+    stream=None,
+    queue_size: int = LOG_QUEUE_SIZE
+):
+    """Route all logging through the queue to stdout. Safe to call more than once."""
+    global _handler, _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    _handler = NonBlockingQueueHandler(queue.Queue(queue_size), overflow=output)
+    _handler.addFilter(ContextFilter())
+    _handler.addFilter(SamplingFilter())
+    _listener = _Listener(_handler.queue, output)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_handler)
+    for name, logger_level in {**DEFAULT_LEVELS, **parse_levels(levels)}.items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Write out what's queued and stop the writer thread."""
+    global _handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _handler = _listener = None
+
+
+def stats() -> dict:
+    return {
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+        "overflowed": _handler.overflowed if _handler else 0,
+    }
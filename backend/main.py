@@ -3,23 +3,44 @@ FastAPI backend for Grace's Gourmet Guide.
 """
 
 import os
+import asyncio
 import json
-from pathlib import Path
-from typing import List, Optional
-from fastapi import FastAPI, Depends, HTTPException, Query
+import logging
+import time
+from typing import Optional
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
 from models import (
     Restaurant as RestaurantModel,
-    init_db, get_db
+    WatchConfig as WatchConfigModel,
+    DB_MODE, init_db, get_db, engine, async_engine
 )
+from search import init_search_index
+from pagination import InvalidCursor
+from listing import ListingRequest, listing_request, build_listing, listing_response
+from batch_updates import batch_result, grouped_updates, merge_updates, select_rows, toggle_visited_rows
+from stats import CACHE_HEADERS, not_modified, stats_cache
+from snapshot import SNAPSHOT_ENABLED, snapshot
+from seed import SEED_IN_BACKGROUND, seed_status, run_seed, start_background_seed
+from availability_search import AVAILABILITY_SEARCH_MAX_RESTAURANTS, AvailabilitySearch
+from embedded_scheduler import EmbeddedScheduler
+from logs import setup_logging, stats as logging_stats
+from metrics import CONTENT_TYPE, METRICS_ENABLED, REGISTRY, Gauge, MetricsMiddleware, instrument_engine
 from schemas import (
     Restaurant, RestaurantCreate, RestaurantUpdate,
-    PaginatedResponse, Stats
+    RestaurantBatchUpdate, RestaurantBatchToggle, BatchUpdateResult,
+    WatchConfig, WatchConfigCreate, WatchConfigUpdate,
+    WatchConfigBatchCreate, WatchConfigBatchResult,
+    AvailabilitySearchRequest, PaginatedResponse, Stats
 )
 
+setup_logging()
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="Grace's Gourmet Guide API",
     description="NYC Restaurant Guide",
@@ -35,126 +56,147 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if METRICS_ENABLED:
+    # Request latency by route and SQL time by statement type, for /api/metrics
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+
+# Ad-hoc availability searches; launches its browser on the first scrape
+# unless the scheduler runs in this process and lends it its own
+availability_search = AvailabilitySearch()
+
+# The availability scheduler, when SCHEDULER_MODE runs it in this process
+availability_scheduler = EmbeddedScheduler()
+
+# Endpoints with an async counterpart in async_api.py; DB_MODE picks which
+# set is mounted (see the bottom of this module)
+db_routes = APIRouter()
+
 
 @app.on_event("startup")
 async def startup():
     """Initialize database on startup."""
     init_db()
+    init_search_index()
     
     db = next(get_db())
     count = db.query(RestaurantModel).count()
-    if count == 0:
-        load_initial_data(db)
     db.close()
+    
+    if count == 0:
+        if SEED_IN_BACKGROUND:
+            # Serve requests right away; /api/health reports "seeding" meanwhile
+            start_background_seed(on_complete=refresh_read_caches)
+        else:
+            await asyncio.to_thread(run_seed)
+            refresh_read_caches()
+    else:
+        refresh_read_caches()
+    
+    if availability_scheduler.enabled:
+        await start_availability_scheduler()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the embedded scheduler and close the search browser, if started."""
+    await stop_availability_scheduler()
+    await availability_search.stop()
 
 
-def load_initial_data(db: Session):
-    """Load restaurants from JSON file into database."""
-    json_path = Path(__file__).parent / "data" / "restaurants.json"
-    if not json_path.exists():
-        print(f"Warning: {json_path} not found")
+async def start_availability_scheduler():
+    """Start the embedded scheduler and let searches share its browser."""
+    try:
+        await availability_scheduler.start()
+    except Exception:
+        # Keep serving the API; /api/scheduler/start can retry
+        logger.exception("Could not start the availability scheduler")
         return
-    
-    with open(json_path) as f:
-        restaurants = json.load(f)
-    
-    for r in restaurants:
-        restaurant = RestaurantModel(
-            name=r["name"],
-            visited=r.get("visited", False),
-            notes=r.get("notes", ""),
-            neighborhood=r.get("neighborhood"),
-            cuisine_type=r.get("cuisine_type"),
-            booking_urls=r.get("booking_urls", {}),
-            monitor_enabled=r.get("monitor_enabled", False),
-            priority=r.get("priority", "normal")
-        )
-        db.add(restaurant)
-    
-    db.commit()
-    print(f"Loaded {len(restaurants)} restaurants into database")
+    scheduler = availability_scheduler.scheduler
+    availability_search.attach(scheduler.checker, availability_scheduler.loop)
+
+
+async def stop_availability_scheduler():
+    availability_search.detach()
+    await availability_scheduler.stop()
 
 
-@app.get("/api/restaurants", response_model=PaginatedResponse)
+def refresh_read_caches():
+    """Drop cached stats and rebuild the snapshot after a bulk load."""
+    stats_cache.invalidate()
+    if SNAPSHOT_ENABLED:
+        db = next(get_db())
+        try:
+            snapshot.load(db)
+        finally:
+            db.close()
+
+
+@db_routes.get("/api/restaurants", response_model=PaginatedResponse)
 def get_restaurants(
-    query: Optional[str] = None,
-    neighborhood: Optional[str] = None,
-    cuisine_type: Optional[str] = None,
-    page: int = Query(1, ge=1),
-    per_page: int = Query(50, ge=1, le=1000),
+    request: ListingRequest = Depends(listing_request),
     db: Session = Depends(get_db)
 ):
-    """Get all restaurants with optional filters and pagination."""
-    q = db.query(RestaurantModel)
-    
-    if query:
-        search = f"%{query}%"
-        q = q.filter(
-            or_(
-                RestaurantModel.name.ilike(search),
-                RestaurantModel.notes.ilike(search),
-                RestaurantModel.neighborhood.ilike(search),
-                RestaurantModel.cuisine_type.ilike(search)
-            )
-        )
+    """
+    Get all restaurants with optional filters and pagination.
     
-    if neighborhood:
-        q = q.filter(RestaurantModel.neighborhood == neighborhood)
+    `neighborhood`, `cuisine_type` and `priority` may be repeated to match
+    any of several values. With `include_facets`, the response also carries
+    per-neighborhood and per-cuisine result counts for the current filters.
     
-    if cuisine_type:
-        q = q.filter(RestaurantModel.cuisine_type == cuisine_type)
+    Pass `cursor` (the `next_cursor` of a previous response, or an empty
+    string for the first page) to page by keyset instead of offset. Cursor
+    pages are ordered by name even when searching, and skip the total count
+    unless `include_total` is set.
+    """
+    try:
+        # The in-memory snapshot handles everything except full-text search
+        if snapshot.ready and not request.filters.query:
+            return snapshot.page(request)
+        listing = build_listing(request)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    total = q.count()
-    offset = (page - 1) * per_page
-    restaurants = q.order_by(RestaurantModel.name).offset(offset).limit(per_page).all()
-    total_pages = (total + per_page - 1) // per_page
-    
-    return PaginatedResponse(
-        items=restaurants,
-        total=total,
-        page=page,
-        per_page=per_page,
-        total_pages=total_pages
-    )
+    facet_rows = db.execute(listing.facets).all() if listing.facets is not None else None
+    total = db.scalar(listing.count) if listing.count is not None else None
+    rows = db.scalars(listing.rows).all()
+    return listing_response(listing, rows, total, facet_rows)
 
 
-@app.get("/api/restaurants/{restaurant_id}", response_model=Restaurant)
+@db_routes.get("/api/restaurants/{restaurant_id}", response_model=Restaurant)
 def get_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
     """Get a single restaurant by ID."""
+    if snapshot.ready:
+        restaurant = snapshot.get(restaurant_id)
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        return restaurant
     restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     return restaurant
 
 
-@app.get("/api/stats", response_model=Stats)
-def get_stats(db: Session = Depends(get_db)):
+@db_routes.get("/api/stats", response_model=Stats)
+def get_stats(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get statistics about the restaurant collection."""
-    total = db.query(RestaurantModel).count()
-    visited = db.query(RestaurantModel).filter(RestaurantModel.visited == True).count()
-    monitored = db.query(RestaurantModel).filter(RestaurantModel.monitor_enabled == True).count()
-    
-    neighborhoods = db.query(RestaurantModel.neighborhood).filter(
-        RestaurantModel.neighborhood.isnot(None)
-    ).distinct().all()
-    neighborhoods = sorted([n[0] for n in neighborhoods if n[0]])
-    
-    cuisine_types = db.query(RestaurantModel.cuisine_type).filter(
-        RestaurantModel.cuisine_type.isnot(None)
-    ).distinct().all()
-    cuisine_types = sorted([c[0] for c in cuisine_types if c[0]])
-    
-    return Stats(
-        total_restaurants=total,
-        visited=visited,
-        not_visited=total - visited,
-        monitored=monitored,
-        neighborhoods=neighborhoods,
-        cuisine_types=cuisine_types
-    )
+    # Answer revalidations from the cached ETag before touching the database
+    cached = not_modified(request, stats_cache.etag)
+    if cached:
+        return cached
+    
+    stats, etag = stats_cache.get(db)
+    fresh = not_modified(request, etag)
+    if fresh:
+        return fresh
+    
+    response.headers.update({**CACHE_HEADERS, "ETag": etag})
+    return stats
 
 
-@app.patch("/api/restaurants/{restaurant_id}/toggle-visited", response_model=Restaurant)
+@db_routes.patch("/api/restaurants/{restaurant_id}/toggle-visited", response_model=Restaurant)
 def toggle_visited(restaurant_id: int, db: Session = Depends(get_db)):
     """Toggle visited status for a restaurant."""
     restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
@@ -162,11 +204,13 @@ def toggle_visited(restaurant_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Restaurant not found")
     restaurant.visited = not restaurant.visited
     db.commit()
+    stats_cache.invalidate()
     db.refresh(restaurant)
+    snapshot.upsert(restaurant)
     return restaurant
 
 
-@app.patch("/api/restaurants/{restaurant_id}", response_model=Restaurant)
+@db_routes.patch("/api/restaurants/{restaurant_id}", response_model=Restaurant)
 def update_restaurant(restaurant_id: int, updates: RestaurantUpdate, db: Session = Depends(get_db)):
     """Update a restaurant's fields."""
     restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
@@ -175,11 +219,57 @@ def update_restaurant(restaurant_id: int, updates: RestaurantUpdate, db: Session
     for field, value in updates.model_dump(exclude_unset=True).items():
         setattr(restaurant, field, value)
     db.commit()
+    stats_cache.invalidate()
     db.refresh(restaurant)
+    snapshot.upsert(restaurant)
     return restaurant
 
 
-@app.delete("/api/restaurants/{restaurant_id}")
+@db_routes.patch("/api/restaurants:batch", response_model=BatchUpdateResult)
+def batch_update_restaurants(batch: RestaurantBatchUpdate, db: Session = Depends(get_db)):
+    """
+    Apply several restaurant updates in one transaction.
+    
+    Rows that change the same set of fields are written with a single
+    executemany. Only rows that actually changed are returned.
+    """
+    requested = merge_updates(batch)
+    current = {row.id: row for row in db.execute(select_rows(requested)).all()}
+    
+    changed_ids = []
+    for stmt, params in grouped_updates(requested, current):
+        db.execute(stmt, params)
+        changed_ids.extend(p["target_id"] for p in params)
+    
+    changed = db.execute(select_rows(changed_ids)).all() if changed_ids else []
+    db.commit()
+    
+    if changed:
+        stats_cache.invalidate()
+        for row in changed:
+            snapshot.upsert(row)
+    
+    return batch_result(changed, requested, current)
+
+
+@db_routes.patch("/api/restaurants:batch-toggle-visited", response_model=BatchUpdateResult)
+def batch_toggle_visited(batch: RestaurantBatchToggle, db: Session = Depends(get_db)):
+    """Toggle visited status for several restaurants with one UPDATE."""
+    ids = list(dict.fromkeys(batch.ids))
+    
+    db.execute(toggle_visited_rows(ids))
+    changed = db.execute(select_rows(ids)).all()
+    db.commit()
+    
+    if changed:
+        stats_cache.invalidate()
+        for row in changed:
+            snapshot.upsert(row)
+    
+    return batch_result(changed, ids, (row.id for row in changed))
+
+
+@db_routes.delete("/api/restaurants/{restaurant_id}")
 def delete_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
     """Delete a restaurant by ID."""
     restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
@@ -187,10 +277,12 @@ def delete_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Restaurant not found")
     db.delete(restaurant)
     db.commit()
+    stats_cache.invalidate()
+    snapshot.remove(restaurant_id)
     return {"message": f"Deleted {restaurant.name}"}
 
 
-@app.delete("/api/restaurants/by-name/{name}")
+@db_routes.delete("/api/restaurants/by-name/{name}")
 def delete_restaurant_by_name(name: str, db: Session = Depends(get_db)):
     """Delete a restaurant by name."""
     restaurant = db.query(RestaurantModel).filter(RestaurantModel.name == name).first()
@@ -198,12 +290,275 @@ def delete_restaurant_by_name(name: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Restaurant not found")
     db.delete(restaurant)
     db.commit()
+    stats_cache.invalidate()
+    snapshot.remove(restaurant.id)
     return {"message": f"Deleted {name}"}
 
 
+@app.get("/api/watch-configs", response_model=list[WatchConfig])
+def list_watch_configs(active: Optional[bool] = None, db: Session = Depends(get_db)):
+    """List watch configurations, optionally only active or inactive ones."""
+    query = select(WatchConfigModel).order_by(WatchConfigModel.id)
+    if active is not None:
+        query = query.where(WatchConfigModel.active == active)
+    return db.scalars(query).all()
+
+
+@app.get("/api/watch-configs/{watch_id}", response_model=WatchConfig)
+def get_watch_config(watch_id: int, db: Session = Depends(get_db)):
+    """Get a single watch configuration by ID."""
+    watch = db.get(WatchConfigModel, watch_id)
+    if not watch:
+        raise HTTPException(status_code=404, detail="Watch config not found")
+    return watch
+
+
+@app.post("/api/watch-configs", response_model=WatchConfig)
+def create_watch_config(config: WatchConfigCreate, db: Session = Depends(get_db)):
+    """
+    Start watching a restaurant.
+    
+    A restaurant has at most one watch (409 if it's already watched). An
+    active watch gets its first check right away when the scheduler runs
+    in this process; a separate scheduler process checks it on its next poll.
+    """
+    if not db.get(RestaurantModel, config.restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    if db.scalar(select(WatchConfigModel.id).where(WatchConfigModel.restaurant_id == config.restaurant_id)):
+        raise HTTPException(status_code=409, detail="Restaurant is already watched")
+    watch = WatchConfigModel(**config.model_dump())
+    db.add(watch)
+    db.commit()
+    db.refresh(watch)
+    if watch.active:
+        availability_scheduler.schedule_now([watch.id])
+    return watch
+
+
+@app.post("/api/watch-configs:batch", response_model=WatchConfigBatchResult)
+def batch_create_watch_configs(batch: WatchConfigBatchCreate, db: Session = Depends(get_db)):
+    """
+    Create several watches with one INSERT.
+    
+    Restaurants that don't exist or are already watched (including repeats
+    within the batch) are skipped and listed in the result.
+    """
+    table = WatchConfigModel.__table__
+    requested = [item.restaurant_id for item in batch.items]
+    existing = set(db.scalars(select(RestaurantModel.id).where(RestaurantModel.id.in_(requested))))
+    watched = set(db.scalars(
+        select(WatchConfigModel.restaurant_id).where(WatchConfigModel.restaurant_id.in_(requested))
+    ))
+    
+    rows, not_found, already_watched = [], [], []
+    for item in batch.items:
+        if item.restaurant_id not in existing:
+            not_found.append(item.restaurant_id)
+        elif item.restaurant_id in watched:
+            already_watched.append(item.restaurant_id)
+        else:
+            watched.add(item.restaurant_id)
+            rows.append(item.model_dump())
+    
+    created = []
+    if rows:
+        db.execute(insert(table), rows)
+        created = db.scalars(
+            select(WatchConfigModel)
+            .where(WatchConfigModel.restaurant_id.in_([r["restaurant_id"] for r in rows]))
+            .order_by(WatchConfigModel.id)
+        ).all()
+    db.commit()
+    
+    availability_scheduler.schedule_now([w.id for w in created if w.active])
+    return WatchConfigBatchResult(items=created, not_found=not_found, already_watched=already_watched)
+
+
+@app.patch("/api/watch-configs/{watch_id}", response_model=WatchConfig)
+def update_watch_config(watch_id: int, updates: WatchConfigUpdate, db: Session = Depends(get_db)):
+    """Update a watch; an active watch whose settings changed is checked right away (embedded scheduler only)."""
+    watch = db.get(WatchConfigModel, watch_id)
+    if not watch:
+        raise HTTPException(status_code=404, detail="Watch config not found")
+    changed = False
+    for field, value in updates.model_dump(exclude_unset=True).items():
+        if getattr(watch, field) != value:
+            setattr(watch, field, value)
+            changed = True
+    db.commit()
+    db.refresh(watch)
+    if changed and watch.active:
+        availability_scheduler.schedule_now([watch.id])
+    return watch
+
+
+@app.delete("/api/watch-configs/{watch_id}")
+def delete_watch_config(watch_id: int, db: Session = Depends(get_db)):
+    """Stop watching a restaurant; the scheduler drops it on its next poll."""
+    watch = db.get(WatchConfigModel, watch_id)
+    if not watch:
+        raise HTTPException(status_code=404, detail="Watch config not found")
+    db.delete(watch)
+    db.commit()
+    return {"message": f"Deleted watch config {watch_id}"}
+
+
+@app.post("/api/scheduler/start")
+async def start_scheduler():
+    """Start the availability scheduler in this process (SCHEDULER_MODE thread or shared)."""
+    if not availability_scheduler.enabled:
+        raise HTTPException(
+            status_code=409,
+            detail="SCHEDULER_MODE is off; the scheduler runs as its own process"
+        )
+    await start_availability_scheduler()
+    return await availability_scheduler.status()
+
+
+@app.post("/api/scheduler/stop")
+async def stop_scheduler():
+    """Stop the embedded scheduler after its in-flight checks."""
+    await stop_availability_scheduler()
+    return await availability_scheduler.status()
+
+
+@app.get("/api/scheduler/status")
+async def scheduler_status():
+    """Scheduler mode and state, with its queue, notification, cache and browser stats."""
+    return await availability_scheduler.status()
+
+
+@app.post("/api/scheduler/check-now")
+async def check_now():
+    """Check every active watch now, in the background."""
+    if not availability_scheduler.running:
+        raise HTTPException(status_code=409, detail="Scheduler is not running")
+    started = availability_scheduler.check_now()
+    return {"started": started, "message": "Check started" if started else "A check is already running"}
+
+
+# State the scheduler and search already track, copied into gauges when
+# /api/metrics is scraped: (metric, stats section, stats key, type, help)
+STATE_METRICS = [
+    ("scheduler_watches", "queue", "watches", "gauge", "Active watches in the scheduler's queue"),
+    ("scheduler_watches_due", "queue", "due", "gauge", "Watches due for a check"),
+    ("scheduler_backlog", "queue", "backlog", "gauge", "Due watches left over by the last cycle"),
+    ("notification_digests_sent_total", "notifications", "digests_sent", "counter", "Digest emails sent"),
+    ("notifications_sent_total", "notifications", "notifications_sent", "counter", "Notifications delivered in digests"),
+    ("notification_retries_total", "notifications", "retries", "counter", "Digest sends retried"),
+    ("notification_failures_total", "notifications", "failures", "counter", "Digests given up on"),
+    ("availability_cache_entries", "availability_cache", "entries", "gauge", "Cached availability lookups"),
+    ("availability_cache_hits_total", "availability_cache", "hits", "counter", "Availability cache hits"),
+    ("availability_cache_misses_total", "availability_cache", "misses", "counter", "Availability cache misses"),
+    ("availability_cache_coalesced_total", "availability_cache", "coalesced", "counter", "Lookups that joined one in flight"),
+    ("browser_page_capacity", "browser", "page_capacity", "gauge", "Browser pages the pool may open"),
+    ("browser_pages_in_use", "browser", "pages_in_use", "gauge", "Browser pages checked out"),
+    ("browser_idle_pages", "browser", "idle_pages", "gauge", "Open browser pages waiting for work"),
+    ("browser_contexts", "browser", "contexts", "gauge", "Live browser contexts"),
+    ("browser_restarts_total", "browser", "restarts", "counter", "Browser restarts"),
+    ("browser_recycled_contexts_total", "browser", "recycled_contexts", "counter", "Browser contexts recycled"),
+    ("browser_rss_bytes", "browser", "rss_bytes", "gauge", "Resident memory of the browser processes"),
+    ("availability_searches_total", "search", "searches", "counter", "Availability searches"),
+    ("availability_search_cached_total", "search", "cached", "counter", "Search results answered from the cache"),
+    ("availability_search_scraped_total", "search", "scraped", "counter", "Search results scraped"),
+    ("availability_search_timeouts_total", "search", "timeouts", "counter", "Search results that timed out"),
+    ("availability_search_errors_total", "search", "errors", "counter", "Search results that failed"),
+    ("log_records_queued", "logging", "queued", "gauge", "Log records waiting to be written"),
+    ("log_records_dropped_total", "logging", "dropped", "counter", "INFO/DEBUG records dropped with the queue full"),
+    ("log_records_overflowed_total", "logging", "overflowed", "counter", "Warnings and errors written directly with the queue full"),
+]
+STATE_GAUGES = [
+    (Gauge(name, help, kind=kind), section, key) for name, section, key, kind, help in STATE_METRICS
+]
+SCHEDULER_RUNNING = Gauge("scheduler_running", "1 while the embedded scheduler runs")
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Prometheus metrics: request, SQL, scrape, check and send timings, plus current state."""
+    status = await availability_scheduler.status()
+    status["search"] = availability_search.stats()
+    status["logging"] = logging_stats()
+    SCHEDULER_RUNNING.set(1 if status["running"] else 0)
+    for gauge, section, key in STATE_GAUGES:
+        # Sections are missing while the scheduler or its browser is down
+        gauge.set((status.get(section) or {}).get(key))
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def load_search_restaurants(ids: list[int]) -> dict[int, dict]:
+    """Name and booking URLs of the given restaurants, keyed by id."""
+    if snapshot.ready:
+        found = (snapshot.get(i) for i in ids)
+        return {r["id"]: r for r in found if r}
+    table = RestaurantModel.__table__
+    db = next(get_db())
+    try:
+        rows = db.execute(
+            select(table.c.id, table.c.name, table.c.booking_urls).where(table.c.id.in_(ids))
+        ).all()
+    finally:
+        db.close()
+    return {row.id: dict(row._mapping) for row in rows}
+
+
+@app.post("/api/availability/search")
+async def search_availability(search: AvailabilitySearchRequest):
+    """
+    Check several restaurants' availability for one date and party size.
+    
+    The response is newline-delimited JSON, streamed as the checks resolve:
+    one line per restaurant (`restaurant_id`, the `slots` near the requested
+    `time`, whether they were `cached`, and an `error` if the check couldn't
+    run), then a final line with `done: true`. Cached availability is
+    served without scraping.
+    """
+    ids = list(dict.fromkeys(search.restaurant_ids))
+    if len(ids) > AVAILABILITY_SEARCH_MAX_RESTAURANTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {AVAILABILITY_SEARCH_MAX_RESTAURANTS} restaurants per search"
+        )
+    restaurants = await asyncio.to_thread(load_search_restaurants, ids)
+    
+    async def lines():
+        started = time.perf_counter()
+        for restaurant_id in ids:
+            if restaurant_id not in restaurants:
+                yield json.dumps({
+                    "restaurant_id": restaurant_id, "slots": [], "cached": False,
+                    "error": "Restaurant not found"
+                }) + "\n"
+        async for result in availability_search.search(
+            list(restaurants.values()), search.date, search.time, search.party_size
+        ):
+            yield json.dumps(result) + "\n"
+        yield json.dumps({
+            "done": True,
+            "date": search.date,
+            "party_size": search.party_size,
+            "restaurants": len(ids),
+            "ms": round((time.perf_counter() - started) * 1000),
+        }) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        # Don't let a proxy hold back the early results
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/health")
 def health_check():
-    """Health check endpoint."""
+    """Health check endpoint; 503 if the seed failed and the database is incomplete."""
+    if seed_status.state == "seeding":
+        return {"status": "seeding", "loaded": seed_status.loaded}
+    if seed_status.state == "failed":
+        return JSONResponse(
+            status_code=503,
+            content={"status": "failed", "loaded": seed_status.loaded, "error": seed_status.error}
+        )
     return {"status": "healthy"}
 
 
@@ -213,6 +568,13 @@ def root():
     return {"message": "Grace's Gourmet Guide API", "docs": "/docs"}
 
 
+if DB_MODE == "async":
+    from async_api import router as async_db_routes
+    app.include_router(async_db_routes)
+else:
+    app.include_router(db_routes)
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
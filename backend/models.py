@@ -5,8 +5,13 @@ Database models for the restaurant notification system.
 import os
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import (
+    create_engine, event, inspect, text, Column, Integer, String, Boolean, DateTime, Text, JSON,
+    ForeignKey, Index, UniqueConstraint
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, relationship
 
 Base = declarative_base()
@@ -30,6 +35,7 @@ class Restaurant(Base):
     # Relationship to watch list
     watch_config = relationship("WatchConfig", back_populates="restaurant", uselist=False, cascade="all, delete-orphan")
     availability_checks = relationship("AvailabilityCheck", back_populates="restaurant", cascade="all, delete-orphan")
+    seen_slots = relationship("SeenSlot", cascade="all, delete-orphan")
 
 
 class WatchConfig(Base):
@@ -49,6 +55,16 @@ class WatchConfig(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     restaurant = relationship("Restaurant", back_populates="watch_config")
+    
+    __table_args__ = (
+        # Covers the scheduler's queue sync, which reads only active watches
+        Index(
+            "ix_watch_configs_active_due",
+            "id", "restaurant_id", "date_range_start", "date_range_end", "last_checked",
+            sqlite_where=active == True,
+            postgresql_where=active == True,
+        ),
+    )
 
 
 class AvailabilityCheck(Base):
@@ -61,12 +77,49 @@ class AvailabilityCheck(Base):
     available_slots = Column(JSON, default=list)  # [{"date": "2026-02-15", "time": "19:30", "party_size": 2}]
     notified = Column(Boolean, default=False)
     booking_url = Column(Text, nullable=True)
+    correlation_id = Column(String(40), nullable=True)  # the check cycle that found the slots
     
     restaurant = relationship("Restaurant", back_populates="availability_checks")
+    
+    __table_args__ = (
+        Index("ix_availability_checks_restaurant_checked", "restaurant_id", "checked_at"),
+    )
+
+
+class SeenSlot(Base):
+    """A slot already found (and notified), for deduplicating scrape results."""
+    __tablename__ = "seen_slots"
+    
+    id = Column(Integer, primary_key=True)
+    restaurant_id = Column(Integer, ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False)
+    platform = Column(String(20), nullable=False)  # resy, opentable
+    date = Column(String(10), nullable=False)      # YYYY-MM-DD
+    time = Column(String(5), nullable=False)       # HH:MM
+    party_size = Column(Integer, nullable=False)
+    first_seen_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint(
+            "restaurant_id", "platform", "date", "time", "party_size",
+            name="uq_seen_slots_slot"
+        ),
+        Index("ix_seen_slots_restaurant_seen", "restaurant_id", "first_seen_at"),
+        Index("ix_seen_slots_first_seen_at", "first_seen_at"),
+    )
+
+
+class ShardLease(Base):
+    """Which scheduler worker owns a shard of watch configs, and until when."""
+    __tablename__ = "shard_leases"
+    
+    shard = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String(100), nullable=True)
+    owner_index = Column(Integer, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
 
 
 class NotificationLog(Base):
-    """Log of sent notifications."""
+    """Outbox and log of notifications (see notification_outbox.py)."""
     __tablename__ = "notification_logs"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -74,21 +127,138 @@ class NotificationLog(Base):
     notification_type = Column(String(20))  # email, sms
     recipient = Column(String(255))
     message = Column(Text)
-    sent_at = Column(DateTime, default=datetime.utcnow)
-    success = Column(Boolean, default=True)
+    sent_at = Column(DateTime, nullable=True)
+    success = Column(Boolean, default=False)
+    
+    # Outbox state: pending -> sending -> sent | failed
+    status = Column(String(20), default="pending")
+    payload = Column(JSON, nullable=True)  # {"restaurant_name": ..., "slots": [...]}
+    availability_check_id = Column(Integer, ForeignKey("availability_checks.id"), nullable=True)
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    claimed_by = Column(String(100), nullable=True)
+    error = Column(Text, nullable=True)
+    correlation_id = Column(String(40), nullable=True)  # the check cycle that queued it
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    availability_check = relationship("AvailabilityCheck")
+    
+    __table_args__ = (
+        Index("ix_notification_logs_status_next", "status", "next_attempt_at"),
+        Index("ix_notification_logs_recipient_status", "recipient", "status"),
+    )
 
 
 # Database setup
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./data/restaurants.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# SQLite tuning, applied to every new connection. WAL lets the scheduler's
+# writes proceed without blocking API readers. Set a value to "" to skip it.
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+    "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-65536"),  # negative = KiB
+    "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"),  # ms
+}
+
+# Connection pool settings for server databases (Postgres)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))  # seconds
+
+
+def _apply_sqlite_pragmas(sync_engine: Engine, pragmas: dict):
+    """Run the PRAGMA statements on every new connection."""
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if value:
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL, sqlite_pragmas: Optional[dict] = None) -> Engine:
+    """Create an engine with the configured pool or SQLite tuning profile."""
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+    _apply_sqlite_pragmas(sqlite_engine, SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas)
+    return sqlite_engine
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """Swap the driver in a database URL for its asyncio counterpart."""
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + url[url.index(":"):]
+    if url.startswith(("postgresql", "postgres:")):
+        return "postgresql+asyncpg" + url[url.index(":"):]
+    return url
+
+
+def create_async_db_engine(url: str = DATABASE_URL, sqlite_pragmas: Optional[dict] = None) -> AsyncEngine:
+    """Async engine (aiosqlite / asyncpg) with the same tuning profile."""
+    url = async_database_url(url)
+    if not url.startswith("sqlite"):
+        return create_async_engine(
+            url,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE
+        )
+    
+    async_engine = create_async_engine(url)
+    _apply_sqlite_pragmas(
+        async_engine.sync_engine,
+        SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas
+    )
+    return async_engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# "sync" serves the API through SessionLocal in the threadpool; "async" uses
+# AsyncSession from async def endpoints (see async_api.py)
+DB_MODE = os.environ.get("DB_MODE", "sync").lower()
+
+async_engine: Optional[AsyncEngine] = create_async_db_engine() if DB_MODE == "async" else None
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None else None
+)
+
+
+def _add_missing_columns(bind: Engine):
+    """Add nullable columns that were added to models after their table was created."""
+    existing = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            columns = {c["name"] for c in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
 
 def init_db():
-    """Create all database tables."""
+    """Create all database tables, plus columns and indexes added to existing tables since."""
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def get_db():
@@ -98,3 +268,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Get async database session (DB_MODE=async only)."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,318 @@
+"""
+Notification outbox backed by the notification_logs table.
+
+The scheduler queues a row per restaurant alert in the same transaction as
+its availability check, so sending never blocks a check cycle. A
+NotificationDispatcher polls for due rows and claims every queued row of
+each due recipient. It sends each recipient one digest covering all their
+restaurants, several recipients at once through one provider. Failed sends
+are retried with exponential backoff until NOTIFICATION_MAX_ATTEMPTS.
+
+Claims are a conditional UPDATE that also sets a claim deadline, so several
+scheduler workers can share the outbox. A row claimed by a worker that died
+becomes claimable again once the deadline passes, which makes delivery
+at-least-once.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from models import (
+    NotificationLog as NotificationLogModel,
+    AvailabilityCheck as AvailabilityCheckModel,
+    SessionLocal
+)
+from logs import correlation_id
+from metrics import SLOW_BUCKETS, Histogram
+from notifications import EmailProvider, create_provider, render_email
+from scraper import AvailableSlot
+
+# Alerts wait this long before sending so a cycle's finds share one digest
+NOTIFICATION_BATCH_SECONDS = float(os.environ.get("NOTIFICATION_BATCH_SECONDS", "10"))
+NOTIFICATION_POLL_SECONDS = float(os.environ.get("NOTIFICATION_POLL_SECONDS", "5"))
+# Recipients claimed per poll, and emails in flight at once
+NOTIFICATION_BATCH_SIZE = int(os.environ.get("NOTIFICATION_BATCH_SIZE", "100"))
+NOTIFICATION_CONCURRENCY = int(os.environ.get("NOTIFICATION_CONCURRENCY", "8"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_BACKOFF_SECONDS = float(os.environ.get("NOTIFICATION_BACKOFF_SECONDS", "30"))
+NOTIFICATION_BACKOFF_MAX_SECONDS = float(os.environ.get("NOTIFICATION_BACKOFF_MAX_SECONDS", "3600"))
+# A claimed row not finished by then is considered abandoned
+NOTIFICATION_CLAIM_SECONDS = float(os.environ.get("NOTIFICATION_CLAIM_SECONDS", "120"))
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+logger = logging.getLogger(__name__)
+
+SEND_SECONDS = Histogram(
+    "notification_send_duration_seconds", "Time to hand one digest email to the provider",
+    ("outcome",), buckets=SLOW_BUCKETS
+)
+
+
+def enqueue_notification(
+    db: Session,
+    email: str,
+    restaurant_id: int,
+    restaurant_name: str,
+    slots: list[AvailableSlot],
+    availability_check: Optional[AvailabilityCheckModel] = None,
+    now: Optional[datetime] = None
+) -> NotificationLogModel:
+    """Queue an email alert; it's sent after the session commits."""
+    now = now or datetime.utcnow()
+    row = NotificationLogModel(
+        restaurant_id=restaurant_id,
+        notification_type="email",
+        recipient=email,
+        status=PENDING,
+        success=False,
+        payload={
+            "restaurant_name": restaurant_name,
+            "slots": [{
+                "date": s.date,
+                "time": s.time,
+                "party_size": s.party_size,
+                "booking_url": s.booking_url,
+                "platform": s.platform,
+            } for s in slots],
+        },
+        attempts=0,
+        next_attempt_at=now + timedelta(seconds=NOTIFICATION_BATCH_SECONDS),
+        correlation_id=correlation_id.get(),
+        created_at=now
+    )
+    if availability_check is not None:
+        row.availability_check = availability_check
+    db.add(row)
+    return row
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next try after `attempts` failures, with jitter."""
+    delay = min(NOTIFICATION_BACKOFF_SECONDS * 2 ** (attempts - 1), NOTIFICATION_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def digest_sections(rows: list[NotificationLogModel]) -> list[tuple[str, list[AvailableSlot]]]:
+    """One (restaurant name, slots) section per restaurant, slots deduplicated."""
+    sections: OrderedDict[int, tuple[str, dict]] = OrderedDict()
+    for row in rows:
+        name, slots = sections.setdefault(row.restaurant_id, (row.payload["restaurant_name"], {}))
+        for slot in row.payload["slots"]:
+            slot = AvailableSlot(**slot)
+            slots.setdefault((slot.platform, slot.date, slot.time, slot.party_size), slot)
+    return [(name, list(slots.values())) for name, slots in sections.values()]
+
+
+def _digest_fields(rows: list[NotificationLogModel]) -> dict:
+    """Log fields tying a digest to its outbox rows and the check cycles that queued them."""
+    return {
+        "notification_ids": [row.id for row in rows],
+        "correlation_ids": sorted({row.correlation_id for row in rows if row.correlation_id}),
+    }
+
+
+class NotificationDispatcher:
+    """Background task that drains the outbox through an email provider."""
+
+    def __init__(
+        self,
+        provider: Optional[EmailProvider] = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        concurrency: int = NOTIFICATION_CONCURRENCY,
+        batch_size: int = NOTIFICATION_BATCH_SIZE,
+        poll_seconds: float = NOTIFICATION_POLL_SECONDS,
+        max_attempts: int = NOTIFICATION_MAX_ATTEMPTS
+    ):
+        self.provider = provider
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+        self.sent = 0  # digests delivered
+        self.notifications_sent = 0  # outbox rows they covered
+        self.retries = 0
+        self.failures = 0  # rows given up on
+
+    async def start(self):
+        if self.provider is None:
+            self.provider = create_provider()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop polling after the current batch, then close the provider."""
+        if self._task:
+            self._stopping = True
+            self.wake()
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                # Cancelled mid-batch; its claims expire and get retried
+                pass
+            self._task = None
+        if self.provider:
+            await self.provider.close()
+
+    def wake(self):
+        """Poll now instead of waiting out the poll interval."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                handled = await self.dispatch_due()
+            except Exception:
+                logger.exception("Outbox dispatch failed")
+                handled = 0
+            if handled >= self.batch_size or self._stopping:
+                continue  # more may be waiting
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _claim(self, db: Session, now: datetime) -> list[NotificationLogModel]:
+        """Claim all queued rows of up to batch_size recipients with something due."""
+        log = NotificationLogModel
+        due = and_(log.status.in_([PENDING, SENDING]), log.next_attempt_at <= now)
+        recipients = db.execute(
+            select(log.recipient).where(due).group_by(log.recipient)
+            .order_by(func.min(log.next_attempt_at)).limit(self.batch_size)
+        ).scalars().all()
+        if not recipients:
+            return []
+
+        # The recipient's not-yet-due rows ride along in the same digest
+        claimable = or_(
+            log.status == PENDING,
+            and_(log.status == SENDING, log.next_attempt_at <= now)
+        )
+        db.execute(
+            update(log)
+            .where(log.recipient.in_(recipients), claimable)
+            .values(
+                status=SENDING,
+                claimed_by=self.worker_id,
+                next_attempt_at=now + timedelta(seconds=NOTIFICATION_CLAIM_SECONDS)
+            )
+        )
+        db.commit()
+        return db.query(log).filter(
+            log.claimed_by == self.worker_id, log.status == SENDING
+        ).order_by(log.recipient, log.id).all()
+
+    async def dispatch_due(self, now: Optional[datetime] = None) -> int:
+        """Send one batch of due digests. Returns the number of recipients handled."""
+        now = now or datetime.utcnow()
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            rows = self._claim(db, now)
+            by_recipient: OrderedDict[str, list] = OrderedDict()
+            for row in rows:
+                by_recipient.setdefault(row.recipient, []).append(row)
+            if not by_recipient:
+                return 0
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def send(recipient: str, recipient_rows: list):
+                async with semaphore:
+                    message = render_email(recipient, digest_sections(recipient_rows))
+                    started = time.perf_counter()
+                    outcome = "error"
+                    try:
+                        await self.provider.send(message)
+                        outcome = "ok"
+                    finally:
+                        SEND_SECONDS.observe(time.perf_counter() - started, outcome)
+                    return message.subject
+
+            results = await asyncio.gather(
+                *(send(recipient, recipient_rows) for recipient, recipient_rows in by_recipient.items()),
+                return_exceptions=True
+            )
+            self._record_results(db, list(by_recipient.values()), results)
+            return len(by_recipient)
+        finally:
+            db.close()
+
+    def _record_results(self, db: Session, groups: list[list], results: list):
+        finished = datetime.utcnow()
+        sent_checks = []
+        for recipient_rows, result in zip(groups, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                error = (str(result).splitlines() or [type(result).__name__])[0]
+                # One retry time for the whole digest keeps it together
+                attempts = max((row.attempts or 0) for row in recipient_rows) + 1
+                retry_at = finished + timedelta(seconds=backoff_seconds(attempts))
+                for row in recipient_rows:
+                    row.attempts = (row.attempts or 0) + 1
+                    row.error = error[:1000]
+                    row.claimed_by = None
+                    if row.attempts >= self.max_attempts:
+                        row.status = FAILED
+                        row.next_attempt_at = None
+                        self.failures += 1
+                    else:
+                        row.status = PENDING
+                        row.next_attempt_at = retry_at
+                        self.retries += 1
+                logger.warning(
+                    "Failed to send digest to %s (attempt %s): %s",
+                    recipient_rows[0].recipient, attempts, error,
+                    extra=_digest_fields(recipient_rows)
+                )
+                continue
+
+            for row in recipient_rows:
+                row.status = SENT
+                row.success = True
+                row.sent_at = finished
+                row.message = result
+                row.attempts = (row.attempts or 0) + 1
+                row.error = None
+                row.claimed_by = None
+                row.next_attempt_at = None
+                if row.availability_check_id:
+                    sent_checks.append(row.availability_check_id)
+            self.sent += 1
+            self.notifications_sent += len(recipient_rows)
+            logger.info(
+                "Sent digest of %s notifications to %s", len(recipient_rows), recipient_rows[0].recipient,
+                extra=_digest_fields(recipient_rows)
+            )
+
+        if sent_checks:
+            db.execute(
+                update(AvailabilityCheckModel)
+                .where(AvailabilityCheckModel.id.in_(sent_checks))
+                .values(notified=True)
+            )
+        db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "digests_sent": self.sent,
+            "notifications_sent": self.notifications_sent,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
@@ -1,18 +1,46 @@
 """
 Email notification service for availability alerts.
+
+Emails are rendered here and handed to a pluggable provider. The scheduler
+doesn't send directly: it queues notifications in the outbox
+(notification_outbox.py), whose dispatcher batches them per recipient.
 """
 
+import logging
 import os
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from html import escape
+from string import Template
 from typing import Optional
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To, Content, HtmlContent
+
+import httpx
 
 # Load from environment
 SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY', '')
+SENDGRID_API_HOST = os.getenv('SENDGRID_API_HOST', 'https://api.sendgrid.com')
+SENDGRID_TIMEOUT = float(os.getenv('SENDGRID_TIMEOUT', '10'))
 FROM_EMAIL = os.getenv('NOTIFICATION_FROM_EMAIL', 'noreply@restaurant-notifier.local')
 
+# "sendgrid" or "log"; defaults to sendgrid when an API key is set
+NOTIFICATION_PROVIDER = os.getenv('NOTIFICATION_PROVIDER') or ('sendgrid' if SENDGRID_API_KEY else 'log')
+
+# Slots listed per restaurant
+MAX_SLOTS_SHOWN = 5
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class EmailMessage:
+    to_email: str
+    subject: str
+    html: str
+    plain: str
+
 
+@lru_cache(maxsize=2048)
 def format_time_12h(time_24h: str) -> str:
     """Convert 24h time to 12h format."""
     try:
@@ -22,6 +50,7 @@ def format_time_12h(time_24h: str) -> str:
         return time_24h
 
 
+@lru_cache(maxsize=2048)
 def format_date_readable(date_str: str) -> str:
     """Convert YYYY-MM-DD to readable format."""
     try:
@@ -31,136 +60,269 @@ def format_date_readable(date_str: str) -> str:
         return date_str
 
 
-async def send_availability_notification(
-    email: str,
-    restaurant_name: str,
-    slots: list,  # List of AvailableSlot
-    sms_number: Optional[str] = None
-):
-    """
-    Send notification about available reservation slots.
-    
-    Args:
-        email: Recipient email address
-        restaurant_name: Name of the restaurant
-        slots: List of available slots
-        sms_number: Optional phone number for SMS notification
-    """
-    if not SENDGRID_API_KEY:
-        print(f"[NOTIFICATION] Would send email to {email} about {restaurant_name}")
-        print(f"  Available slots: {len(slots)}")
-        for slot in slots:
-            print(f"    - {slot.date} at {slot.time}")
-        return
-    
-    # Build email content
-    subject = f"🍽️ {restaurant_name} has availability!"
-    
-    # Build HTML content
-    slots_html = ""
-    for slot in slots[:5]:  # Limit to 5 slots
-        formatted_date = format_date_readable(slot.date)
-        formatted_time = format_time_12h(slot.time)
-        
-        slots_html += f"""
-        <tr>
-            <td style="padding: 12px 16px; border-bottom: 1px solid #eee;">
-                <strong>{formatted_date}</strong><br>
-                <span style="color: #666;">{formatted_time} • Party of {slot.party_size}</span>
-            </td>
-            <td style="padding: 12px 16px; border-bottom: 1px solid #eee; text-align: right;">
-                <a href="{slot.booking_url}" 
-                   style="display: inline-block; padding: 8px 16px; background: #C45D3A; 
-                          color: white; text-decoration: none; border-radius: 6px;
-                          font-weight: 500;">
-                    Book Now
-                </a>
-            </td>
-        </tr>
-        """
-    
-    html_content = f"""
+# Templates are parsed once at import; rendering is substitution only
+EMAIL_HTML = Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="utf-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
     </head>
-    <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; 
+    <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
                  background-color: #FDF8F3; margin: 0; padding: 20px;">
-        <div style="max-width: 500px; margin: 0 auto; background: white; border-radius: 16px; 
+        <div style="max-width: 500px; margin: 0 auto; background: white; border-radius: 16px;
                     overflow: hidden; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
             
             <!-- Header -->
-            <div style="background: linear-gradient(135deg, #C45D3A 0%, #722F37 100%); 
+            <div style="background: linear-gradient(135deg, #C45D3A 0%, #722F37 100%);
                         padding: 32px 24px; text-align: center;">
                 <h1 style="margin: 0; color: white; font-size: 24px; font-weight: 600;">
-                    {restaurant_name}
+                    $title
                 </h1>
                 <p style="margin: 8px 0 0; color: rgba(255,255,255,0.9); font-size: 16px;">
-                    has availability! 🎉
+                    $tagline
                 </p>
             </div>
             
             <!-- Content -->
             <div style="padding: 24px;">
                 <p style="margin: 0 0 20px; color: #333; font-size: 15px;">
-                    Great news! We found open reservation slots at <strong>{restaurant_name}</strong>. 
-                    Book quickly before they're gone!
+                    $intro
                 </p>
-                
-                <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
-                    {slots_html}
-                </table>
-                
-                {f'<p style="color: #666; font-size: 13px;">+ {len(slots) - 5} more slots available</p>' if len(slots) > 5 else ''}
+                $body
             </div>
             
             <!-- Footer -->
-            <div style="padding: 16px 24px; background: #f9f9f9; border-top: 1px solid #eee; 
+            <div style="padding: 16px 24px; background: #f9f9f9; border-top: 1px solid #eee;
                         text-align: center;">
                 <p style="margin: 0; color: #999; font-size: 12px;">
-                    You're receiving this because you set up alerts for {restaurant_name}.<br>
+                    You're receiving this because you set up alerts for $names.<br>
                     <a href="#" style="color: #C45D3A;">Manage notifications</a>
                 </p>
             </div>
         </div>
     </body>
     </html>
+    """)
+
+SLOT_ROW_HTML = Template("""
+        <tr>
+            <td style="padding: 12px 16px; border-bottom: 1px solid #eee;">
+                <strong>$date</strong><br>
+                <span style="color: #666;">$time • Party of $party_size</span>
+            </td>
+            <td style="padding: 12px 16px; border-bottom: 1px solid #eee; text-align: right;">
+                <a href="$booking_url"
+                   style="display: inline-block; padding: 8px 16px; background: #C45D3A;
+                          color: white; text-decoration: none; border-radius: 6px;
+                          font-weight: 500;">
+                    Book Now
+                </a>
+            </td>
+        </tr>
+        """)
+
+SLOTS_HTML = Template("""
+                <table style="width: 100%; border-collapse: collapse; margin-bottom: 20px;">
+                    $rows
+                </table>
+                
+                $more
+    """)
+
+MORE_SLOTS_HTML = Template('<p style="color: #666; font-size: 13px;">+ $count more slots available</p>')
+
+DIGEST_SECTION_HTML = Template("""
+                <h2 style="margin: 24px 0 8px; color: #722F37; font-size: 18px;">$name</h2>
+                $slots
+            """)
+
+SECTION_PLAIN = Template("""
+$name has availability!
+
+We found the following open slots:
+
+$slots""")
+
+SLOT_PLAIN = Template("""• $date at $time for $party_size
+  Book: $booking_url
+
+""")
+
+
+def _slots_key(slots: list) -> tuple:
+    """Hashable identity of a slot list, for the render caches."""
+    return tuple((s.date, s.time, s.party_size, s.booking_url) for s in slots)
+
+
+@lru_cache(maxsize=1024)
+def _render_section(restaurant_name: str, slots: tuple) -> tuple[str, str]:
+    """(HTML, plain text) listing one restaurant's slots."""
+    rows = []
+    plain = []
+    for date, time_, party_size, booking_url in slots[:MAX_SLOTS_SHOWN]:
+        values = {
+            "date": format_date_readable(date),
+            "time": format_time_12h(time_),
+            "party_size": party_size,
+        }
+        rows.append(SLOT_ROW_HTML.substitute(values, booking_url=escape(booking_url)))
+        plain.append(SLOT_PLAIN.substitute(values, booking_url=booking_url))
+
+    more = ""
+    if len(slots) > MAX_SLOTS_SHOWN:
+        more = MORE_SLOTS_HTML.substitute(count=len(slots) - MAX_SLOTS_SHOWN)
+
+    html = SLOTS_HTML.substitute(rows="".join(rows), more=more)
+    return html, SECTION_PLAIN.substitute(name=restaurant_name, slots="".join(plain))
+
+
+@lru_cache(maxsize=1024)
+def _render_body(sections: tuple) -> tuple[str, str, str]:
+    """(subject, HTML, plain text) for sections of (restaurant name, slots key)."""
+    rendered = [_render_section(name, slots) for name, slots in sections]
+    names = [escape(name) for name, _ in sections]
+
+    if len(sections) == 1:
+        restaurant_name = sections[0][0]
+        subject = f"🍽️ {restaurant_name} has availability!"
+        title, tagline = names[0], "has availability! 🎉"
+        intro = (
+            f"Great news! We found open reservation slots at <strong>{names[0]}</strong>. "
+            "Book quickly before they're gone!"
+        )
+        body = rendered[0][0]
+    else:
+        subject = f"🍽️ {len(sections)} restaurants have availability!"
+        title, tagline = f"{len(sections)} restaurants", "have availability! 🎉"
+        intro = "Great news! We found open reservation slots. Book quickly before they're gone!"
+        body = "".join(
+            DIGEST_SECTION_HTML.substitute(name=name, slots=html)
+            for name, (html, _) in zip(names, rendered)
+        )
+
+    html = EMAIL_HTML.substitute(
+        title=title, tagline=tagline, intro=intro, body=body, names=", ".join(names)
+    )
+    return subject, html, "".join(plain for _, plain in rendered)
+
+
+def render_email(to_email: str, sections: list[tuple[str, list]]) -> EmailMessage:
     """
+    Render an availability email.
+    
+    Identical content is rendered once and reused for every recipient (and
+    every section shared between digests), so a cycle's alerts for the same
+    restaurant and slots cost one render however many people watch it.
     
-    # Plain text fallback
-    plain_content = f"""
-{restaurant_name} has availability!
+    Args:
+        to_email: Recipient email address
+        sections: (restaurant name, available slots) pairs; more than one
+            makes a digest
+    """
+    subject, html, plain = _render_body(tuple((name, _slots_key(slots)) for name, slots in sections))
+    return EmailMessage(to_email=to_email, subject=subject, html=html, plain=plain)
 
-We found the following open slots:
 
-"""
-    for slot in slots[:5]:
-        formatted_date = format_date_readable(slot.date)
-        formatted_time = format_time_12h(slot.time)
-        plain_content += f"• {formatted_date} at {formatted_time} for {slot.party_size}\n"
-        plain_content += f"  Book: {slot.booking_url}\n\n"
+def clear_render_caches():
+    """Drop memoized formatting and rendered emails."""
+    for cached in (format_time_12h, format_date_readable, _render_section, _render_body):
+        cached.cache_clear()
+
+
+class EmailProvider:
+    """Delivers rendered emails. send() raises on failure so the outbox can retry."""
     
-    # Send via SendGrid
-    try:
-        message = Mail(
-            from_email=Email(FROM_EMAIL, "Restaurant Notifier"),
-            to_emails=To(email),
-            subject=subject,
-            html_content=HtmlContent(html_content),
-            plain_text_content=Content("text/plain", plain_content)
+    name = "base"
+    
+    async def send(self, message: EmailMessage):
+        raise NotImplementedError
+    
+    async def close(self):
+        pass
+
+
+class LogProvider(EmailProvider):
+    """Logs emails instead of sending them (no API key configured); bodies at DEBUG."""
+    
+    name = "log"
+    
+    async def send(self, message: EmailMessage):
+        logger.info("Would send email to %s: %s", message.to_email, message.subject)
+        logger.debug("Email body:\n%s", message.plain.strip())
+
+
+class SendGridProvider(EmailProvider):
+    """SendGrid v3 mail API over one pooled async HTTP client."""
+    
+    name = "sendgrid"
+    
+    def __init__(
+        self,
+        api_key: str = SENDGRID_API_KEY,
+        host: str = SENDGRID_API_HOST,
+        timeout: float = SENDGRID_TIMEOUT
+    ):
+        self.client = httpx.AsyncClient(
+            base_url=host,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=timeout
         )
-        
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        
-        print(f"[NOTIFICATION] Email sent to {email} (status: {response.status_code})")
-        return response.status_code == 202
     
+    async def send(self, message: EmailMessage):
+        response = await self.client.post("/v3/mail/send", json={
+            "personalizations": [{"to": [{"email": message.to_email}]}],
+            "from": {"email": FROM_EMAIL, "name": "Restaurant Notifier"},
+            "subject": message.subject,
+            "content": [
+                {"type": "text/plain", "value": message.plain},
+                {"type": "text/html", "value": message.html},
+            ],
+        })
+        response.raise_for_status()
+    
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_provider(name: str = NOTIFICATION_PROVIDER) -> EmailProvider:
+    """Build the configured email provider."""
+    if name == "sendgrid":
+        return SendGridProvider()
+    if name == "log":
+        return LogProvider()
+    raise ValueError(f"Unknown notification provider: {name}")
+
+
+async def send_availability_notification(
+    email: str,
+    restaurant_name: str,
+    slots: list,  # List of AvailableSlot
+    sms_number: Optional[str] = None,
+    provider: Optional[EmailProvider] = None
+):
+    """
+    Send one notification right away, bypassing the outbox.
+    
+    Args:
+        email: Recipient email address
+        restaurant_name: Name of the restaurant
+        slots: List of available slots
+        sms_number: Optional phone number for SMS notification
+        provider: Provider to send with (default: a new configured one)
+    """
+    owned = provider is None
+    provider = provider or create_provider()
+    try:
+        await provider.send(render_email(email, [(restaurant_name, slots)]))
+        logger.info("Email sent to %s via %s", email, provider.name)
+        return True
     except Exception as e:
-        print(f"[NOTIFICATION] Failed to send email: {e}")
+        logger.error("Failed to send email to %s: %s", email, e)
         return False
+    finally:
+        if owned:
+            await provider.close()
 
 
 async def send_test_notification(email: str):
@@ -0,0 +1,58 @@
+"""
+Keyset (cursor) pagination helpers for the restaurant listing.
+
+A cursor is an opaque URL-safe token holding the sort key, ``(name, id)``,
+of the last row the client has seen. The next page starts strictly after it,
+so fetching page N costs the same as fetching page 1.
+"""
+
+import base64
+import json
+from typing import Optional
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+from models import Restaurant as RestaurantModel
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token can't be decoded."""
+
+
+def encode_cursor(name: str, restaurant_id: int) -> str:
+    """Encode the sort key of the last row on a page."""
+    raw = json.dumps([name, restaurant_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        name, restaurant_id = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(name, str) or not isinstance(restaurant_id, int):
+            raise TypeError("unexpected cursor payload")
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+    return name, restaurant_id
+
+
+def after_cursor(q: Select, cursor: Optional[str]) -> Select:
+    """Restrict a (name, id)-ordered query to rows after the cursor."""
+    if not cursor:
+        return q
+    name, restaurant_id = decode_cursor(cursor)
+    return q.filter(tuple_(RestaurantModel.name, RestaurantModel.id) > tuple_(name, restaurant_id))
+
+
+def next_cursor(rows: list, per_page: int) -> Optional[str]:
+    """
+    Cursor for the following page, or None if this was the last page.
+
+    Expects `rows` to have been fetched with ``limit(per_page + 1)`` so the
+    presence of a next page is known without another query.
+    """
+    if len(rows) <= per_page:
+        return None
+    last = rows[per_page - 1]
+    return encode_cursor(last.name, last.id)
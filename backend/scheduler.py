@@ -2,13 +2,20 @@
 Background scheduler for checking restaurant availability.
 """
 
+import argparse
 import asyncio
-import re
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from models import (
     Restaurant as RestaurantModel,
@@ -16,8 +23,36 @@ from models import (
     AvailabilityCheck as AvailabilityCheckModel,
     SessionLocal
 )
-from scraper import AvailabilityChecker, AvailableSlot
-from notifications import send_availability_notification
+from logs import SAMPLED, correlated, correlation_id, setup_logging
+from metrics import SLOW_BUCKETS, Counter, Gauge, Histogram
+from scraper import AvailabilityChecker, AvailableSlot, resy_slug
+from notification_outbox import NotificationDispatcher, enqueue_notification
+from watch_queue import WatchQueue
+from seen_slots import (
+    SEEN_SLOT_PRUNE_MINUTES, slot_key, recent_slot_keys, record_new_slots, prune_seen_slots,
+    backfill_seen_slots
+)
+from shard_leases import SCHEDULER_WORKERS, SHARD_LEASE_SECONDS, ShardLeaser, shard_filter
+
+# Restaurants checked at once; the scraper's page pool and per-platform
+# limits still bound the actual browser traffic
+SCHEDULER_CONCURRENCY = int(os.environ.get("SCHEDULER_CONCURRENCY", "4"))
+
+# How often the queue is polled for due watches, and the most checks one
+# poll may start (the rest wait for the next poll, most urgent first)
+SCHEDULER_TICK_SECONDS = int(os.environ.get("SCHEDULER_TICK_SECONDS", "30"))
+SCHEDULER_CYCLE_BUDGET = int(os.environ.get("SCHEDULER_CYCLE_BUDGET", "20"))
+
+logger = logging.getLogger(__name__)
+
+CYCLE_SECONDS = Histogram(
+    "scheduler_cycle_duration_seconds", "Time to check a batch of watches (due poll or full sweep)",
+    ("kind",), buckets=SLOW_BUCKETS
+)
+CYCLE_LAG = Gauge(
+    "scheduler_lag_seconds", "How overdue the most overdue watch was when its cycle started", ("kind",)
+)
+WATCH_CHECKS = Counter("scheduler_checks_total", "Watch checks by outcome", ("outcome",))
 
 
 class AvailabilityScheduler:
@@ -26,75 +61,306 @@ class AvailabilityScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
         self.checker: Optional[AvailabilityChecker] = None
+        self.queue = WatchQueue()
+        self.dispatcher = NotificationDispatcher()
+        # With several workers each one only checks the shards it leases
+        self.leaser: Optional[ShardLeaser] = ShardLeaser() if SCHEDULER_WORKERS > 1 else None
+        # Watches created or changed through the API, checked on the next poll
+        self._check_now: deque[int] = deque()
         self.running = False
     
     async def start(self):
         """Start the scheduler."""
-        print("Starting availability scheduler...")
+        logger.info("Starting availability scheduler")
         
         # Initialize the scraper
         self.checker = AvailabilityChecker()
         await self.checker.start()
         
-        # Add job to check availability every 15 minutes
+        # Alerts are queued by the checks and sent from here
+        await self.dispatcher.start()
+        
+        # Slots found before the seen_slots table existed count as seen
+        self.backfill_seen_slots()
+        
+        if self.leaser:
+            self.renew_leases()
+            self.scheduler.add_job(
+                self.renew_leases,
+                IntervalTrigger(seconds=SHARD_LEASE_SECONDS / 3),
+                id='renew_shard_leases',
+                name='Renew shard leases',
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+        
+        # Poll the watch queue; each watch runs on its own adaptive interval
         self.scheduler.add_job(
-            self.check_all_watched_restaurants,
-            IntervalTrigger(minutes=15),
+            self.run_due_checks,
+            IntervalTrigger(seconds=SCHEDULER_TICK_SECONDS),
             id='check_availability',
-            name='Check restaurant availability',
+            name='Check due restaurant watches',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            next_run_time=datetime.now()
+        )
+        
+        # Drop seen slots past retention so they can be notified again
+        self.scheduler.add_job(
+            self.prune_expired_slots,
+            IntervalTrigger(minutes=SEEN_SLOT_PRUNE_MINUTES),
+            id='prune_seen_slots',
+            name='Prune expired seen slots',
             replace_existing=True
         )
         
         self.scheduler.start()
         self.running = True
-        print("Scheduler started - checking every 15 minutes")
+        logger.info("Scheduler started, polling due watches every %ss", SCHEDULER_TICK_SECONDS)
     
     async def stop(self):
         """Stop the scheduler."""
-        print("Stopping scheduler...")
+        logger.info("Stopping scheduler")
         self.scheduler.shutdown()
         if self.checker:
             await self.checker.stop()
+        await self.dispatcher.stop()
+        if self.leaser:
+            db = SessionLocal()
+            try:
+                self.leaser.release(db)
+            finally:
+                db.close()
         self.running = False
     
-    async def check_all_watched_restaurants(self):
-        """Check availability for all restaurants being watched."""
-        print(f"\n[{datetime.now().isoformat()}] Running availability check...")
-        
+    def renew_leases(self):
+        """Heartbeat this worker's shard leases, picking up orphaned shards."""
         db = SessionLocal()
         try:
-            # Get all active watch configs
-            watch_configs = db.query(WatchConfigModel).filter(
-                WatchConfigModel.active == True
+            before = self.leaser.owned
+            owned = self.leaser.heartbeat(db)
+            if owned != before:
+                logger.info(
+                    "Worker %s now owns %s shards", self.leaser.worker_index, len(owned),
+                    extra={"shards": sorted(owned)}
+                )
+        except Exception:
+            db.rollback()
+            logger.exception("Error renewing shard leases")
+        finally:
+            db.close()
+    
+    def _owned_watches(self) -> list:
+        """Filter conditions limiting watch configs to this worker's shards."""
+        if self.leaser is None:
+            return []
+        return [shard_filter(WatchConfigModel.id, self.leaser.owned)]
+    
+    def backfill_seen_slots(self):
+        """Copy recently found slots into an empty seen_slots table."""
+        db = SessionLocal()
+        try:
+            added = backfill_seen_slots(db)
+            db.commit()
+            if added:
+                logger.info("Marked %s slots from recent availability checks as seen", added)
+        except Exception:
+            db.rollback()
+            logger.exception("Error backfilling seen slots")
+        finally:
+            db.close()
+    
+    def prune_expired_slots(self):
+        """Delete seen slots older than the retention window."""
+        db = SessionLocal()
+        try:
+            removed = prune_seen_slots(db)
+            db.commit()
+            if removed:
+                logger.info("Pruned %s expired seen slots", removed)
+        except Exception:
+            db.rollback()
+            logger.exception("Error pruning seen slots")
+        finally:
+            db.close()
+    
+    def _sync_queue(self, db: Session):
+        """Bring the watch queue in line with the active watches."""
+        rows = db.query(
+            WatchConfigModel.id,
+            WatchConfigModel.date_range_start,
+            WatchConfigModel.date_range_end,
+            WatchConfigModel.last_checked,
+            RestaurantModel.priority
+        ).join(
+            RestaurantModel, RestaurantModel.id == WatchConfigModel.restaurant_id
+        ).filter(
+            WatchConfigModel.active == True,
+            *self._owned_watches()
+        ).all()
+        self.queue.sync(rows)
+    
+    def schedule_now(self, watch_ids: list[int]):
+        """
+        Check these watches right away instead of on their usual interval.
+        
+        Safe to call from other threads: the watches are picked up by the
+        next poll, which is moved up to now.
+        """
+        if not self.running or not watch_ids:
+            return
+        self._check_now.extend(watch_ids)
+        self.scheduler.modify_job('check_availability', next_run_time=datetime.now())
+    
+    async def run_due_checks(self):
+        """Check the watches that are due, up to the per-cycle budget."""
+        with correlated("cycle"):
+            await self._run_due_checks()
+    
+    async def _run_due_checks(self):
+        db = SessionLocal(expire_on_commit=False)
+        watch_ids = []
+        try:
+            self._sync_queue(db)
+            while self._check_now:
+                self.queue.schedule_now(self._check_now.popleft())
+            watch_ids = self.queue.pop_due(SCHEDULER_CYCLE_BUDGET)
+            if not watch_ids:
+                return
+            
+            logger.info(
+                "Checking %s due watches (lag %.0fs, %s left for next cycle)",
+                len(watch_ids), self.queue.lag_seconds, self.queue.backlog,
+                extra={"kind": "due"}
+            )
+            CYCLE_LAG.set(self.queue.lag_seconds, "due")
+            started = time.perf_counter()
+            
+            watch_configs = db.query(WatchConfigModel).options(
+                joinedload(WatchConfigModel.restaurant)
+            ).filter(
+                WatchConfigModel.id.in_(watch_ids)
             ).all()
+            await self._check_watches(db, watch_configs)
+            CYCLE_SECONDS.observe(time.perf_counter() - started, "due")
+        
+        except Exception:
+            logger.exception("Error during availability check")
+        
+        finally:
+            # Anything popped but not checked goes back on its normal interval
+            self.queue.release(watch_ids)
+            db.close()
+    
+    async def check_all_watched_restaurants(self):
+        """Check availability for every active watch now, regardless of due times."""
+        with correlated("cycle"):
+            await self._check_all_watched_restaurants()
+    
+    async def _check_all_watched_restaurants(self):
+        db = SessionLocal(expire_on_commit=False)
+        started = time.perf_counter()
+        try:
+            self._sync_queue(db)
+            CYCLE_LAG.set(self.queue.overdue_seconds(), "sweep")
             
-            print(f"Checking {len(watch_configs)} watched restaurants")
+            # Get all active watch configs, with their restaurants
+            watch_configs = db.query(WatchConfigModel).options(
+                joinedload(WatchConfigModel.restaurant)
+            ).filter(
+                WatchConfigModel.active == True,
+                *self._owned_watches()
+            ).all()
             
-            for config in watch_configs:
-                await self.check_restaurant(db, config)
-                # Update last checked time
-                config.last_checked = datetime.utcnow()
-                db.commit()
-                
-                # Delay between restaurants to avoid rate limiting
-                await asyncio.sleep(5)
+            logger.info("Checking all %s watched restaurants", len(watch_configs), extra={"kind": "sweep"})
+            await self._check_watches(db, watch_configs)
+            CYCLE_SECONDS.observe(time.perf_counter() - started, "sweep")
         
-        except Exception as e:
-            print(f"Error during availability check: {e}")
+        except Exception:
+            logger.exception("Error during availability check")
         
         finally:
             db.close()
     
-    async def check_restaurant(self, db: Session, config: WatchConfigModel):
-        """Check availability for a single restaurant."""
-        restaurant = db.query(RestaurantModel).filter(
-            RestaurantModel.id == config.restaurant_id
-        ).first()
+    async def _check_watches(self, db: Session, watch_configs: list[WatchConfigModel]):
+        """
+        Check watches concurrently and queue each one's next check.
+        
+        Expects the configs' restaurants to be loaded already. Their seen
+        slots are read once for all of them and last_checked is written in
+        one UPDATE, so the queries per cycle don't grow with the watch count
+        (only restaurants with unseen slots add writes).
+        """
+        found_slots = recent_slot_keys(db, [c.restaurant_id for c in watch_configs])
+        semaphore = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+        
+        async def check(config: WatchConfigModel):
+            async with semaphore:
+                slots = None
+                try:
+                    slots = await self.check_restaurant(
+                        db, config, found_slots.setdefault(config.restaurant_id, set())
+                    )
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    self.queue.schedule(
+                        config.id,
+                        slots=None if slots is None else [(s.date, s.time) for s in slots]
+                    )
+        
+        results = await asyncio.gather(
+            *(check(config) for config in watch_configs),
+            return_exceptions=True
+        )
+        
+        checked = []
+        for config, result in zip(watch_configs, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Error checking watch %s: %s", config.id, result,
+                    exc_info=result, extra={"watch_id": config.id}
+                )
+            else:
+                checked.append(config.id)
+        WATCH_CHECKS.inc("ok", amount=len(checked))
+        WATCH_CHECKS.inc("error", amount=len(watch_configs) - len(checked))
+        
+        # Update last checked time
+        if checked:
+            db.query(WatchConfigModel).filter(
+                WatchConfigModel.id.in_(checked)
+            ).update({"last_checked": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        
+        logger.info(
+            "Checked %s of %s watches", len(checked), len(watch_configs),
+            extra={"availability_cache": self.checker.cache.stats()}
+        )
+    
+    async def check_restaurant(
+        self,
+        db: Session,
+        config: WatchConfigModel,
+        found_slots: Optional[set] = None
+    ) -> Optional[list[AvailableSlot]]:
+        """
+        Check availability for a single restaurant. Returns the slots found.
+        
+        `found_slots` holds the restaurant's seen slot keys (see
+        seen_slots.recent_slot_keys); it's loaded here when not given, and
+        updated with the slots recorded.
+        """
+        restaurant = config.restaurant
         
         if not restaurant:
-            return
+            return None
         
-        print(f"  Checking: {restaurant.name}")
+        log_fields = {"watch_id": config.id, "restaurant_id": restaurant.id}
+        logger.info("Checking %s", restaurant.name, extra={**SAMPLED, **log_fields})
         
         # Generate dates to check
         if config.date_range_start and config.date_range_end:
@@ -139,10 +405,15 @@ class AvailabilityScheduler:
         
         # Process results
         if slots:
-            print(f"    Found {len(slots)} available slots!")
+            logger.info("Found %s available slots at %s", len(slots), restaurant.name, extra={**SAMPLED, **log_fields})
             
-            # Check for new slots (not already notified)
-            new_slots = await self._filter_new_slots(db, restaurant.id, slots)
+            # Check for new slots (not already notified). The in-memory set
+            # skips the write for slots we know about; the insert decides
+            if found_slots is None:
+                found_slots = recent_slot_keys(db, [restaurant.id]).get(restaurant.id, set())
+            candidates = [s for s in slots if slot_key(s) not in found_slots]
+            new_slots = record_new_slots(db, restaurant.id, candidates) if candidates else []
+            found_slots.update(slot_key(s) for s in candidates)
             
             if new_slots:
                 # Save to database
@@ -154,56 +425,37 @@ class AvailabilityScheduler:
                         'party_size': s.party_size,
                         'booking_url': s.booking_url
                     } for s in new_slots],
-                    booking_url=new_slots[0].booking_url if new_slots else None
+                    booking_url=new_slots[0].booking_url if new_slots else None,
+                    correlation_id=correlation_id.get()
                 )
                 db.add(check_record)
-                db.commit()
                 
-                # Send notification
+                # Queue the alert in the same transaction; the outbox sends it
                 if config.notify_email:
-                    await send_availability_notification(
+                    enqueue_notification(
+                        db,
                         email=config.notify_email,
+                        restaurant_id=restaurant.id,
                         restaurant_name=restaurant.name,
-                        slots=new_slots
+                        slots=new_slots,
+                        availability_check=check_record
                     )
-                    check_record.notified = True
-                    db.commit()
+            
+            if candidates:
+                db.commit()
+            if new_slots:
+                logger.info(
+                    "Recorded %s new slots at %s", len(new_slots), restaurant.name,
+                    extra={**log_fields, "availability_check_id": check_record.id}
+                )
         else:
-            print(f"    No availability found")
+            logger.info("No availability found at %s", restaurant.name, extra={**SAMPLED, **log_fields})
+        
+        return slots
     
     def _extract_resy_slug(self, url: str) -> Optional[str]:
         """Extract restaurant slug from Resy URL."""
-        # URL like: https://resy.com/cities/ny/lilia
-        match = re.search(r'resy\.com/cities/\w+/([^/?]+)', url)
-        return match.group(1) if match else None
-    
-    async def _filter_new_slots(
-        self, 
-        db: Session, 
-        restaurant_id: int, 
-        slots: list[AvailableSlot]
-    ) -> list[AvailableSlot]:
-        """Filter out slots that were already found and notified."""
-        # Get recent checks for this restaurant
-        recent_checks = db.query(AvailabilityCheckModel).filter(
-            AvailabilityCheckModel.restaurant_id == restaurant_id,
-            AvailabilityCheckModel.checked_at > datetime.utcnow() - timedelta(hours=24)
-        ).all()
-        
-        # Build set of already-found slots
-        found_slots = set()
-        for check in recent_checks:
-            if check.available_slots:
-                for slot in check.available_slots:
-                    found_slots.add((slot['date'], slot['time']))
-        
-        # Filter to new slots only
-        new_slots = [
-            s for s in slots 
-            if (s.date, s.time) not in found_slots
-        ]
-        
-        return new_slots
+        return resy_slug(url)
 
 
 # Create a global scheduler instance
@@ -211,16 +463,53 @@ scheduler = AvailabilityScheduler()
 
 
 async def run_scheduler():
-    """Run the scheduler as a standalone process."""
+    """Run the scheduler as a standalone process until interrupted or terminated."""
+    setup_logging()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl-C still raises KeyboardInterrupt
+    
     await scheduler.start()
+    try:
+        await stop.wait()
+    finally:
+        await scheduler.stop()
+
+
+def run_workers(workers: int):
+    """Run one scheduler process per worker, splitting the watches by shard lease."""
+    processes = []
+    for index in range(workers):
+        env = dict(os.environ, SCHEDULER_WORKERS=str(workers), SCHEDULER_WORKER_INDEX=str(index))
+        processes.append(subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env))
     
     try:
-        # Keep the scheduler running
-        while True:
-            await asyncio.sleep(1)
+        for process in processes:
+            process.wait()
     except KeyboardInterrupt:
-        await scheduler.stop()
+        # Interrupt rather than kill so each worker releases its leases
+        for process in processes:
+            process.send_signal(signal.SIGINT)
+        for process in processes:
+            process.wait()
 
 
 if __name__ == "__main__":
-    asyncio.run(run_scheduler())
+    parser = argparse.ArgumentParser(description="Run the availability scheduler")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="number of worker processes sharing the watches (default 1)"
+    )
+    args = parser.parse_args()
+    
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        try:
+            asyncio.run(run_scheduler())
+        except KeyboardInterrupt:
+            pass
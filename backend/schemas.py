@@ -3,7 +3,7 @@ Pydantic schemas for API request/response validation.
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel, Field
 
 
@@ -39,6 +39,18 @@ class RestaurantUpdate(BaseModel):
     priority: Optional[str] = None
 
 
+class RestaurantBatchUpdateItem(RestaurantUpdate):
+    id: int
+
+
+class RestaurantBatchUpdate(BaseModel):
+    updates: List[RestaurantBatchUpdateItem] = Field(max_length=1000)
+
+
+class RestaurantBatchToggle(BaseModel):
+    ids: List[int] = Field(max_length=1000)
+
+
 class Restaurant(RestaurantBase):
     id: int
     created_at: datetime
@@ -75,6 +87,7 @@ class WatchConfigUpdate(BaseModel):
 class WatchConfig(WatchConfigBase):
     id: int
     restaurant_id: int
+    preferred_times: Optional[List[str]] = None  # None: any time
     last_checked: Optional[datetime] = None
     created_at: datetime
     
@@ -82,6 +95,16 @@ class WatchConfig(WatchConfigBase):
         from_attributes = True
 
 
+class WatchConfigBatchCreate(BaseModel):
+    items: List[WatchConfigCreate] = Field(max_length=1000)
+
+
+class WatchConfigBatchResult(BaseModel):
+    items: List[WatchConfig]
+    not_found: List[int] = Field(default_factory=list)
+    already_watched: List[int] = Field(default_factory=list)
+
+
 class AvailabilitySlot(BaseModel):
     date: str
     time: str
@@ -101,24 +124,44 @@ class AvailabilityCheck(BaseModel):
         from_attributes = True
 
 
+class AvailabilitySearchRequest(BaseModel):
+    restaurant_ids: List[int] = Field(min_length=1)
+    date: str = Field(pattern=r"^\d{4}-\d{2}-\d{2}$")
+    time: Optional[str] = Field(default=None, pattern=r"^\d{2}:\d{2}$")
+    party_size: int = Field(default=2, ge=1, le=20)
+
+
+class BatchUpdateResult(BaseModel):
+    items: List[Restaurant]
+    not_found: List[int] = Field(default_factory=list)
+
+
 class RestaurantWithWatch(Restaurant):
     watch_config: Optional[WatchConfig] = None
 
 
 class SearchFilters(BaseModel):
     query: Optional[str] = None
-    neighborhood: Optional[str] = None
-    cuisine_type: Optional[str] = None
+    neighborhood: List[str] = Field(default_factory=list)
+    cuisine_type: List[str] = Field(default_factory=list)
     visited: Optional[bool] = None
     monitor_enabled: Optional[bool] = None
+    priority: List[str] = Field(default_factory=list)
+
+
+class Facets(BaseModel):
+    neighborhoods: Dict[str, int]
+    cuisine_types: Dict[str, int]
 
 
 class PaginatedResponse(BaseModel):
     items: List[Restaurant]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     per_page: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    facets: Optional[Facets] = None
 
 
 class Stats(BaseModel):
@@ -3,11 +3,57 @@ Playwright-based scraper for checking restaurant availability on Resy and OpenTa
 """
 
 import asyncio
+import logging
+import os
 import random
+import re
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
 from dataclasses import dataclass
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeout
+from availability_cache import AvailabilityCache
+from browser_manager import BrowserManager
+from logs import SAMPLED
+from metrics import SLOW_BUCKETS, Counter, Histogram
+from playwright.async_api import (
+    Browser, Page, Response, Route,
+    Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+)
+
+# Browser pages open at once across all platforms
+SCRAPER_CONCURRENCY = int(os.environ.get("SCRAPER_CONCURRENCY", "4"))
+
+# Per-platform politeness: requests in flight, and the minimum gap (plus a
+# random jitter) between the starts of two requests to the same site
+RESY_MAX_CONCURRENCY = int(os.environ.get("RESY_MAX_CONCURRENCY", "2"))
+RESY_MIN_INTERVAL = float(os.environ.get("RESY_MIN_INTERVAL", "1.5"))
+OPENTABLE_MAX_CONCURRENCY = int(os.environ.get("OPENTABLE_MAX_CONCURRENCY", "2"))
+OPENTABLE_MIN_INTERVAL = float(os.environ.get("OPENTABLE_MIN_INTERVAL", "1.5"))
+REQUEST_JITTER = float(os.environ.get("SCRAPER_REQUEST_JITTER", "1.5"))
+
+# "network" reads the availability JSON the booking page requests (with
+# images, fonts and analytics blocked) and falls back to the rendered page;
+# "dom" always waits for the page to settle and reads the time-slot elements
+SCRAPER_FETCH_MODE = os.environ.get("SCRAPER_FETCH_MODE", "network").lower()
+
+# How long to wait for the availability response before falling back to the DOM
+NETWORK_TIMEOUT_MS = int(os.environ.get("SCRAPER_NETWORK_TIMEOUT_MS", "15000"))
+
+logger = logging.getLogger(__name__)
+
+SCRAPE_SECONDS = Histogram(
+    "scrape_duration_seconds", "Time to fetch one venue and date from a booking site",
+    ("platform", "outcome"), buckets=SLOW_BUCKETS
+)
+SLOTS_FOUND = Counter("scrape_slots_found_total", "Slots found by scrapes, before time filtering", ("platform",))
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_RE = re.compile(
+    r"google-analytics|googletagmanager|doubleclick|facebook\.net|"
+    r"segment\.(?:io|com)|hotjar|newrelic|nr-data|sentry|fullstory|optimizely"
+)
+
 
 @dataclass
 class AvailableSlot:
@@ -15,15 +61,137 @@ class AvailableSlot:
     time: str  # HH:MM
     party_size: int
     booking_url: str
+    platform: str = ""  # resy, opentable
+
+
+class PagePool:
+    """
+    Bounded pool of reusable browser pages.
+
+    At most `size` pages are checked out at once; callers beyond that wait.
+    Pages are returned warm (same renderer, cache and cookies) for the next
+    check, and a page whose check raised is closed instead of reused.
+    """
+    
+    def __init__(
+        self,
+        browser: Browser,
+        size: int = SCRAPER_CONCURRENCY,
+        setup: Optional[Callable[[Page], Awaitable[None]]] = None
+    ):
+        self.browser = browser
+        self.size = size
+        self.setup = setup
+        self.in_use = 0
+        self._idle: list[Page] = []
+        self._semaphore = asyncio.Semaphore(size)
+    
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+    
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        async with self._semaphore:
+            page = None
+            while self._idle and page is None:
+                page = self._idle.pop()
+                if page.is_closed():
+                    page = None
+            if page is None:
+                page = await self.browser.new_page()
+                if self.setup:
+                    await self.setup(page)
+            
+            self.in_use += 1
+            try:
+                yield page
+            except BaseException:
+                await page.close()
+                raise
+            else:
+                self._idle.append(page)
+            finally:
+                self.in_use -= 1
+    
+    async def close(self):
+        """Close all idle pages."""
+        pages, self._idle = self._idle, []
+        for page in pages:
+            if not page.is_closed():
+                await page.close()
+
+
+async def _filter_route(route: Route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or BLOCKED_URL_RE.search(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def block_heavy_resources(page: Page):
+    """Abort image, font and media loads and analytics requests on a page."""
+    await page.route("**/*", _filter_route)
+
+
+def filter_preferred(slots: list[AvailableSlot], preferred_times: Optional[list[str]]) -> list[AvailableSlot]:
+    """Keep the slots at one of the preferred times (all of them if None)."""
+    if preferred_times is None:
+        return slots
+    return [s for s in slots if s.time in preferred_times]
+
+
+def resy_slug(url: str) -> Optional[str]:
+    """
+    Extract the venue slug from a Resy URL, e.g.
+    https://resy.com/cities/new-york-ny/venues/lilia or https://resy.com/cities/ny/lilia.
+    """
+    match = re.search(r'resy\.com/cities/[\w-]+/(?:venues/)?([^/?#]+)', url or "")
+    return match.group(1) if match else None
+
+
+class PlatformLimiter:
+    """Caps concurrent requests to one booking site and spaces out their starts."""
+    
+    def __init__(self, max_concurrency: int, min_interval: float, jitter: float = REQUEST_JITTER):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+    
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            async with self._lock:
+                loop = asyncio.get_running_loop()
+                wait = self._next_start - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._next_start = (
+                    loop.time() + self.min_interval + random.uniform(0, self.jitter)
+                )
+            yield
 
 
 class ResyScraper:
     """Scraper for Resy availability."""
     
+    PLATFORM = "resy"
     BASE_URL = "https://resy.com"
     
-    def __init__(self, browser: Browser):
-        self.browser = browser
+    def __init__(
+        self,
+        pages: PagePool,
+        limiter: PlatformLimiter,
+        fetch_mode: str = SCRAPER_FETCH_MODE,
+        base_url: Optional[str] = None
+    ):
+        self.pages = pages
+        self.limiter = limiter
+        self.fetch_mode = fetch_mode
+        self.base_url = base_url or self.BASE_URL
     
     async def check_availability(
         self,
@@ -44,52 +212,110 @@ class ResyScraper:
         Returns:
             List of available slots
         """
-        page = await self.browser.new_page()
+        try:
+            slots = await self.fetch_slots(restaurant_slug, date, party_size)
+        except Exception as e:
+            logger.warning("Error checking Resy availability for %s: %s", restaurant_slug, e)
+            return []
+        return filter_preferred(slots, preferred_times)
+    
+    async def fetch_slots(self, restaurant_slug: str, date: str, party_size: int = 2) -> list[AvailableSlot]:
+        """Fetch every available slot for one date. Raises on scrape errors."""
+        # Construct URL with query params
+        url = f"{self.base_url}/cities/ny/{restaurant_slug}?date={date}&seats={party_size}"
+        
+        async with self.limiter.slot(), self.pages.page() as page:
+            if self.fetch_mode == "network":
+                slots = await self._fetch_from_network(page, url, date, party_size)
+                if slots is not None:
+                    return slots
+            else:
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+            return await self._scrape(page, url, date, party_size)
+    
+    async def _fetch_from_network(
+        self,
+        page: Page,
+        url: str,
+        date: str,
+        party_size: int
+    ) -> Optional[list[AvailableSlot]]:
+        """
+        Load the page and read the slots from its availability API response.
+        
+        Returns None when no usable response arrives; the page is left loaded
+        so the caller can read the slots from the DOM instead.
+        """
+        try:
+            async with page.expect_response(self._is_availability_response, timeout=NETWORK_TIMEOUT_MS) as info:
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            response = await info.value
+            return self.parse_availability(await response.json(), url, date, party_size)
+        except (PlaywrightError, ValueError, KeyError, TypeError) as e:
+            logger.info("Resy availability response unusable, reading the page instead: %s", e, extra=SAMPLED)
+            return None
+    
+    @staticmethod
+    def _is_availability_response(response: Response) -> bool:
+        return "/4/find" in response.url and response.ok
+    
+    @classmethod
+    def parse_availability(cls, data: dict, url: str, date: str, party_size: int) -> list[AvailableSlot]:
+        """Parse a Resy /4/find response (one slot per distinct start time)."""
+        available_slots = []
+        seen = set()
+        for venue in data["results"]["venues"]:
+            for slot in venue.get("slots", []):
+                # "2024-05-01 19:30:00"
+                time_24h = slot["date"]["start"][11:16]
+                if time_24h in seen:
+                    continue
+                seen.add(time_24h)
+                available_slots.append(AvailableSlot(
+                    date=date,
+                    time=time_24h,
+                    party_size=party_size,
+                    platform=cls.PLATFORM,
+                    booking_url=f"{url}&time={time_24h}"
+                ))
+        return available_slots
+    
+    async def _scrape(
+        self,
+        page: Page,
+        url: str,
+        date: str,
+        party_size: int
+    ) -> list[AvailableSlot]:
+        """Read the time slots from the loaded page."""
         available_slots = []
         
+        # Wait for availability slots to load
         try:
-            # Construct URL with query params
-            url = f"{self.BASE_URL}/cities/ny/{restaurant_slug}?date={date}&seats={party_size}"
-            
-            # Add random delay to avoid detection
-            await asyncio.sleep(random.uniform(1, 3))
-            
-            # Navigate to the page
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            
-            # Wait for availability slots to load
-            try:
-                await page.wait_for_selector('[data-test="time-slot"]', timeout=10000)
-            except PlaywrightTimeout:
-                # No slots available
-                return []
-            
-            # Find all time slots
-            slots = await page.query_selector_all('[data-test="time-slot"]')
-            
-            for slot in slots:
-                time_text = await slot.inner_text()
-                time_clean = time_text.strip()
-                
-                # Convert to 24h format
-                time_24h = self._convert_to_24h(time_clean)
-                
-                if time_24h:
-                    # Check if it matches preferred times
-                    if preferred_times is None or time_24h in preferred_times:
-                        booking_url = f"{url}&time={time_24h}"
-                        available_slots.append(AvailableSlot(
-                            date=date,
-                            time=time_24h,
-                            party_size=party_size,
-                            booking_url=booking_url
-                        ))
+            await page.wait_for_selector('[data-test="time-slot"]', timeout=10000)
+        except PlaywrightTimeout:
+            # No slots available
+            return []
         
-        except Exception as e:
-            print(f"Error checking Resy availability: {e}")
+        # Find all time slots
+        slots = await page.query_selector_all('[data-test="time-slot"]')
         
-        finally:
-            await page.close()
+        for slot in slots:
+            time_text = await slot.inner_text()
+            time_clean = time_text.strip()
+            
+            # Convert to 24h format
+            time_24h = self._convert_to_24h(time_clean)
+            
+            if time_24h:
+                booking_url = f"{url}&time={time_24h}"
+                available_slots.append(AvailableSlot(
+                    date=date,
+                    time=time_24h,
+                    party_size=party_size,
+                    platform=self.PLATFORM,
+                    booking_url=booking_url
+                ))
         
         return available_slots
     
@@ -113,10 +339,23 @@ class ResyScraper:
 class OpenTableScraper:
     """Scraper for OpenTable availability."""
     
+    PLATFORM = "opentable"
     BASE_URL = "https://www.opentable.com"
     
-    def __init__(self, browser: Browser):
-        self.browser = browser
+    # Time the search is anchored to; availability slots are offsets from it
+    SEARCH_TIME = "19:00"
+    
+    def __init__(
+        self,
+        pages: PagePool,
+        limiter: PlatformLimiter,
+        fetch_mode: str = SCRAPER_FETCH_MODE,
+        base_url: Optional[str] = None
+    ):
+        self.pages = pages
+        self.limiter = limiter
+        self.fetch_mode = fetch_mode
+        self.base_url = base_url or self.BASE_URL
     
     async def check_availability(
         self,
@@ -137,54 +376,123 @@ class OpenTableScraper:
         Returns:
             List of available slots
         """
-        page = await self.browser.new_page()
+        try:
+            slots = await self.fetch_slots(restaurant_name, date, party_size)
+        except Exception as e:
+            logger.warning("Error checking OpenTable availability for %s: %s", restaurant_name, e)
+            return []
+        return filter_preferred(slots, preferred_times)
+    
+    async def fetch_slots(self, restaurant_name: str, date: str, party_size: int = 2) -> list[AvailableSlot]:
+        """Fetch every available slot for one date. Raises on scrape errors."""
+        # Search URL
+        search_term = restaurant_name.replace(" ", "+")
+        search_time = self.SEARCH_TIME.replace(":", "%3A")
+        url = f"{self.base_url}/s?term={search_term}&covers={party_size}&dateTime={date}T{search_time}&metroId=8"
+        
+        async with self.limiter.slot(), self.pages.page() as page:
+            if self.fetch_mode == "network":
+                slots = await self._fetch_from_network(page, url, date, party_size)
+                if slots is not None:
+                    return slots
+            else:
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+            return await self._scrape(page, url, date, party_size)
+    
+    async def _fetch_from_network(
+        self,
+        page: Page,
+        url: str,
+        date: str,
+        party_size: int
+    ) -> Optional[list[AvailableSlot]]:
+        """
+        Load the search page and read the slots from its availability query.
+        
+        Returns None when no usable response arrives; the page is left loaded
+        so the caller can read the slots from the DOM instead.
+        """
+        try:
+            async with page.expect_response(self._is_availability_response, timeout=NETWORK_TIMEOUT_MS) as info:
+                await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            response = await info.value
+            return self.parse_availability(await response.json(), url, date, party_size)
+        except (PlaywrightError, ValueError, KeyError, TypeError) as e:
+            logger.info("OpenTable availability response unusable, reading the page instead: %s", e, extra=SAMPLED)
+            return None
+    
+    @staticmethod
+    def _is_availability_response(response: Response) -> bool:
+        return "/dapi/fe/gql" in response.url and "RestaurantsAvailability" in response.url and response.ok
+    
+    @classmethod
+    def parse_availability(cls, data: dict, url: str, date: str, party_size: int) -> list[AvailableSlot]:
+        """
+        Parse a RestaurantsAvailability GraphQL response.
+        
+        Only the top search result is read: that's the restaurant searched for.
+        """
+        results = data["data"]["availability"]
+        if not results:
+            return []
+        
+        anchor = datetime.strptime(f"{date} {cls.SEARCH_TIME}", "%Y-%m-%d %H:%M")
+        available_slots = []
+        for day in results[0]["availabilityDays"]:
+            if day.get("dayOffset", 0) != 0:
+                continue
+            for slot in day["slots"]:
+                if not slot.get("isAvailable"):
+                    continue
+                time_24h = (anchor + timedelta(minutes=slot["timeOffsetMinutes"])).strftime("%H:%M")
+                available_slots.append(AvailableSlot(
+                    date=date,
+                    time=time_24h,
+                    party_size=party_size,
+                    platform=cls.PLATFORM,
+                    booking_url=url
+                ))
+        return available_slots
+    
+    async def _scrape(
+        self,
+        page: Page,
+        url: str,
+        date: str,
+        party_size: int
+    ) -> list[AvailableSlot]:
+        """Read the time slots from the loaded page."""
         available_slots = []
         
+        # Look for availability buttons
         try:
-            # Search URL
-            search_term = restaurant_name.replace(" ", "+")
-            url = f"{self.BASE_URL}/s?term={search_term}&covers={party_size}&dateTime={date}T19%3A00&metroId=8"
-            
-            # Add random delay
-            await asyncio.sleep(random.uniform(1, 3))
-            
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            
-            # Look for availability buttons
+            await page.wait_for_selector('[data-test="times-702"]', timeout=10000)
+        except PlaywrightTimeout:
+            # Try alternative selector
             try:
-                await page.wait_for_selector('[data-test="times-702"]', timeout=10000)
+                await page.wait_for_selector('.timeSlot', timeout=5000)
             except PlaywrightTimeout:
-                # Try alternative selector
-                try:
-                    await page.wait_for_selector('.timeSlot', timeout=5000)
-                except PlaywrightTimeout:
-                    return []
-            
-            # Find all time slots
-            slots = await page.query_selector_all('.timeSlot, [data-test^="time-"]')
-            
-            for slot in slots:
-                time_text = await slot.inner_text()
-                time_clean = time_text.strip()
-                time_24h = self._convert_to_24h(time_clean)
-                
-                if time_24h:
-                    if preferred_times is None or time_24h in preferred_times:
-                        href = await slot.get_attribute('href')
-                        booking_url = href if href else url
-                        
-                        available_slots.append(AvailableSlot(
-                            date=date,
-                            time=time_24h,
-                            party_size=party_size,
-                            booking_url=booking_url
-                        ))
+                return []
         
-        except Exception as e:
-            print(f"Error checking OpenTable availability: {e}")
+        # Find all time slots
+        slots = await page.query_selector_all('.timeSlot, [data-test^="time-"]')
         
-        finally:
-            await page.close()
+        for slot in slots:
+            time_text = await slot.inner_text()
+            time_clean = time_text.strip()
+            time_24h = self._convert_to_24h(time_clean)
+            
+            if time_24h:
+                href = await slot.get_attribute('href')
+                booking_url = href if href else url
+                
+                available_slots.append(AvailableSlot(
+                    date=date,
+                    time=time_24h,
+                    party_size=party_size,
+                    platform=self.PLATFORM,
+                    booking_url=booking_url
+                ))
         
         return available_slots
     
@@ -204,27 +512,37 @@ class AvailabilityChecker:
     """Main class for checking availability across platforms."""
     
     def __init__(self):
-        self.browser: Optional[Browser] = None
+        self.browsers: Optional[BrowserManager] = None
+        self.cache = AvailabilityCache()
         self.resy_scraper: Optional[ResyScraper] = None
         self.opentable_scraper: Optional[OpenTableScraper] = None
     
     async def start(self):
-        """Initialize the browser and scrapers."""
-        playwright = await async_playwright().start()
-        self.browser = await playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--no-sandbox',
-            ]
+        """Initialize the browser and scrapers (no-op if already started)."""
+        if self.browsers is not None:
+            return
+        # Warm contexts per platform, recycled and restarted as needed
+        browsers = BrowserManager(
+            size=SCRAPER_CONCURRENCY,
+            setup=block_heavy_resources if SCRAPER_FETCH_MODE == "network" else None
+        )
+        # Only kept once it started; a failed start has stopped its own driver
+        await browsers.start()
+        self.browsers = browsers
+        self.resy_scraper = ResyScraper(
+            self.browsers.pages(ResyScraper.PLATFORM),
+            PlatformLimiter(RESY_MAX_CONCURRENCY, RESY_MIN_INTERVAL)
+        )
+        self.opentable_scraper = OpenTableScraper(
+            self.browsers.pages(OpenTableScraper.PLATFORM),
+            PlatformLimiter(OPENTABLE_MAX_CONCURRENCY, OPENTABLE_MIN_INTERVAL)
         )
-        self.resy_scraper = ResyScraper(self.browser)
-        self.opentable_scraper = OpenTableScraper(self.browser)
     
     async def stop(self):
-        """Close the browser."""
-        if self.browser:
-            await self.browser.close()
+        """Close the browser and stop Playwright."""
+        if self.browsers:
+            await self.browsers.stop()
+            self.browsers = None
     
     async def check_resy(
         self,
@@ -233,19 +551,10 @@ class AvailabilityChecker:
         party_size: int = 2,
         preferred_times: list[str] = None
     ) -> list[AvailableSlot]:
-        """Check Resy availability for multiple dates."""
-        all_slots = []
-        
-        for date in dates:
-            slots = await self.resy_scraper.check_availability(
-                restaurant_slug, date, party_size, preferred_times
-            )
-            all_slots.extend(slots)
-            
-            # Random delay between requests
-            await asyncio.sleep(random.uniform(2, 5))
-        
-        return all_slots
+        """Check Resy availability for multiple dates concurrently."""
+        return await self._check_dates(
+            "resy", self.resy_scraper, restaurant_slug, dates, party_size, preferred_times
+        )
     
     async def check_opentable(
         self,
@@ -254,18 +563,73 @@ class AvailabilityChecker:
         party_size: int = 2,
         preferred_times: list[str] = None
     ) -> list[AvailableSlot]:
-        """Check OpenTable availability for multiple dates."""
-        all_slots = []
-        
+        """Check OpenTable availability for multiple dates concurrently."""
+        return await self._check_dates(
+            "opentable", self.opentable_scraper, restaurant_name, dates, party_size, preferred_times
+        )
+    
+    async def _check_dates(
+        self,
+        platform: str,
+        scraper,
+        venue: str,
+        dates: list[str],
+        party_size: int,
+        preferred_times: Optional[list[str]]
+    ) -> list[AvailableSlot]:
+        # The cache holds every slot for a (platform, venue, date, party size),
+        # so watches with different preferred times share one fetch
+        results = await asyncio.gather(*(
+            self._cached_slots(platform, scraper, venue, date, party_size)
+            for date in dates
+        ))
+        return filter_preferred([slot for slots in results for slot in slots], preferred_times)
+    
+    def cached_slots(
+        self,
+        platform: str,
+        venue: str,
+        dates: list[str],
+        party_size: int = 2,
+        preferred_times: list[str] = None
+    ) -> Optional[list[AvailableSlot]]:
+        """What check_resy/check_opentable would return from the cache alone, or None on any miss."""
+        slots = []
         for date in dates:
-            slots = await self.opentable_scraper.check_availability(
-                restaurant_name, date, party_size, preferred_times
-            )
-            all_slots.extend(slots)
-            
-            await asyncio.sleep(random.uniform(2, 5))
+            cached = self.cache.get((platform, venue, date, party_size))
+            if cached is None:
+                return None
+            slots.extend(cached)
+        return filter_preferred(slots, preferred_times)
+    
+    async def _cached_slots(
+        self,
+        platform: str,
+        scraper,
+        venue: str,
+        date: str,
+        party_size: int
+    ) -> list[AvailableSlot]:
+        async def fetch() -> list[AvailableSlot]:
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                slots = await scraper.fetch_slots(venue, date, party_size)
+                outcome = "ok"
+                SLOTS_FOUND.inc(platform, amount=len(slots))
+                return slots
+            finally:
+                SCRAPE_SECONDS.observe(time.perf_counter() - started, platform, outcome)
         
-        return all_slots
+        try:
+            return await self.cache.get_or_fetch((platform, venue, date, party_size), fetch)
+        except Exception as e:
+            # Failures aren't cached, so the next check retries
+            logger.warning(
+                "Error checking %s availability for %s on %s: %s", platform, venue, date, e,
+                extra={"platform": platform, "venue": venue, "date": date}
+            )
+            return []
     
     def generate_date_range(self, start: str, end: str) -> list[str]:
         """Generate list of dates between start and end."""
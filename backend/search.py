@@ -0,0 +1,179 @@
+"""
+Full-text search index for restaurants.
+
+On SQLite the index is an external-content FTS5 table kept in sync with
+``restaurants`` by triggers. On Postgres it is a generated ``tsvector``
+column with a GIN index, which the database maintains by itself. Any other
+backend (or a SQLite build without FTS5) falls back to ILIKE scans.
+"""
+
+import logging
+import re
+from typing import Optional
+from sqlalchemy import Float, Integer, func, literal_column, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select
+
+from models import Restaurant as RestaurantModel, engine
+
+FTS_TABLE = "restaurants_fts"
+
+# Column weights used for ranking: a hit in the name beats a hit in the notes
+NAME_WEIGHT = 10.0
+NOTES_WEIGHT = 1.0
+NEIGHBORHOOD_WEIGHT = 4.0
+CUISINE_WEIGHT = 4.0
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SETUP = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, notes, neighborhood, cuisine_type,
+        content='restaurants', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON restaurants BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, notes, neighborhood, cuisine_type)
+        VALUES (new.id, new.name, new.notes, new.neighborhood, new.cuisine_type);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON restaurants BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, notes, neighborhood, cuisine_type)
+        VALUES ('delete', old.id, old.name, old.notes, old.neighborhood, old.cuisine_type);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, notes, neighborhood, cuisine_type ON restaurants BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, notes, neighborhood, cuisine_type)
+        VALUES ('delete', old.id, old.name, old.notes, old.neighborhood, old.cuisine_type);
+        INSERT INTO {FTS_TABLE}(rowid, name, notes, neighborhood, cuisine_type)
+        VALUES (new.id, new.name, new.notes, new.neighborhood, new.cuisine_type);
+    END
+    """,
+]
+
+POSTGRES_SETUP = [
+    """
+    ALTER TABLE restaurants ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(neighborhood, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(cuisine_type, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_restaurants_search_vector
+    ON restaurants USING GIN (search_vector)
+    """,
+]
+
+# Backend chosen by init_search_index(): "fts5", "tsvector" or None (ILIKE)
+search_backend: Optional[str] = None
+
+
+def init_search_index(bind: Engine = engine) -> Optional[str]:
+    """
+    Create the search index for the given engine if it doesn't exist yet.
+
+    Returns the search backend in use so callers can pass it to apply_search.
+    """
+    global search_backend
+
+    dialect = bind.dialect.name
+    backend = None
+
+    if dialect == "sqlite":
+        with bind.begin() as conn:
+            existed = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            ).first() is not None
+            try:
+                for statement in SQLITE_SETUP:
+                    conn.execute(text(statement))
+            except Exception as e:
+                logger.warning("FTS5 unavailable, falling back to ILIKE search: %s", e)
+            else:
+                if not existed:
+                    # Index rows that were inserted before the triggers existed
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                backend = "fts5"
+
+    elif dialect == "postgresql":
+        with bind.begin() as conn:
+            for statement in POSTGRES_SETUP:
+                conn.execute(text(statement))
+        backend = "tsvector"
+
+    search_backend = backend
+    return backend
+
+
+def tokenize(query: str) -> list[str]:
+    """Split a user query into lowercase word tokens."""
+    return [t.lower() for t in TOKEN_RE.findall(query)]
+
+
+def build_fts5_query(tokens: list[str]) -> str:
+    """Build an FTS5 MATCH expression: every token must match as a prefix."""
+    return " AND ".join(f'"{t}"*' for t in tokens)
+
+
+def build_tsquery(tokens: list[str]) -> str:
+    """Build a to_tsquery expression: every token must match as a prefix."""
+    return " & ".join(f"{t}:*" for t in tokens)
+
+
+def ilike_filter(q: Select, query: str) -> Select:
+    """Substring match across the searchable columns (unindexed fallback)."""
+    search = f"%{query}%"
+    return q.filter(
+        or_(
+            RestaurantModel.name.ilike(search),
+            RestaurantModel.notes.ilike(search),
+            RestaurantModel.neighborhood.ilike(search),
+            RestaurantModel.cuisine_type.ilike(search)
+        )
+    )
+
+
+def apply_search(q: Select, query: str, backend: Optional[str] = None) -> tuple[Select, Optional[object]]:
+    """
+    Restrict a restaurant query to rows matching the search text.
+
+    Returns the filtered query and a rank expression (lower sorts first), or
+    None for the rank when the ILIKE fallback was used.
+    """
+    if backend is None:
+        backend = search_backend
+
+    tokens = tokenize(query)
+    if not tokens or backend is None:
+        return ilike_filter(q, query), None
+
+    if backend == "fts5":
+        matches = text(
+            f"SELECT rowid AS restaurant_id, "
+            f"bm25({FTS_TABLE}, {NAME_WEIGHT}, {NOTES_WEIGHT}, "
+            f"{NEIGHBORHOOD_WEIGHT}, {CUISINE_WEIGHT}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+        ).bindparams(match=build_fts5_query(tokens)).columns(
+            restaurant_id=Integer, rank=Float
+        ).subquery("search_matches")
+        q = q.join(matches, matches.c.restaurant_id == RestaurantModel.id)
+        return q, matches.c.rank
+
+    # Postgres: ts_rank is "higher is better", so negate it for ascending sorts
+    tsquery = func.to_tsquery("simple", build_tsquery(tokens))
+    vector = literal_column("restaurants.search_vector")
+    q = q.filter(vector.op("@@")(tsquery))
+    return q, -func.ts_rank(vector, tsquery)
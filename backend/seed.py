@@ -0,0 +1,227 @@
+"""
+Streaming seed loader for the restaurants table.
+
+Reads the seed JSON array one element at a time and inserts it in batches
+(executemany, or COPY on Postgres), so memory stays flat however large the
+seed file is. The whole load runs in one transaction: a failed seed leaves
+the table empty and is retried on the next startup.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection, Engine
+
+from models import Restaurant as RestaurantModel, engine
+
+SEED_PATH = Path(__file__).parent / "data" / "restaurants.json"
+SEED_BATCH_SIZE = int(os.environ.get("SEED_BATCH_SIZE", "1000"))
+SEED_IN_BACKGROUND = os.environ.get("SEED_IN_BACKGROUND", "").lower() in ("1", "true", "yes")
+
+READ_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+NUMBER_CHARS = "0123456789+-.eE"
+# A decode error further than this before the end of the buffer can't be
+# fixed by reading more (longest token: "-Infinity"), unless it's a string
+# that hasn't been closed yet
+TOKEN_LOOKAHEAD = 10
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = [
+    "name", "visited", "notes", "neighborhood", "cuisine_type", "booking_urls",
+    "monitor_enabled", "priority", "created_at", "updated_at",
+]
+
+
+class SeedStatus:
+    """Progress of the current seed run, reported by /api/health."""
+
+    def __init__(self):
+        self.state = "idle"  # idle, seeding, done, failed
+        self.loaded = 0
+        self.error: Optional[str] = None
+
+
+seed_status = SeedStatus()
+
+
+def iter_json_array(f: TextIO, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        chunk = f.read(read_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def next_char() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    if next_char() != "[":
+        raise ValueError("Seed file must contain a JSON array")
+    pos += 1
+
+    if next_char() == "]":
+        return
+
+    while True:
+        if next_char() is None:
+            raise ValueError("Unexpected end of seed file")
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            cut_off = "Unterminated string" in e.msg or len(buf) - e.pos < TOKEN_LOOKAHEAD
+            if eof or not cut_off:
+                raise ValueError(f"Invalid seed file: {e.msg}") from e
+            # The element continues past the buffer; read more and retry
+            fill()
+            continue
+        if not eof and buf[pos] in NUMBER_CHARS and not buf[end:].lstrip(NUMBER_CHARS):
+            # A number that reaches the end of the buffer may go on in the next read
+            fill()
+            continue
+
+        pos = end
+        yield value
+
+        separator = next_char()
+        if separator == ",":
+            pos += 1
+        elif separator == "]":
+            return
+        elif separator is None:
+            raise ValueError("Unexpected end of seed file")
+        else:
+            raise ValueError(f"Expected ',' or ']' in seed file, got {separator!r}")
+
+
+def restaurant_row(r: dict, now: datetime) -> dict:
+    """Map a seed record to a restaurants row."""
+    return {
+        "name": r["name"],
+        "visited": r.get("visited", False),
+        "notes": r.get("notes", ""),
+        "neighborhood": r.get("neighborhood"),
+        "cuisine_type": r.get("cuisine_type"),
+        "booking_urls": r.get("booking_urls", {}),
+        "monitor_enabled": r.get("monitor_enabled", False),
+        "priority": r.get("priority", "normal"),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def _insert_batch(conn: Connection, rows: list[dict]):
+    conn.execute(insert(RestaurantModel.__table__), rows)
+
+
+def _copy_batch(conn: Connection, rows: list[dict]):
+    """Load a batch with Postgres COPY, which skips per-row statement overhead."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        values = []
+        for column in COLUMNS:
+            value = row[column]
+            if column == "booking_urls":
+                value = json.dumps(value)
+            values.append("\\N" if value is None else value)
+        writer.writerow(values)
+    buf.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY restaurants ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buf
+        )
+    finally:
+        cursor.close()
+
+
+def seed_restaurants(
+    path: Path = SEED_PATH,
+    bind: Engine = engine,
+    batch_size: int = SEED_BATCH_SIZE
+) -> int:
+    """Stream the seed file into the restaurants table. Returns rows loaded."""
+    write_batch = _copy_batch if bind.dialect.name == "postgresql" else _insert_batch
+    now = datetime.utcnow()
+    loaded = 0
+
+    with open(path, encoding="utf-8") as f, bind.begin() as conn:
+        batch = []
+        for record in iter_json_array(f):
+            batch.append(restaurant_row(record, now))
+            if len(batch) >= batch_size:
+                write_batch(conn, batch)
+                loaded += len(batch)
+                seed_status.loaded = loaded
+                batch = []
+        if batch:
+            write_batch(conn, batch)
+            loaded += len(batch)
+            seed_status.loaded = loaded
+
+    return loaded
+
+
+def run_seed(path: Path = SEED_PATH, on_complete=None):
+    """Seed the database, tracking progress in seed_status."""
+    if not path.exists():
+        logger.warning("Seed data %s not found", path)
+        return
+
+    seed_status.state = "seeding"
+    seed_status.loaded = 0
+    seed_status.error = None
+    try:
+        loaded = seed_restaurants(path)
+    except Exception as e:
+        seed_status.state = "failed"
+        seed_status.error = str(e)
+        logger.exception("Error loading seed data")
+        return
+
+    seed_status.state = "done"
+    logger.info("Loaded %s restaurants into database", loaded)
+    if on_complete:
+        on_complete()
+
+
+def start_background_seed(path: Path = SEED_PATH, on_complete=None) -> threading.Thread:
+    """Run the seed in a daemon thread so startup doesn't wait for it."""
+    seed_status.state = "seeding"
+    thread = threading.Thread(
+        target=run_seed,
+        args=(path, on_complete),
+        name="seed-loader",
+        daemon=True
+    )
+    thread.start()
+    return thread
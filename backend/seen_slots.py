@@ -0,0 +1,152 @@
+"""
+Deduplication of scraped slots against the seen_slots table.
+
+A slot is new if (restaurant, platform, date, time, party size) wasn't seen
+within the retention window. Recording is one INSERT ... ON CONFLICT against
+the table's unique key: existing live rows are left alone, and rows past
+retention are refreshed (so they count as new again even before the prune
+job has removed them). RETURNING tells which slots were new.
+
+The table starts empty on upgrade, so the slots recorded in AvailabilityCheck
+rows within retention are copied in before the first cycle (see
+backfill_seen_slots()); otherwise they would all be notified again.
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import AvailabilityCheck as AvailabilityCheckModel, SeenSlot as SeenSlotModel
+from scraper import AvailableSlot, OpenTableScraper, ResyScraper
+
+SEEN_SLOT_RETENTION_HOURS = float(os.environ.get("SEEN_SLOT_RETENTION_HOURS", "24"))
+SEEN_SLOT_PRUNE_MINUTES = int(os.environ.get("SEEN_SLOT_PRUNE_MINUTES", "60"))
+
+KEY_COLUMNS = ["restaurant_id", "platform", "date", "time", "party_size"]
+
+
+def slot_key(slot: AvailableSlot) -> tuple:
+    """Identity of a slot within one restaurant."""
+    return (slot.platform, slot.date, slot.time, slot.party_size)
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> datetime:
+    return (now or datetime.utcnow()) - timedelta(hours=SEEN_SLOT_RETENTION_HOURS)
+
+
+def recent_slot_keys(db: Session, restaurant_ids: Iterable[int], now: Optional[datetime] = None) -> dict[int, set]:
+    """Slot keys seen within retention, per restaurant, in one indexed query."""
+    keys: dict[int, set] = {}
+    restaurant_ids = set(restaurant_ids)
+    if not restaurant_ids:
+        return keys
+
+    rows = db.execute(
+        select(
+            SeenSlotModel.restaurant_id, SeenSlotModel.platform, SeenSlotModel.date,
+            SeenSlotModel.time, SeenSlotModel.party_size
+        ).where(
+            SeenSlotModel.restaurant_id.in_(restaurant_ids),
+            SeenSlotModel.first_seen_at > retention_cutoff(now)
+        )
+    )
+    for restaurant_id, *key in rows:
+        keys.setdefault(restaurant_id, set()).add(tuple(key))
+    return keys
+
+
+def record_new_slots(
+    db: Session,
+    restaurant_id: int,
+    slots: list[AvailableSlot],
+    now: Optional[datetime] = None
+) -> list[AvailableSlot]:
+    """Record slots as seen and return the ones that weren't seen within retention."""
+    now = now or datetime.utcnow()
+    rows = {}
+    for slot in slots:
+        rows.setdefault(slot_key(slot), {
+            "restaurant_id": restaurant_id,
+            "platform": slot.platform,
+            "date": slot.date,
+            "time": slot.time,
+            "party_size": slot.party_size,
+            "first_seen_at": now,
+        })
+    if not rows:
+        return []
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    table = SeenSlotModel.__table__
+    stmt = dialect.insert(table).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=KEY_COLUMNS,
+        set_={"first_seen_at": stmt.excluded.first_seen_at},
+        where=table.c.first_seen_at <= retention_cutoff(now)
+    ).returning(table.c.platform, table.c.date, table.c.time, table.c.party_size)
+
+    new_keys = {tuple(row) for row in db.execute(stmt)}
+    new_slots = []
+    for slot in slots:
+        key = slot_key(slot)
+        if key in new_keys:
+            new_slots.append(slot)
+            new_keys.discard(key)
+    return new_slots
+
+
+def booking_platform(booking_url: Optional[str]) -> Optional[str]:
+    """The platform a stored booking URL points at, or None if it's not recognised."""
+    url = (booking_url or "").lower()
+    for scraper in (ResyScraper, OpenTableScraper):
+        if scraper.PLATFORM in url:
+            return scraper.PLATFORM
+    return None
+
+
+def backfill_seen_slots(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Fill an empty seen_slots table from the AvailabilityCheck rows within retention.
+
+    Each slot keeps the time of the first check that found it. Slots whose
+    platform can't be told from their booking URL are skipped. Does nothing
+    once the table has rows. Returns the number of slots added.
+    """
+    if db.execute(select(SeenSlotModel.id).limit(1)).first() is not None:
+        return 0
+
+    checks = db.execute(
+        select(
+            AvailabilityCheckModel.restaurant_id, AvailabilityCheckModel.checked_at,
+            AvailabilityCheckModel.available_slots
+        ).where(
+            AvailabilityCheckModel.checked_at > retention_cutoff(now)
+        ).order_by(AvailabilityCheckModel.checked_at)
+    )
+    rows = {}
+    for restaurant_id, checked_at, slots in checks:
+        for slot in slots or []:
+            platform = booking_platform(slot.get("booking_url"))
+            if platform is None:
+                continue
+            key = (restaurant_id, platform, slot["date"], slot["time"], slot["party_size"])
+            rows.setdefault(key, dict(zip(KEY_COLUMNS, key), first_seen_at=checked_at))
+    if not rows:
+        return 0
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    # Another worker may be backfilling at the same time
+    stmt = dialect.insert(SeenSlotModel.__table__).on_conflict_do_nothing(index_elements=KEY_COLUMNS)
+    db.execute(stmt, list(rows.values()))
+    return len(rows)
+
+
+def prune_seen_slots(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete seen slots past retention. Returns the number removed."""
+    result = db.execute(
+        delete(SeenSlotModel).where(SeenSlotModel.first_seen_at <= retention_cutoff(now))
+    )
+    return result.rowcount
@@ -0,0 +1,124 @@
+"""
+Shard leases for running several scheduler workers against one database.
+
+Watch configs are split into SCHEDULER_SHARDS shards by id. Worker i of
+SCHEDULER_WORKERS is the home owner of every shard s with
+s % SCHEDULER_WORKERS == i. Ownership is a lease row renewed on every
+heartbeat, and claims are conditional UPDATEs, so two workers can't both
+win the same shard. When a worker dies its leases expire and the survivors
+adopt its shards, one per heartbeat each so the load spreads. A restarted
+worker takes its home shards back. New shard rows start with an unowned
+lease, so the home worker gets one lease period to show up before others
+adopt them.
+"""
+
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import ShardLease as ShardLeaseModel
+
+SCHEDULER_WORKERS = int(os.environ.get("SCHEDULER_WORKERS", "1"))
+SCHEDULER_WORKER_INDEX = int(os.environ.get("SCHEDULER_WORKER_INDEX", "0"))
+SCHEDULER_SHARDS = int(os.environ.get("SCHEDULER_SHARDS", "16"))
+SHARD_LEASE_SECONDS = float(os.environ.get("SHARD_LEASE_SECONDS", "60"))
+
+
+def shard_filter(id_column, shards: set[int], shard_count: int = SCHEDULER_SHARDS):
+    """SQL condition selecting rows whose id falls in the given shards."""
+    return (id_column % shard_count).in_(shards)
+
+
+class ShardLeaser:
+    """Claims and renews this worker's shard leases."""
+
+    def __init__(
+        self,
+        worker_index: int = SCHEDULER_WORKER_INDEX,
+        workers: int = SCHEDULER_WORKERS,
+        shards: int = SCHEDULER_SHARDS,
+        lease_seconds: float = SHARD_LEASE_SECONDS,
+        worker_id: Optional[str] = None
+    ):
+        if not 0 <= worker_index < workers:
+            raise ValueError(f"Worker index {worker_index} out of range for {workers} workers")
+        self.worker_index = worker_index
+        self.workers = workers
+        self.shards = shards
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{worker_index}"
+        self.owned: set[int] = set()
+        self._rows_ready = False
+
+    def is_home(self, shard: int) -> bool:
+        return shard % self.workers == self.worker_index
+
+    def _ensure_rows(self, db: Session, expires_at: datetime):
+        if self._rows_ready:
+            return
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        db.execute(
+            dialect.insert(ShardLeaseModel.__table__)
+            .values([{"shard": s, "expires_at": expires_at} for s in range(self.shards)])
+            .on_conflict_do_nothing(index_elements=["shard"])
+        )
+        self._rows_ready = True
+
+    def _claim(self, db: Session, shard: int, expires_at: datetime, condition) -> bool:
+        result = db.execute(
+            update(ShardLeaseModel)
+            .where(ShardLeaseModel.shard == shard, condition)
+            .values(owner=self.worker_id, owner_index=self.worker_index, expires_at=expires_at)
+        )
+        return result.rowcount == 1
+
+    def heartbeat(self, db: Session, now: Optional[datetime] = None) -> set[int]:
+        """Renew, reclaim and adopt leases; returns the shards this worker owns."""
+        now = now or datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        lease = ShardLeaseModel
+        self._ensure_rows(db, expires_at)
+
+        # Renew everything still ours
+        db.execute(
+            update(lease)
+            .where(lease.owner == self.worker_id, lease.expires_at > now)
+            .values(expires_at=expires_at)
+        )
+
+        rows = db.execute(select(lease.shard, lease.owner, lease.expires_at)).all()
+        adopted = False
+        for shard, owner, lease_expires in rows:
+            if owner == self.worker_id and lease_expires is not None and lease_expires > now:
+                continue
+            if self.is_home(shard):
+                # Home shards are ours even if another worker adopted them
+                self._claim(db, shard, expires_at, or_(
+                    lease.owner.is_(None), lease.owner != self.worker_id,
+                    lease.expires_at.is_(None), lease.expires_at <= now
+                ))
+            elif not adopted and (lease_expires is None or lease_expires <= now):
+                # Orphaned shard of a dead or stopped worker
+                adopted = self._claim(db, shard, expires_at, or_(
+                    lease.expires_at.is_(None), lease.expires_at <= now
+                ))
+
+        self.owned = set(db.execute(
+            select(lease.shard).where(lease.owner == self.worker_id, lease.expires_at > now)
+        ).scalars())
+        db.commit()
+        return self.owned
+
+    def release(self, db: Session):
+        """Give up all leases so other workers can take them right away."""
+        db.execute(
+            update(ShardLeaseModel)
+            .where(ShardLeaseModel.owner == self.worker_id)
+            .values(owner=None, owner_index=None, expires_at=datetime.utcnow())
+        )
+        db.commit()
+        self.owned = set()
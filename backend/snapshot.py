@@ -0,0 +1,395 @@
+"""
+In-process columnar snapshot of the restaurants table.
+
+When enabled (RESTAURANT_SNAPSHOT=1), list and lookup requests are answered
+from memory instead of building ORM objects per request. Rows are stored in
+(name, id) order as parallel columns: neighborhood, cuisine and priority are
+interned into small integer codes, and every filterable value has a bitset
+(a Python int, bit N = row N) so filters and facet counts are a handful of
+AND/OR/popcount operations. The write endpoints patch the snapshot in place.
+
+The snapshot only sees writes made through this process, so leave it off if
+other processes modify restaurants.
+"""
+
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Restaurant as RestaurantModel
+from pagination import decode_cursor, encode_cursor
+from schemas import Facets, PaginatedResponse
+from listing import ListingRequest
+
+SNAPSHOT_ENABLED = os.environ.get("RESTAURANT_SNAPSHOT", "").lower() in ("1", "true", "yes")
+
+# Bits enumerated per step when walking a bitset
+WINDOW_BITS = 4096
+WINDOW_MASK = (1 << WINDOW_BITS) - 1
+
+
+class _Interner:
+    """Maps repeated strings to small integer codes; code 0 is None."""
+
+    def __init__(self):
+        self.values: list[Optional[str]] = [None]
+        self.codes: dict[Optional[str], int] = {None: 0}
+
+    def code(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+def _mask_from_positions(positions: list[int], size: int) -> int:
+    """Build a bitset from a list of row positions in O(size)."""
+    bits = bytearray((size + 7) // 8)
+    for pos in positions:
+        bits[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _insert_bit(mask: int, pos: int) -> int:
+    """Open a zero bit at `pos`, shifting higher bits up by one."""
+    low = mask & ((1 << pos) - 1)
+    return low | ((mask >> pos) << (pos + 1))
+
+
+def _remove_bit(mask: int, pos: int) -> int:
+    """Drop the bit at `pos`, shifting higher bits down by one."""
+    low = mask & ((1 << pos) - 1)
+    return low | ((mask >> (pos + 1)) << pos)
+
+
+def _iter_set_bits(mask: int, start: int = 0) -> Iterator[int]:
+    """Yield the positions of set bits at or after `start`, in order."""
+    remaining = mask >> start
+    base = start
+    while remaining:
+        window = remaining & WINDOW_MASK
+        if not window:
+            # Jump straight to the next set bit instead of scanning zeros
+            skip = (remaining & -remaining).bit_length() - 1
+            remaining >>= skip
+            base += skip
+            continue
+        while window:
+            lowest = window & -window
+            yield base + lowest.bit_length() - 1
+            window ^= lowest
+        remaining >>= WINDOW_BITS
+        base += WINDOW_BITS
+
+
+def _nth_set_bit(mask: int, n: int) -> Optional[int]:
+    """Position of the n-th (0-based) set bit, or None if there are fewer."""
+    if mask.bit_count() <= n:
+        return None
+    lo, hi = 0, mask.bit_length()
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if (mask & ((1 << mid) - 1)).bit_count() > n:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo - 1
+
+
+class RestaurantSnapshot:
+    """Array-backed read replica of the restaurants table."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self._keys: list[tuple[str, int]] = []
+        self._by_id: dict[int, tuple[str, int]] = {}
+        self._notes: list[str] = []
+        self._booking_urls: list[dict] = []
+        self._created_at: list = []
+        self._updated_at: list = []
+        self._neighborhood = array("I")
+        self._cuisine = array("I")
+        self._priority = array("I")
+        self._visited_col = bytearray()
+        self._monitored_col = bytearray()
+
+        self._neighborhoods = _Interner()
+        self._cuisines = _Interner()
+        self._priorities = _Interner()
+
+        self._visited = 0
+        self._monitored = 0
+        self._neighborhood_masks: dict[int, int] = {}
+        self._cuisine_masks: dict[int, int] = {}
+        self._priority_masks: dict[int, int] = {}
+
+    def load(self, db: Session):
+        """(Re)build the snapshot from the database and start serving from it."""
+        table = RestaurantModel.__table__
+        rows = db.execute(select(table).order_by(table.c.name, table.c.id)).all()
+
+        with self._lock:
+            self._reset()
+            positions = {
+                "visited": [], "monitored": [],
+                "neighborhood": {}, "cuisine": {}, "priority": {},
+            }
+            for pos, r in enumerate(rows):
+                key = (r.name, r.id)
+                self._keys.append(key)
+                self._by_id[r.id] = key
+                self._notes.append(r.notes)
+                self._booking_urls.append(r.booking_urls)
+                self._created_at.append(r.created_at)
+                self._updated_at.append(r.updated_at)
+                self._visited_col.append(bool(r.visited))
+                self._monitored_col.append(bool(r.monitor_enabled))
+
+                codes = (
+                    ("neighborhood", self._neighborhood, self._neighborhoods.code(r.neighborhood)),
+                    ("cuisine", self._cuisine, self._cuisines.code(r.cuisine_type)),
+                    ("priority", self._priority, self._priorities.code(r.priority)),
+                )
+                for family, column, code in codes:
+                    column.append(code)
+                    positions[family].setdefault(code, []).append(pos)
+                if r.visited:
+                    positions["visited"].append(pos)
+                if r.monitor_enabled:
+                    positions["monitored"].append(pos)
+
+            size = len(self._keys)
+            self._visited = _mask_from_positions(positions["visited"], size)
+            self._monitored = _mask_from_positions(positions["monitored"], size)
+            self._neighborhood_masks = {
+                code: _mask_from_positions(p, size) for code, p in positions["neighborhood"].items()
+            }
+            self._cuisine_masks = {
+                code: _mask_from_positions(p, size) for code, p in positions["cuisine"].items()
+            }
+            self._priority_masks = {
+                code: _mask_from_positions(p, size) for code, p in positions["priority"].items()
+            }
+            self.ready = True
+
+    # -- writes ---------------------------------------------------------
+
+    def upsert(self, restaurant: RestaurantModel):
+        """Apply an inserted or updated restaurant row."""
+        if not self.ready:
+            return
+        with self._lock:
+            new_key = (restaurant.name, restaurant.id)
+            old_key = self._by_id.get(restaurant.id)
+
+            if old_key == new_key:
+                pos = bisect_left(self._keys, new_key)
+                self._set_bits(pos, 0)
+                self._fill(pos, restaurant)
+                return
+
+            if old_key is not None:
+                self._delete(bisect_left(self._keys, old_key))
+            self._insert(bisect_left(self._keys, new_key), restaurant)
+
+    def remove(self, restaurant_id: int):
+        """Drop a deleted restaurant."""
+        if not self.ready:
+            return
+        with self._lock:
+            key = self._by_id.pop(restaurant_id, None)
+            if key is not None:
+                self._delete(bisect_left(self._keys, key))
+
+    def _insert(self, pos: int, restaurant: RestaurantModel):
+        key = (restaurant.name, restaurant.id)
+        self._keys.insert(pos, key)
+        self._by_id[restaurant.id] = key
+        for column in (self._notes, self._booking_urls, self._created_at, self._updated_at):
+            column.insert(pos, None)
+        for column in (self._neighborhood, self._cuisine, self._priority):
+            column.insert(pos, 0)
+        self._visited_col.insert(pos, 0)
+        self._monitored_col.insert(pos, 0)
+        self._shift_masks(lambda mask: _insert_bit(mask, pos))
+        self._fill(pos, restaurant)
+
+    def _delete(self, pos: int):
+        del self._keys[pos]
+        for column in (
+            self._notes, self._booking_urls, self._created_at, self._updated_at,
+            self._neighborhood, self._cuisine, self._priority,
+            self._visited_col, self._monitored_col,
+        ):
+            del column[pos]
+        self._shift_masks(lambda mask: _remove_bit(mask, pos))
+
+    def _shift_masks(self, shift):
+        self._visited = shift(self._visited)
+        self._monitored = shift(self._monitored)
+        for masks in (self._neighborhood_masks, self._cuisine_masks, self._priority_masks):
+            for code in masks:
+                masks[code] = shift(masks[code])
+
+    def _fill(self, pos: int, restaurant: RestaurantModel):
+        """Write a row's columns at `pos` and set its bits."""
+        self._notes[pos] = restaurant.notes
+        self._booking_urls[pos] = restaurant.booking_urls
+        self._created_at[pos] = restaurant.created_at
+        self._updated_at[pos] = restaurant.updated_at
+        self._neighborhood[pos] = self._neighborhoods.code(restaurant.neighborhood)
+        self._cuisine[pos] = self._cuisines.code(restaurant.cuisine_type)
+        self._priority[pos] = self._priorities.code(restaurant.priority)
+        self._visited_col[pos] = bool(restaurant.visited)
+        self._monitored_col[pos] = bool(restaurant.monitor_enabled)
+        self._set_bits(pos, 1)
+
+    def _set_bits(self, pos: int, value: int):
+        """Set (1) or clear (0) every bit that the row at `pos` belongs to."""
+        bit = 1 << pos
+
+        def assign(mask: int) -> int:
+            return mask | bit if value else mask & ~bit
+
+        if self._visited_col[pos]:
+            self._visited = assign(self._visited)
+        if self._monitored_col[pos]:
+            self._monitored = assign(self._monitored)
+        for masks, code in (
+            (self._neighborhood_masks, self._neighborhood[pos]),
+            (self._cuisine_masks, self._cuisine[pos]),
+            (self._priority_masks, self._priority[pos]),
+        ):
+            masks[code] = assign(masks.get(code, 0))
+
+    # -- reads ----------------------------------------------------------
+
+    def _row(self, pos: int) -> dict:
+        name, restaurant_id = self._keys[pos]
+        return {
+            "id": restaurant_id,
+            "name": name,
+            "visited": bool(self._visited_col[pos]),
+            "notes": self._notes[pos],
+            "neighborhood": self._neighborhoods.values[self._neighborhood[pos]],
+            "cuisine_type": self._cuisines.values[self._cuisine[pos]],
+            "booking_urls": self._booking_urls[pos],
+            "monitor_enabled": bool(self._monitored_col[pos]),
+            "priority": self._priorities.values[self._priority[pos]],
+            "created_at": self._created_at[pos],
+            "updated_at": self._updated_at[pos],
+        }
+
+    def get(self, restaurant_id: int) -> Optional[dict]:
+        """Look up one restaurant by id."""
+        with self._lock:
+            key = self._by_id.get(restaurant_id)
+            if key is None:
+                return None
+            return self._row(bisect_left(self._keys, key))
+
+    def _union(self, masks: dict[int, int], interner: _Interner, values: list[str]) -> int:
+        result = 0
+        for value in values:
+            code = interner.codes.get(value)
+            if code is not None:
+                result |= masks.get(code, 0)
+        return result
+
+    def page(self, request: ListingRequest) -> PaginatedResponse:
+        """
+        Serve a restaurant listing with the same semantics as the database path.
+
+        Full-text queries are not supported; callers should use the database
+        when `filters.query` is set. Raises InvalidCursor for a bad cursor.
+        """
+        filters = request.filters
+        page, per_page = request.page, request.per_page
+        include_total, include_facets = request.include_total, request.include_facets
+        keyset = request.keyset
+        after = decode_cursor(request.cursor) if request.cursor else None
+
+        with self._lock:
+            everything = (1 << len(self._keys)) - 1
+            base = everything
+
+            if filters.visited is not None:
+                base &= self._visited if filters.visited else ~self._visited
+            if filters.monitor_enabled is not None:
+                base &= self._monitored if filters.monitor_enabled else ~self._monitored
+            if filters.priority:
+                base &= self._union(self._priority_masks, self._priorities, filters.priority)
+
+            in_neighborhoods = (
+                self._union(self._neighborhood_masks, self._neighborhoods, filters.neighborhood)
+                if filters.neighborhood else everything
+            )
+            in_cuisines = (
+                self._union(self._cuisine_masks, self._cuisines, filters.cuisine_type)
+                if filters.cuisine_type else everything
+            )
+            matched = base & in_neighborhoods & in_cuisines
+
+            facets = None
+            if include_facets:
+                # Disjunctive counts, matching filters.facet_counts()
+                facets = Facets(
+                    neighborhoods=self._facet(self._neighborhood_masks, self._neighborhoods, base & in_cuisines),
+                    cuisine_types=self._facet(self._cuisine_masks, self._cuisines, base & in_neighborhoods)
+                )
+
+            total = matched.bit_count() if include_total or include_facets else None
+
+            if keyset:
+                start = bisect_right(self._keys, after) if after else 0
+            else:
+                start = _nth_set_bit(matched, (page - 1) * per_page)
+
+            positions = []
+            if start is not None:
+                for pos in _iter_set_bits(matched, start):
+                    positions.append(pos)
+                    if len(positions) > per_page:
+                        break
+
+            items = [self._row(pos) for pos in positions[:per_page]]
+            cursor_out = (
+                encode_cursor(*self._keys[positions[per_page - 1]])
+                if len(positions) > per_page else None
+            )
+
+        if not include_total:
+            total = None
+        return PaginatedResponse(
+            items=items,
+            total=total,
+            page=None if keyset else page,
+            per_page=per_page,
+            total_pages=None if total is None else (total + per_page - 1) // per_page,
+            next_cursor=cursor_out,
+            facets=facets
+        )
+
+    def _facet(self, masks: dict[int, int], interner: _Interner, scope: int) -> dict[str, int]:
+        counts = {}
+        for code, mask in masks.items():
+            value = interner.values[code]
+            if not value:
+                continue
+            count = (mask & scope).bit_count()
+            if count:
+                counts[value] = count
+        return dict(sorted(counts.items()))
+
+
+snapshot = RestaurantSnapshot()
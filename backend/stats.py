@@ -0,0 +1,129 @@
+"""
+Cached collection statistics for GET /api/stats.
+
+All counters and facet lists come from one grouped aggregate. The result is
+cached in-process until a write endpoint calls ``stats_cache.invalidate()``,
+and carries an ETag so clients holding the current version get a 304
+without the database being touched.
+"""
+
+import hashlib
+import threading
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import Integer, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models import Restaurant as RestaurantModel
+from schemas import Stats
+
+# Let clients cache stats but revalidate with If-None-Match on every use
+CACHE_HEADERS = {"Cache-Control": "no-cache"}
+
+
+STATS_QUERY = select(
+    RestaurantModel.neighborhood,
+    RestaurantModel.cuisine_type,
+    func.count(RestaurantModel.id),
+    func.sum(case((RestaurantModel.visited == True, 1), else_=0)).cast(Integer),
+    func.sum(case((RestaurantModel.monitor_enabled == True, 1), else_=0)).cast(Integer),
+).group_by(
+    RestaurantModel.neighborhood,
+    RestaurantModel.cuisine_type
+)
+
+
+def stats_from_rows(rows: list) -> Stats:
+    """Fold the STATS_QUERY groups into collection statistics."""
+    total = visited = monitored = 0
+    neighborhoods = set()
+    cuisine_types = set()
+    for neighborhood, cuisine_type, count, visited_count, monitored_count in rows:
+        total += count
+        visited += visited_count or 0
+        monitored += monitored_count or 0
+        if neighborhood:
+            neighborhoods.add(neighborhood)
+        if cuisine_type:
+            cuisine_types.add(cuisine_type)
+
+    return Stats(
+        total_restaurants=total,
+        visited=visited,
+        not_visited=total - visited,
+        monitored=monitored,
+        neighborhoods=sorted(neighborhoods),
+        cuisine_types=sorted(cuisine_types)
+    )
+
+
+def compute_stats(db: Session) -> Stats:
+    """Compute collection statistics in a single GROUP BY query."""
+    return stats_from_rows(db.execute(STATS_QUERY).all())
+
+
+async def compute_stats_async(db: AsyncSession) -> Stats:
+    """Async variant of compute_stats."""
+    return stats_from_rows((await db.execute(STATS_QUERY)).all())
+
+
+class StatsCache:
+    """Process-local cache of the latest Stats and its ETag."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._stats: Optional[Stats] = None
+        self._etag: Optional[str] = None
+
+    def invalidate(self):
+        """Drop the cached stats; call after any write to restaurants."""
+        with self._lock:
+            self._version += 1
+            self._stats = None
+            self._etag = None
+
+    @property
+    def etag(self) -> Optional[str]:
+        """ETag of the cached stats, or None if they need recomputing."""
+        return self._etag
+
+    def _cached(self) -> tuple[Optional[Stats], Optional[str], int]:
+        with self._lock:
+            return self._stats, self._etag, self._version
+
+    def _store(self, stats: Stats, version: int) -> str:
+        etag = '"' + hashlib.sha1(stats.model_dump_json().encode()).hexdigest()[:16] + '"'
+        with self._lock:
+            # Don't cache a result that a concurrent write has already made stale
+            if self._version == version:
+                self._stats = stats
+                self._etag = etag
+        return etag
+
+    def get(self, db: Session) -> tuple[Stats, str]:
+        """Return cached stats and ETag, recomputing them if invalidated."""
+        stats, etag, version = self._cached()
+        if stats is not None:
+            return stats, etag
+        stats = compute_stats(db)
+        return stats, self._store(stats, version)
+
+    async def get_async(self, db: AsyncSession) -> tuple[Stats, str]:
+        """Async variant of get."""
+        stats, etag, version = self._cached()
+        if stats is not None:
+            return stats, etag
+        stats = await compute_stats_async(db)
+        return stats, self._store(stats, version)
+
+
+def not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """A 304 response if the client already holds `etag`, else None."""
+    if etag and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={**CACHE_HEADERS, "ETag": etag})
+    return None
+
+
+stats_cache = StatsCache()
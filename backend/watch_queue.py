@@ -0,0 +1,236 @@
+"""
+Priority queue of watches for the availability scheduler.
+
+Every watch has its own next-due time. The interval starts from the
+restaurant's priority, gets shorter when the watch's slots keep changing and
+when its dates are close, and longer when they're far off. If a known
+reservation-drop time falls inside the interval, the check moves to just
+after the drop. Times are epoch seconds; drop times are server-local.
+"""
+
+import heapq
+import os
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+PRIORITY_INTERVALS = {
+    "urgent": float(os.environ.get("WATCH_INTERVAL_URGENT", "300")),
+    "high": float(os.environ.get("WATCH_INTERVAL_HIGH", "600")),
+    "normal": float(os.environ.get("WATCH_INTERVAL_NORMAL", "1800")),
+}
+PRIORITY_RANK = {"urgent": 0, "high": 1, "normal": 2}
+
+WATCH_MIN_INTERVAL = float(os.environ.get("WATCH_MIN_INTERVAL", "120"))
+WATCH_MAX_INTERVAL = float(os.environ.get("WATCH_MAX_INTERVAL", "7200"))
+
+# "HH:MM" times at which restaurants release new tables, e.g. "09:00,10:00"
+RESERVATION_DROP_TIMES = [
+    t.strip() for t in os.environ.get("RESERVATION_DROP_TIMES", "").split(",") if t.strip()
+]
+DROP_CHECK_DELAY = float(os.environ.get("RESERVATION_DROP_DELAY", "20"))
+
+EPOCH = datetime(1970, 1, 1)
+
+# Weight of the previous churn value when folding in a new check
+CHURN_DECAY = 0.5
+
+
+@dataclass
+class WatchState:
+    watch_id: int
+    priority: str = "normal"
+    first_date: Optional[date] = None
+    last_date: Optional[date] = None
+    next_due: float = 0.0
+    churn: float = 0.0
+    slots: Optional[frozenset] = None
+    in_flight: bool = False
+
+    @property
+    def rank(self) -> int:
+        return PRIORITY_RANK.get(self.priority, PRIORITY_RANK["normal"])
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
+
+def proximity_factor(first_date: Optional[date], last_date: Optional[date], today: date) -> float:
+    """Interval multiplier for how soon the watched dates are."""
+    if last_date is not None and last_date < today:
+        # Window is over; nothing left to find
+        return float("inf")
+    if first_date is None or first_date <= today:
+        days = 0
+    else:
+        days = (first_date - today).days
+    if days <= 1:
+        return 0.5
+    if days <= 7:
+        return 0.75
+    if days <= 30:
+        return 1.0
+    return 2.0
+
+
+def watch_interval(state: WatchState, now: float) -> float:
+    """Seconds until the watch should be checked again."""
+    interval = PRIORITY_INTERVALS.get(state.priority, PRIORITY_INTERVALS["normal"])
+    interval *= 1 - 0.5 * state.churn
+    interval *= proximity_factor(state.first_date, state.last_date, date.fromtimestamp(now))
+    return min(max(interval, WATCH_MIN_INTERVAL), WATCH_MAX_INTERVAL)
+
+
+def next_drop(now: float, until: float, drop_times: list[str] = RESERVATION_DROP_TIMES) -> Optional[float]:
+    """The earliest drop time (plus the check delay) in (now, until], if any."""
+    today = datetime.fromtimestamp(now).date()
+    candidates = []
+    for drop in drop_times:
+        hour, minute = map(int, drop.split(":"))
+        for day in (today, today + timedelta(days=1)):
+            at = datetime(day.year, day.month, day.day, hour, minute).timestamp() + DROP_CHECK_DELAY
+            if now < at <= until:
+                candidates.append(at)
+    return min(candidates, default=None)
+
+
+class WatchQueue:
+    """Min-heap of watches by next-due time, with priority breaking ties under load."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._states: dict[int, WatchState] = {}
+        self._heap: list[tuple[float, int]] = []
+        self.lag_seconds = 0.0
+        self.backlog = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _push(self, state: WatchState, due: float):
+        state.next_due = due
+        state.in_flight = False
+        heapq.heappush(self._heap, (due, state.watch_id))
+
+    def sync(self, rows: Iterable, now: Optional[float] = None):
+        """
+        Reconcile the queue with the active watches.
+
+        Rows carry id, priority, date_range_start, date_range_end and
+        last_checked. New watches are due one interval after their last
+        check (immediately if never checked); watches no longer listed are
+        dropped.
+        """
+        now = self.clock() if now is None else now
+        seen = set()
+        for row in rows:
+            seen.add(row.id)
+            state = self._states.get(row.id)
+            priority = row.priority or "normal"
+            first_date = _parse_date(row.date_range_start)
+            last_date = _parse_date(row.date_range_end)
+
+            if state is None:
+                state = WatchState(row.id, priority, first_date, last_date)
+                self._states[row.id] = state
+                due = now
+                if row.last_checked is not None:
+                    # last_checked is naive UTC
+                    checked_ts = (row.last_checked.replace(tzinfo=None) - EPOCH).total_seconds()
+                    due = max(now, checked_ts + watch_interval(state, now))
+                self._push(state, due)
+                continue
+
+            changed = (state.priority, state.first_date, state.last_date) != (priority, first_date, last_date)
+            state.priority, state.first_date, state.last_date = priority, first_date, last_date
+            if changed and not state.in_flight:
+                # Pull the watch forward if its new settings want it sooner
+                due = min(state.next_due, now + watch_interval(state, now))
+                if due < state.next_due:
+                    self._push(state, due)
+
+        for watch_id in set(self._states) - seen:
+            del self._states[watch_id]
+
+    def pop_due(self, budget: int, now: Optional[float] = None) -> list[int]:
+        """
+        Take up to `budget` due watches, most urgent priority first.
+
+        Due watches beyond the budget stay queued for the next cycle.
+        """
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, watch_id = heapq.heappop(self._heap)
+            state = self._states.get(watch_id)
+            # Skip entries for removed watches or superseded due times
+            if state is None or state.in_flight or state.next_due != next_due:
+                continue
+            due.append(state)
+
+        self.lag_seconds = max((now - s.next_due for s in due), default=0.0)
+        due.sort(key=lambda s: (s.rank, s.next_due))
+        taken, rest = due[:budget], due[budget:]
+        for state in rest:
+            heapq.heappush(self._heap, (state.next_due, state.watch_id))
+        for state in taken:
+            state.in_flight = True
+        self.backlog = len(rest)
+        return [s.watch_id for s in taken]
+
+    def schedule(self, watch_id: int, slots: Optional[Iterable] = None, now: Optional[float] = None):
+        """Queue a watch's next check after it ran, folding in its slot churn."""
+        state = self._states.get(watch_id)
+        if state is None:
+            return
+        now = self.clock() if now is None else now
+
+        if slots is not None:
+            found = frozenset(slots)
+            if state.slots is not None:
+                union = found | state.slots
+                change = len(found ^ state.slots) / len(union) if union else 0.0
+                state.churn = CHURN_DECAY * state.churn + (1 - CHURN_DECAY) * change
+            state.slots = found
+
+        interval = watch_interval(state, now)
+        due = now + interval
+        drop = next_drop(now, due)
+        if drop is not None:
+            due = drop
+        self._push(state, due)
+
+    def release(self, watch_ids: Iterable[int], now: Optional[float] = None):
+        """Reschedule popped watches that never reported back (e.g. after an error)."""
+        for watch_id in watch_ids:
+            state = self._states.get(watch_id)
+            if state is not None and state.in_flight:
+                self.schedule(watch_id, now=now)
+
+    def schedule_now(self, watch_id: int, now: Optional[float] = None):
+        """Make a watch due immediately (it must have been synced in)."""
+        state = self._states.get(watch_id)
+        if state is not None and not state.in_flight:
+            self._push(state, self.clock() if now is None else now)
+
+    def overdue_seconds(self, now: Optional[float] = None) -> float:
+        """How long the most overdue queued watch has been due (0 if none is)."""
+        now = self.clock() if now is None else now
+        waiting = [s.next_due for s in self._states.values() if not s.in_flight]
+        return max(now - min(waiting), 0.0) if waiting else 0.0
+
+    def metrics(self, now: Optional[float] = None) -> dict:
+        now = self.clock() if now is None else now
+        upcoming = [s.next_due for s in self._states.values() if not s.in_flight]
+        return {
+            "watches": len(self._states),
+            "due": sum(1 for due in upcoming if due <= now),
+            "backlog": self.backlog,
+            "lag_seconds": self.lag_seconds,
+            "next_due_in": max(min(upcoming) - now, 0.0) if upcoming else None,
+        }
@@ -1,14 +1,18 @@
 import { useState, useEffect, useCallback } from 'react';
-import type { Restaurant, Stats } from './types';
+import type { Facets, PaginatedResponse, Restaurant, Stats } from './types';
 import { fetchRestaurants, fetchStats } from './api';
 import { SearchBar } from './components/SearchBar';
 import { FilterBar } from './components/FilterBar';
 import { RestaurantCard } from './components/RestaurantCard';
 import { GracesList } from './components/GracesList';
+import { Pagination } from './components/Pagination';
 
 type View = 'restaurants' | 'graces-list';
 type VisitedFilter = 'all' | 'visited' | 'not_visited';
 
+const PAGE_SIZE = 200;
+const RESULTS_PER_PAGE = 48;
+
 function App() {
   const [view, setView] = useState<View>('restaurants');
   const [restaurants, setRestaurants] = useState<Restaurant[]>([]);
@@ -17,6 +21,9 @@ function App() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [total, setTotal] = useState(0);
+  const [page, setPage] = useState(1);
+  const [totalPages, setTotalPages] = useState(1);
+  const [facets, setFacets] = useState<Facets | null>(null);
 
   const [selectedDate, setSelectedDate] = useState(() => {
     return new Date().toISOString().split('T')[0];
@@ -33,31 +40,18 @@ function App() {
       setLoading(true);
       const response = await fetchRestaurants({
         query: searchQuery || undefined,
-        page: 1,
-        per_page: 1000,
+        neighborhood: selectedNeighborhoods,
+        cuisine_type: selectedCuisines,
+        visited: visitedFilter === 'all' ? undefined : visitedFilter === 'visited',
+        page,
+        per_page: RESULTS_PER_PAGE,
+        include_facets: true,
       });
 
-      setAllRestaurants(response.items);
-      let filteredItems = response.items;
-
-      if (selectedNeighborhoods.length > 0) {
-        filteredItems = filteredItems.filter(r =>
-          r.neighborhood && selectedNeighborhoods.includes(r.neighborhood)
-        );
-      }
-      if (selectedCuisines.length > 0) {
-        filteredItems = filteredItems.filter(r =>
-          r.cuisine_type && selectedCuisines.includes(r.cuisine_type)
-        );
-      }
-      if (visitedFilter === 'visited') {
-        filteredItems = filteredItems.filter(r => r.visited);
-      } else if (visitedFilter === 'not_visited') {
-        filteredItems = filteredItems.filter(r => !r.visited);
-      }
-
-      setRestaurants(filteredItems);
-      setTotal(filteredItems.length);
+      setRestaurants(response.items);
+      setTotal(response.total ?? 0);
+      setTotalPages(response.total_pages ?? 1);
+      setFacets(response.facets);
       setError(null);
     } catch (err) {
       setError('Failed to load restaurants. Make sure the backend is running.');
@@ -65,7 +59,26 @@ function App() {
     } finally {
       setLoading(false);
     }
-  }, [searchQuery, selectedNeighborhoods, selectedCuisines, visitedFilter]);
+  }, [searchQuery, selectedNeighborhoods, selectedCuisines, visitedFilter, page]);
+
+  const loadAllRestaurants = useCallback(async () => {
+    try {
+      // Walk the keyset cursor so no single request has to return everything
+      const items: Restaurant[] = [];
+      let cursor: string | null = '';
+      while (cursor !== null) {
+        const response: PaginatedResponse = await fetchRestaurants({
+          cursor,
+          per_page: PAGE_SIZE,
+        });
+        items.push(...response.items);
+        cursor = response.next_cursor;
+      }
+      setAllRestaurants(items);
+    } catch (err) {
+      console.error('Failed to load restaurants:', err);
+    }
+  }, []);
 
   const loadStats = useCallback(async () => {
     try {
@@ -80,11 +93,26 @@ function App() {
     loadRestaurants();
   }, [loadRestaurants]);
 
+  useEffect(() => {
+    loadAllRestaurants();
+  }, [loadAllRestaurants]);
+
   useEffect(() => {
     loadStats();
   }, [loadStats]);
 
+  const handleSearchChange = useCallback((query: string) => {
+    setSearchQuery(query);
+    setPage(1);
+  }, []);
+
+  const handleVisitedFilterChange = useCallback((filter: VisitedFilter) => {
+    setVisitedFilter(filter);
+    setPage(1);
+  }, []);
+
   const handleNeighborhoodToggle = useCallback((neighborhood: string) => {
+    setPage(1);
     setSelectedNeighborhoods(prev =>
       prev.includes(neighborhood)
         ? prev.filter(n => n !== neighborhood)
@@ -93,6 +121,7 @@ function App() {
   }, []);
 
   const handleCuisineToggle = useCallback((cuisine: string) => {
+    setPage(1);
     setSelectedCuisines(prev =>
       prev.includes(cuisine)
         ? prev.filter(c => c !== cuisine)
@@ -104,6 +133,7 @@ function App() {
     setSelectedNeighborhoods([]);
     setSelectedCuisines([]);
     setVisitedFilter('all');
+    setPage(1);
   }, []);
 
   const handleRestaurantUpdated = useCallback((updated: Restaurant) => {
@@ -163,7 +193,7 @@ function App() {
             <div className="mb-8">
               <SearchBar
                 value={searchQuery}
-                onChange={setSearchQuery}
+                onChange={handleSearchChange}
                 placeholder="Search restaurants..."
               />
             </div>
@@ -204,12 +234,14 @@ function App() {
               <FilterBar
                 neighborhoods={stats.neighborhoods}
                 cuisineTypes={stats.cuisine_types}
+                neighborhoodCounts={facets?.neighborhoods}
+                cuisineCounts={facets?.cuisine_types}
                 selectedNeighborhoods={selectedNeighborhoods}
                 selectedCuisines={selectedCuisines}
                 visitedFilter={visitedFilter}
                 onNeighborhoodToggle={handleNeighborhoodToggle}
                 onCuisineToggle={handleCuisineToggle}
-                onVisitedFilterChange={setVisitedFilter}
+                onVisitedFilterChange={handleVisitedFilterChange}
                 onClearFilters={clearFilters}
               />
             )}
@@ -267,6 +299,10 @@ function App() {
                 </div>
               )
             )}
+
+            {!loading && !error && (
+              <Pagination currentPage={page} totalPages={totalPages} onPageChange={setPage} />
+            )}
           </>
         )}
 
@@ -6,22 +6,33 @@ const API_BASE = import.meta.env.VITE_API_BASE_URL
 
 export async function fetchRestaurants(params: {
   query?: string;
-  neighborhood?: string;
-  cuisine_type?: string;
+  neighborhood?: string | string[];
+  cuisine_type?: string | string[];
   visited?: boolean;
   monitor_enabled?: boolean;
+  priority?: string[];
   page?: number;
   per_page?: number;
+  cursor?: string;
+  include_total?: boolean;
+  include_facets?: boolean;
 }): Promise<PaginatedResponse> {
   const searchParams = new URLSearchParams();
+  const appendAll = (key: string, value?: string | string[]) => {
+    for (const v of ([] as string[]).concat(value ?? [])) searchParams.append(key, v);
+  };
   
   if (params.query) searchParams.set('query', params.query);
-  if (params.neighborhood) searchParams.set('neighborhood', params.neighborhood);
-  if (params.cuisine_type) searchParams.set('cuisine_type', params.cuisine_type);
+  appendAll('neighborhood', params.neighborhood);
+  appendAll('cuisine_type', params.cuisine_type);
+  appendAll('priority', params.priority);
   if (params.visited !== undefined) searchParams.set('visited', String(params.visited));
   if (params.monitor_enabled !== undefined) searchParams.set('monitor_enabled', String(params.monitor_enabled));
   if (params.page) searchParams.set('page', String(params.page));
   if (params.per_page) searchParams.set('per_page', String(params.per_page));
+  if (params.cursor !== undefined) searchParams.set('cursor', params.cursor);
+  if (params.include_total !== undefined) searchParams.set('include_total', String(params.include_total));
+  if (params.include_facets) searchParams.set('include_facets', 'true');
   
   const response = await fetch(`${API_BASE}/restaurants?${searchParams}`);
   if (!response.ok) throw new Error('Failed to fetch restaurants');
@@ -52,6 +63,33 @@ export async function updateRestaurant(id: number, data: Partial<Restaurant>): P
   return response.json();
 }
 
+export interface BatchUpdateResult {
+  items: Restaurant[];
+  not_found: number[];
+}
+
+export async function batchToggleVisited(ids: number[]): Promise<BatchUpdateResult> {
+  const response = await fetch(`${API_BASE}/restaurants:batch-toggle-visited`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ ids }),
+  });
+  if (!response.ok) throw new Error('Failed to toggle visited');
+  return response.json();
+}
+
+export async function batchUpdateRestaurants(
+  updates: (Partial<Restaurant> & { id: number })[]
+): Promise<BatchUpdateResult> {
+  const response = await fetch(`${API_BASE}/restaurants:batch`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ updates }),
+  });
+  if (!response.ok) throw new Error('Failed to update restaurants');
+  return response.json();
+}
+
 export async function createWatchConfig(data: {
   restaurant_id: number;
   party_size: number;
@@ -69,6 +107,37 @@ export async function createWatchConfig(data: {
   return response.json();
 }
 
+export interface WatchConfigBatchResult {
+  items: WatchConfig[];
+  not_found: number[];
+  already_watched: number[];
+}
+
+export async function createWatchConfigs(
+  items: Parameters<typeof createWatchConfig>[0][]
+): Promise<WatchConfigBatchResult> {
+  const response = await fetch(`${API_BASE}/watch-configs:batch`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ items }),
+  });
+  if (!response.ok) throw new Error('Failed to create watch configs');
+  return response.json();
+}
+
+export async function updateWatchConfig(
+  id: number,
+  data: Partial<Omit<WatchConfig, 'id' | 'restaurant_id' | 'last_checked' | 'created_at'>>
+): Promise<WatchConfig> {
+  const response = await fetch(`${API_BASE}/watch-configs/${id}`, {
+    method: 'PATCH',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(data),
+  });
+  if (!response.ok) throw new Error('Failed to update watch config');
+  return response.json();
+}
+
 export async function deleteWatchConfig(id: number): Promise<void> {
   const response = await fetch(`${API_BASE}/watch-configs/${id}`, {
     method: 'DELETE',
@@ -83,28 +152,72 @@ export async function fetchWatchConfigs(): Promise<WatchConfig[]> {
 }
 
 export interface AvailabilitySlot {
+  date: string;
   time: string;
+  party_size: number;
   booking_url: string;
   platform: string;
 }
 
+export interface AvailabilityResult {
+  restaurant_id: number;
+  slots: AvailabilitySlot[];
+  cached: boolean;
+  error: string | null;
+}
+
 export interface AvailabilityResults {
   results: Record<number, AvailabilitySlot[]>;
+  errors: Record<number, string>;
   date: string;
   party_size: number;
 }
 
-export async function searchAvailability(params: {
-  restaurant_ids: number[];
-  date: string;
-  time: string;
-  party_size: number;
-}): Promise<AvailabilityResults> {
+// The response is NDJSON streamed as each restaurant resolves; `onResult`
+// sees every restaurant as it arrives, the promise resolves with all of them.
+export async function searchAvailability(
+  params: {
+    restaurant_ids: number[];
+    date: string;
+    time: string;
+    party_size: number;
+  },
+  onResult?: (result: AvailabilityResult) => void,
+): Promise<AvailabilityResults> {
   const response = await fetch(`${API_BASE}/availability/search`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
     body: JSON.stringify(params),
   });
-  if (!response.ok) throw new Error('Failed to search availability');
-  return response.json();
+  if (!response.ok || !response.body) throw new Error('Failed to search availability');
+
+  const results: AvailabilityResults = {
+    results: {},
+    errors: {},
+    date: params.date,
+    party_size: params.party_size,
+  };
+  const handle = (line: string) => {
+    if (!line.trim()) return;
+    const message = JSON.parse(line);
+    if (message.done) return;
+    const result = message as AvailabilityResult;
+    results.results[result.restaurant_id] = result.slots;
+    if (result.error) results.errors[result.restaurant_id] = result.error;
+    onResult?.(result);
+  };
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split('\n');
+    buffered = lines.pop() ?? '';
+    lines.forEach(handle);
+  }
+  handle(buffered + decoder.decode());
+  return results;
 }
@@ -5,6 +5,8 @@ type VisitedFilter = 'all' | 'visited' | 'not_visited';
 interface FilterBarProps {
   neighborhoods: string[];
   cuisineTypes: string[];
+  neighborhoodCounts?: Record<string, number>;
+  cuisineCounts?: Record<string, number>;
   selectedNeighborhoods: string[];
   selectedCuisines: string[];
   visitedFilter: VisitedFilter;
@@ -17,6 +19,8 @@ interface FilterBarProps {
 export function FilterBar({
   neighborhoods,
   cuisineTypes,
+  neighborhoodCounts,
+  cuisineCounts,
   selectedNeighborhoods,
   selectedCuisines,
   visitedFilter,
@@ -64,6 +68,9 @@ export function FilterBar({
                       className="w-4 h-4 accent-charcoal"
                     />
                     <span className="text-charcoal">{neighborhood}</span>
+                    {neighborhoodCounts && (
+                      <span className="ml-auto text-xs text-stone">{neighborhoodCounts[neighborhood] ?? 0}</span>
+                    )}
                   </label>
                 ))}
               </div>
@@ -102,6 +109,9 @@ export function FilterBar({
                       className="w-4 h-4 accent-charcoal"
                     />
                     <span className="text-charcoal">{cuisine}</span>
+                    {cuisineCounts && (
+                      <span className="ml-auto text-xs text-stone">{cuisineCounts[cuisine] ?? 0}</span>
+                    )}
                   </label>
                 ))}
               </div>
@@ -41,12 +41,19 @@ export interface Stats {
   cuisine_types: string[];
 }
 
+export interface Facets {
+  neighborhoods: Record<string, number>;
+  cuisine_types: Record<string, number>;
+}
+
 export interface PaginatedResponse {
   items: Restaurant[];
-  total: number;
-  page: number;
+  total: number | null;
+  page: number | null;
   per_page: number;
-  total_pages: number;
+  total_pages: number | null;
+  next_cursor: string | null;
+  facets: Facets | null;
 }
 
 export interface Filters {